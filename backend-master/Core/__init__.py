@@ -0,0 +1,3 @@
+# Core/__init__.py
+
+#   Piezas comunes a toda la API (clase de respuesta JSON, middlewares, etc.)
@@ -0,0 +1,198 @@
+# backend-master/Core/admision.py
+
+# Control de admisión por prioridad, para que en los días de carga/publicación de notas los
+# informes de los estudiantes no dejen sin conexiones a los docentes que cargan notas.
+#   - Cada petición cae en una clase (ver clase_de):
+#       * alta: escrituras (POST/PUT/PATCH/DELETE) y login/registro;
+#       * baja: informes y tablas pesadas (RUTAS_BAJA);
+#       * normal: el resto.
+#     Las rutas de ADMISION_EXENTAS (chequeos de salud) no pasan por el control.
+#   - Cada clase tiene un cupo de peticiones en curso, una cola de espera acotada y un tiempo
+#     máximo de espera en la cola. Los cupos se calculan sobre las conexiones del pool del worker
+#     (DB_POOL_SIZE + DB_MAX_OVERFLOW): la clase baja nunca ocupa más de una cuarta parte.
+#     Se pisan con ADMISION_ALTA / ADMISION_NORMAL / ADMISION_BAJA = "cupo,cola,espera_s".
+#   - Si la cola de la clase está llena: 429. Si se vence la espera: 503. Si el pool está casi
+#     agotado (ADMISION_SATURACION de las conexiones en uso) la clase baja se rechaza sin esperar
+#     (503). Las respuestas llevan Retry-After.
+#   - Métricas: contadores admision.* en /api/metricas y el estado de cada clase (en curso,
+#     esperando, máximo de espera) en su sección "admision".
+# Todo corre en el event loop del worker: no hacen falta locks.
+
+import asyncio
+import logging
+import os
+import re
+from collections import deque
+from typing import Dict, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from database import DB_MAX_OVERFLOW, DB_POOL_SIZE, engine
+from Core.metricas import metricas
+from Core.respuestas import RespuestaJSON
+
+logger = logging.getLogger(__name__)
+
+
+ADMISION = os.getenv("ADMISION", "1").lower() in ("1", "true", "si", "sí")
+ADMISION_SATURACION = float(os.getenv("ADMISION_SATURACION", "0.8"))
+ADMISION_RETRY_AFTER_S = int(os.getenv("ADMISION_RETRY_AFTER_S", "5"))
+
+CONEXIONES = DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+# Rutas de la clase baja ("*" = un segmento de la ruta)
+RUTAS_BAJA = (
+    "/api/notas/planilla-acta",
+    "/api/notas/informe-individual",
+    "/api/notas/faltantes",
+    "/api/estudiantes/notas/informe-individual",
+    "/api/estudiantes/*/dashboard",
+    "/api/materias/tabla",
+    "/api/inasistencias/curso/*/matriz",
+)
+# Escrituras que no son de alta prioridad (un lote puede ser sólo de lecturas)
+RUTAS_NORMAL_ESCRITURA = ("/api/batch",)
+# Lecturas de alta prioridad
+RUTAS_ALTA = ("/api/login", "/api/register")
+ADMISION_EXENTAS = ("/api/salud/",)
+
+METODOS_LECTURA = ("GET", "HEAD", "OPTIONS")
+
+
+def _patrones(rutas) -> re.Pattern:
+    return re.compile("|".join("^" + re.escape(r).replace(r"\*", "[^/]+") for r in rutas))
+
+
+_BAJA = _patrones(RUTAS_BAJA)
+_NORMAL_ESCRITURA = _patrones(RUTAS_NORMAL_ESCRITURA)
+_ALTA = _patrones(RUTAS_ALTA)
+
+
+class Rechazo(Exception):
+    def __init__(self, status_code: int, motivo: str):
+        self.status_code = status_code
+        self.motivo = motivo
+
+
+class ClaseAdmision:
+    def __init__(self, nombre: str, cupo: int, cola: int, espera_s: float):
+        self.nombre = nombre
+        self.cupo = max(cupo, 1)
+        self.cola = cola
+        self.espera_s = espera_s
+        self.en_curso = 0
+        self.esperando: deque = deque()
+        self.max_esperando = 0
+
+    async def entrar(self):
+        if self.en_curso < self.cupo and not self.esperando:
+            self.en_curso += 1
+            return
+        if len(self.esperando) >= self.cola:
+            raise Rechazo(429, "cola llena")
+
+        turno = asyncio.get_running_loop().create_future()
+        self.esperando.append(turno)
+        self.max_esperando = max(self.max_esperando, len(self.esperando))
+        try:
+            await asyncio.wait({turno}, timeout=self.espera_s)
+        except BaseException:
+            # Se cortó la conexión mientras esperaba
+            self._abandonar(turno)
+            raise
+        if not turno.done():
+            self._abandonar(turno)
+            raise Rechazo(503, "espera vencida")
+
+    def _abandonar(self, turno: asyncio.Future):
+        if turno.done() and not turno.cancelled():
+            self.salir()   # ya le habían pasado el lugar: se devuelve
+            return
+        turno.cancel()
+        try:
+            self.esperando.remove(turno)
+        except ValueError:
+            pass
+
+    def salir(self):
+        # El lugar pasa directo al primero de la cola (en_curso no cambia)
+        while self.esperando:
+            turno = self.esperando.popleft()
+            if not turno.done():
+                turno.set_result(None)
+                return
+        self.en_curso -= 1
+
+    def estado(self) -> dict:
+        return {"cupo": self.cupo, "en_curso": self.en_curso, "esperando": len(self.esperando),
+                "cola": self.cola, "max_esperando": self.max_esperando}
+
+
+def _clase_desde_env(nombre: str, cupo: int, cola: int, espera_s: float) -> ClaseAdmision:
+    valor = os.getenv(f"ADMISION_{nombre.upper()}")
+    if valor:
+        partes = [p.strip() for p in valor.split(",")]
+        cupo = int(partes[0])
+        cola = int(partes[1]) if len(partes) > 1 else cola
+        espera_s = float(partes[2]) if len(partes) > 2 else espera_s
+    return ClaseAdmision(nombre, cupo, cola, espera_s)
+
+
+CLASES: Dict[str, ClaseAdmision] = {
+    "alta": _clase_desde_env("alta", CONEXIONES, 200, 10),
+    "normal": _clase_desde_env("normal", int(CONEXIONES * 0.6), 50, 5),
+    "baja": _clase_desde_env("baja", CONEXIONES // 4, 20, 2),
+}
+
+
+def clase_de(metodo: str, ruta: str) -> Optional[str]:
+    if ruta.startswith(ADMISION_EXENTAS):
+        return None
+    if _ALTA.match(ruta):
+        return "alta"
+    if metodo not in METODOS_LECTURA:
+        return "normal" if _NORMAL_ESCRITURA.match(ruta) else "alta"
+    if _BAJA.match(ruta):
+        return "baja"
+    return "normal"
+
+
+def pool_saturado() -> bool:
+    return engine.pool.checkedout() >= CONEXIONES * ADMISION_SATURACION
+
+
+def estado_admision() -> dict:
+    return {nombre: clase.estado() for nombre, clase in CLASES.items()}
+
+
+class MiddlewareAdmision:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        nombre = clase_de(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if nombre is None:
+            await self.app(scope, receive, send)
+            return
+
+        clase = CLASES[nombre]
+        try:
+            if nombre == "baja" and pool_saturado():
+                raise Rechazo(503, "pool saturado")
+            await clase.entrar()
+        except Rechazo as rechazo:
+            metricas.sumar(f"admision.rechazadas {nombre} {rechazo.motivo}")
+            logger.warning("Petición rechazada (%s, clase %s): %s %s", rechazo.motivo, nombre, scope["method"], scope["path"])
+            respuesta = RespuestaJSON(
+                status_code=rechazo.status_code,
+                content={"detail": "El servidor está ocupado. Intente nuevamente en unos segundos."},
+                headers={"Retry-After": str(ADMISION_RETRY_AFTER_S)},
+            )
+            await respuesta(scope, receive, send)
+            return
+
+        metricas.sumar(f"admision.admitidas {nombre}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            clase.salir()
@@ -0,0 +1,139 @@
+# backend-master/Core/arranque.py
+
+# Arranque de cada worker y estado para los chequeos de salud (Routes/routes_salud.py).
+#   - despues_del_fork(): con preload (servidor.py) la app se importa una sola vez en el proceso
+#     principal y los workers la heredan con fork. Las conexiones del pool no se pueden compartir
+#     entre procesos: cada worker descarta las heredadas y abre las suyas.
+#   - calentar(): antes de aceptar peticiones, cada worker abre las conexiones del pool, crea la
+#     tabla de versiones de catálogos si falta y, con réplicas, la de leer lo propio (si el
+#     usuario de la base no puede, se sigue sin ellas), carga el índice de búsqueda de estudiantes, lee la versión del catálogo de materias
+#     y arma los serializadores de los listados grandes. Así las primeras peticiones no pagan ese
+#     costo (y no se abren decenas de conexiones de golpe cuando llega tráfico a un worker nuevo).
+#   - ciclo_de_vida(): lifespan de FastAPI (main.py). Uvicorn no acepta conexiones hasta que
+#     termina. Si la base no responde el worker arranca igual, pero /api/salud/listo devuelve
+#     503 hasta que un calentamiento termine bien.
+#   - reintentar_calentamiento(): lo llama /api/salud/listo mientras el worker no está listo.
+#     Relanza calentar() en un hilo aparte, uno a la vez y como mucho cada ARRANQUE_REINTENTO_S:
+#     con la base caída los chequeos no se quedan esperando ni abren el pool una y otra vez.
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+import schemas
+from database import engine, localSession, replicas
+from Core.replicas import crear_lectura_primaria
+from Core.respuestas import adaptador
+
+logger = logging.getLogger(__name__)
+
+# Conexiones que se abren al arrancar (por defecto, todo el pool fijo)
+ARRANQUE_CONEXIONES = int(os.getenv("ARRANQUE_CONEXIONES", str(engine.pool.size())))
+# Tiempo mínimo entre dos calentamientos (reintentos desde /api/salud/listo)
+ARRANQUE_REINTENTO_S = float(os.getenv("ARRANQUE_REINTENTO_S", "10"))
+
+# Listados cuyo serializador se arma al arrancar (ver Core/respuestas.py)
+TIPOS_LISTADOS = (
+    list[schemas.MateriaResponse],
+    list[schemas.EstudianteResponse],
+    list[schemas.DocenteResponse],
+    list[schemas.CursoCicloLectivo],
+)
+
+estado = {
+    "pid": os.getpid(),
+    "listo": False,
+    "inicio": time.time(),
+    "calentamiento_ms": None,
+    "error": None,
+}
+
+_calentando = threading.Lock()
+_ultimo_intento = 0.0
+
+
+def despues_del_fork():
+    """Descarta las conexiones heredadas del proceso principal (sin cerrarlas: son del padre)."""
+    engine.dispose(close=False)
+    estado.update(pid=os.getpid(), listo=False, inicio=time.time(), calentamiento_ms=None, error=None)
+
+
+def _ping(_):
+    with engine.connect() as conexion:
+        conexion.execute(text("SELECT 1"))
+
+
+def calentar() -> bool:
+    """Prepara el worker. Devuelve True si quedó listo para recibir tráfico."""
+    from Services.busqueda_service import indice_estudiantes
+    from Services.catalogo_service import crear_versiones, version_catalogo
+    global _ultimo_intento
+
+    _ultimo_intento = time.monotonic()
+    t0 = time.perf_counter()
+    try:
+        # Las conexiones se piden a la vez, para que el pool las abra todas
+        cantidad = max(ARRANQUE_CONEXIONES, 1)
+        with ThreadPoolExecutor(max_workers=cantidad) as ejecutor:
+            list(ejecutor.map(_ping, range(cantidad)))
+
+        try:
+            with engine.begin() as conexion:
+                crear_versiones(conexion)
+        except Exception as e:
+            logger.warning("No se pudo crear t_catalogo_version (se crea con /api/migrate): %s", getattr(e, "orig", e))
+        if replicas:
+            try:
+                with engine.begin() as conexion:
+                    crear_lectura_primaria(conexion)
+            except Exception as e:
+                logger.warning("No se pudo crear t_lectura_primaria (se crea con /api/migrate): %s", getattr(e, "orig", e))
+
+        db = localSession()
+        try:
+            indice_estudiantes.cargar(db)
+            version_catalogo(db, "materias")
+        finally:
+            db.close()
+
+        for tipo in TIPOS_LISTADOS:
+            adaptador(tipo)
+    except Exception as e:
+        estado.update(listo=False, error=str(e))
+        logger.error("Calentamiento del worker %s falló: %s", os.getpid(), e)
+        return False
+
+    estado.update(listo=True, error=None, calentamiento_ms=round((time.perf_counter() - t0) * 1000, 1))
+    logger.info("Worker %s listo en %s ms", os.getpid(), estado["calentamiento_ms"])
+    return True
+
+
+def reintentar_calentamiento():
+    """Si el worker no está listo, relanza calentar() en segundo plano (no espera el resultado)."""
+    if estado["listo"] or time.monotonic() - _ultimo_intento < ARRANQUE_REINTENTO_S:
+        return
+    if not _calentando.acquire(blocking=False):
+        return   # ya hay uno en curso
+
+    def _correr():
+        try:
+            calentar()
+        finally:
+            _calentando.release()
+
+    threading.Thread(target=_correr, name="calentamiento", daemon=True).start()
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    await run_in_threadpool(calentar)
+    yield
+    # Al terminar (reinicio o apagado) se devuelven las conexiones del worker
+    engine.dispose()
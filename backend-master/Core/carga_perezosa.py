@@ -0,0 +1,107 @@
+# backend-master/Core/carga_perezosa.py
+
+# Registro de los routers de la app, con un modo de carga perezosa para arrancar más rápido.
+#   - Modo normal: se importan todos los módulos de Routes al importar main.py (como siempre).
+#   - Modo perezoso (CARGA_PEREZOSA=1): en lugar de cada router se registra un marcador que
+#     atiende las rutas que empiezan con sus prefijos. La primera petición que llega a uno importa
+#     el módulo (y sus servicios y esquemas), pone las rutas reales en el lugar del marcador, en el
+#     mismo orden en que se habrían registrado, y vuelve a despachar la petición. Cada módulo se
+#     importa una sola vez; las peticiones siguientes van directo a las rutas reales.
+#     /docs y /openapi.json cargan todos los routers antes de armar el esquema.
+# Conviene para contenedores que escalan y arrancan seguido. Con servidor.py (preload + fork)
+# no hace falta: la app se importa una sola vez para todos los workers.
+# Ver benchmarks/bench_arranque.py para la comparación.
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import BaseRoute, Match, NoMatchFound, get_route_path
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+CARGA_PEREZOSA = os.getenv("CARGA_PEREZOSA", "0").lower() in ("1", "true", "si", "sí")
+
+
+@dataclass
+class RouterRegistrado:
+    modulo: str                   # p. ej. "Routes.routes_materias"
+    prefix: str = ""              # prefijo con el que se incluye el router
+    tags: Optional[List[str]] = None
+    # Prefijos de las rutas que atiende el router (con el prefix incluido). Sólo se usan en modo
+    # perezoso; si el router agrega una ruta con otro prefijo, hay que sumarlo acá.
+    rutas: Tuple[str, ...] = field(default_factory=tuple)
+    atributo: str = "router"
+
+
+class _Marcador(BaseRoute):
+    """Ocupa el lugar de un router todavía no importado."""
+
+    def __init__(self, app: FastAPI, registro: RouterRegistrado):
+        self.app_fastapi = app
+        self.registro = registro
+        self.lock = asyncio.Lock()
+
+    def matches(self, scope: Scope):
+        if scope["type"] == "http" and get_route_path(scope).startswith(self.registro.rutas):
+            return Match.FULL, {}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params):
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send):
+        async with self.lock:
+            if self in self.app_fastapi.router.routes:
+                # El import va en un hilo para no frenar las demás peticiones mientras tanto
+                _reemplazar(self.app_fastapi, self, await run_in_threadpool(_importar, self.registro))
+        await self.app_fastapi.router.app(scope, receive, send)
+
+
+def _importar(registro: RouterRegistrado):
+    logger.debug("Cargando %s", registro.modulo)
+    # __import__ (y no importlib.import_module) para que el import figure en -X importtime
+    return getattr(__import__(registro.modulo, fromlist=[registro.atributo]), registro.atributo)
+
+
+def _reemplazar(app: FastAPI, marcador: _Marcador, router):
+    rutas = app.router.routes
+    if marcador not in rutas:  # ya lo cargó otra petición (o /docs)
+        return
+    # include_router agrega las rutas al final: se mueven al lugar del marcador
+    antes = len(rutas)
+    app.include_router(router, prefix=marcador.registro.prefix, tags=marcador.registro.tags)
+    nuevas = rutas[antes:]
+    del rutas[antes:]
+    posicion = rutas.index(marcador)
+    rutas[posicion:posicion + 1] = nuevas
+    app.openapi_schema = None
+
+
+def cargar_todos(app: FastAPI):
+    """Reemplaza todos los marcadores que queden por sus routers."""
+    for marcador in [r for r in app.router.routes if isinstance(r, _Marcador)]:
+        _reemplazar(app, marcador, _importar(marcador.registro))
+
+
+def registrar_routers(app: FastAPI, registros: Sequence[RouterRegistrado], perezosa: bool = CARGA_PEREZOSA):
+    if not perezosa:
+        for registro in registros:
+            app.include_router(_importar(registro), prefix=registro.prefix, tags=registro.tags)
+        return
+
+    for registro in registros:
+        app.router.routes.append(_Marcador(app, registro))
+
+    openapi_original = app.openapi
+
+    def openapi():
+        cargar_todos(app)
+        return openapi_original()
+
+    app.openapi = openapi
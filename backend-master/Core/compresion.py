@@ -0,0 +1,208 @@
+# backend-master/Core/compresion.py
+
+# Middleware de compresión de respuestas (gzip, y brotli si está instalado).
+#   - Elige la codificación según Accept-Encoding (respetando q=0); con el mismo peso prefiere br.
+#   - Sólo comprime tipos de texto (JSON, NDJSON, CSV, HTML...) y respuestas que todavía no
+#     vienen comprimidas. Las que llegan completas y pesan menos de COMPRESION_MINIMO bytes se
+#     envían tal cual (comprimir unos pocos bytes cuesta más de lo que ahorra).
+#   - Las respuestas en streaming (StreamingResponse) se comprimen por partes: cada parte se envía
+#     apenas llega (flush), así el cliente no espera al final para empezar a leer.
+#   - Agrega "Vary: Accept-Encoding" a toda respuesta comprimible, se haya comprimido o no, para
+#     que los caches intermedios no mezclen versiones.
+#   - Suma bytes originales y comprimidos en las métricas (Core/metricas.py) para ver la tasa.
+
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from Core.metricas import metricas
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él sólo se usa gzip
+    brotli = None
+
+
+# Tamaño mínimo (bytes) de una respuesta completa para comprimirla
+COMPRESION_MINIMO = int(os.getenv("COMPRESION_MINIMO", "1024"))
+# Nivel de gzip (1 = rápido ... 9 = máximo)
+COMPRESION_NIVEL_GZIP = int(os.getenv("COMPRESION_NIVEL_GZIP", "6"))
+# Calidad de brotli (0 = rápido ... 11 = máximo)
+COMPRESION_NIVEL_BROTLI = int(os.getenv("COMPRESION_NIVEL_BROTLI", "5"))
+
+TIPOS_COMPRIMIBLES = {
+    "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "image/svg+xml",
+}
+
+
+def _comprimible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    tipo = content_type.split(";")[0].strip().lower()
+    return (tipo.startswith("text/") or tipo in TIPOS_COMPRIMIBLES
+            or tipo.endswith("+json") or tipo.endswith("+xml"))
+
+
+def elegir_codificacion(accept_encoding: str) -> Optional[str]:
+    """'br', 'gzip' o None según lo que acepta el cliente."""
+    pesos = {}
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        peso = 1.0
+        if parametros.strip().startswith("q="):
+            try:
+                peso = float(parametros.strip()[2:])
+            except ValueError:
+                peso = 0.0
+        if nombre:
+            pesos[nombre.strip()] = peso
+
+    disponibles = ["br", "gzip"] if brotli is not None else ["gzip"]
+    mejor, mejor_peso = None, 0.0
+    for codificacion in disponibles:
+        peso = pesos.get(codificacion, pesos.get("*", 0.0))
+        if peso > mejor_peso:
+            mejor, mejor_peso = codificacion, peso
+    return mejor
+
+
+class _Gzip:
+    def __init__(self, nivel: int):
+        self._z = zlib.compressobj(nivel, zlib.DEFLATED, 31)  # 31 = formato gzip
+
+    def parcial(self, datos: bytes) -> bytes:
+        return self._z.compress(datos) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def final(self, datos: bytes) -> bytes:
+        return self._z.compress(datos) + self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, nivel: int):
+        self._c = brotli.Compressor(quality=nivel)
+
+    def parcial(self, datos: bytes) -> bytes:
+        return self._c.process(datos) + self._c.flush()
+
+    def final(self, datos: bytes) -> bytes:
+        return self._c.process(datos) + self._c.finish()
+
+
+class MiddlewareCompresion:
+    def __init__(self, app: ASGIApp, minimo: int = COMPRESION_MINIMO,
+                 nivel_gzip: int = COMPRESION_NIVEL_GZIP, nivel_brotli: int = COMPRESION_NIVEL_BROTLI):
+        self.app = app
+        self.minimo = minimo
+        self.niveles = {"gzip": nivel_gzip, "br": nivel_brotli}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        respuesta = _Respuesta(send, codificacion, self.minimo, self.niveles.get(codificacion))
+        await self.app(scope, receive, respuesta.enviar)
+
+
+class _Respuesta:
+    """Envuelve el `send` de una respuesta y decide, al ver la primera parte, si la comprime."""
+
+    def __init__(self, send: Send, codificacion: Optional[str], minimo: int, nivel: Optional[int]):
+        self.send = send
+        self.codificacion = codificacion
+        self.minimo = minimo
+        self.nivel = nivel
+        self.inicio: Optional[Message] = None
+        self.estado = "inicio"  # inicio -> directo | comprimiendo
+        self.compresor = None
+        self.bytes_originales = 0
+        self.bytes_comprimidos = 0
+
+    async def enviar(self, mensaje: Message):
+        tipo = mensaje["type"]
+        if tipo == "http.response.start":
+            # Se retiene hasta ver el cuerpo: las cabeceras dependen de si se comprime
+            self.inicio = mensaje
+            return
+        if tipo != "http.response.body" or self.estado == "directo":
+            await self.send(mensaje)
+            return
+
+        cuerpo = mensaje.get("body", b"")
+        hay_mas = mensaje.get("more_body", False)
+
+        if self.estado == "inicio":
+            await self._primera_parte(cuerpo, hay_mas, mensaje)
+            return
+
+        # Streaming: cada parte se comprime y se envía en el momento
+        datos = self.compresor.parcial(cuerpo) if hay_mas else self.compresor.final(cuerpo)
+        self._contar(cuerpo, datos, fin=not hay_mas)
+        await self.send({"type": "http.response.body", "body": datos, "more_body": hay_mas})
+
+    async def _primera_parte(self, cuerpo: bytes, hay_mas: bool, mensaje: Message):
+        cabeceras = MutableHeaders(raw=self.inicio["headers"])
+        estado_http = self.inicio["status"]
+        comprimible = (
+            200 <= estado_http and estado_http not in (204, 304)
+            and "content-encoding" not in cabeceras
+            and _comprimible(cabeceras.get("content-type"))
+        )
+        if comprimible:
+            cabeceras.add_vary_header("Accept-Encoding")
+
+        if not comprimible or self.codificacion is None or (not hay_mas and len(cuerpo) < self.minimo):
+            if comprimible:
+                metricas.sumar("compresion.sin_comprimir")
+            self.estado = "directo"
+            await self.send(self.inicio)
+            await self.send(mensaje)
+            return
+
+        self.compresor = (_Brotli if self.codificacion == "br" else _Gzip)(self.nivel)
+        cabeceras["Content-Encoding"] = self.codificacion
+        if "content-length" in cabeceras:
+            del cabeceras["content-length"]
+
+        if not hay_mas:
+            datos = self.compresor.final(cuerpo)
+            cabeceras["Content-Length"] = str(len(datos))
+            self._contar(cuerpo, datos, fin=True)
+            await self.send(self.inicio)
+            await self.send({"type": "http.response.body", "body": datos, "more_body": False})
+            return
+
+        self.estado = "comprimiendo"
+        datos = self.compresor.parcial(cuerpo)
+        self._contar(cuerpo, datos, fin=False)
+        await self.send(self.inicio)
+        await self.send({"type": "http.response.body", "body": datos, "more_body": True})
+
+    def _contar(self, cuerpo: bytes, datos: bytes, fin: bool):
+        self.bytes_originales += len(cuerpo)
+        self.bytes_comprimidos += len(datos)
+        if fin:
+            prefijo = f"compresion.{self.codificacion}"
+            metricas.sumar(f"{prefijo}.respuestas")
+            metricas.sumar(f"{prefijo}.bytes_originales", self.bytes_originales)
+            metricas.sumar(f"{prefijo}.bytes_comprimidos", self.bytes_comprimidos)
+
+
+def resumen_compresion() -> dict:
+    """Respuestas, bytes y tasa de compresión (originales / comprimidos) por codificación."""
+    valores = metricas.valores()
+    resumen = {"sin_comprimir": int(valores.get("compresion.sin_comprimir", 0))}
+    for codificacion in ("gzip", "br"):
+        originales = valores.get(f"compresion.{codificacion}.bytes_originales", 0)
+        comprimidos = valores.get(f"compresion.{codificacion}.bytes_comprimidos", 0)
+        resumen[codificacion] = {
+            "respuestas": int(valores.get(f"compresion.{codificacion}.respuestas", 0)),
+            "bytes_originales": int(originales),
+            "bytes_comprimidos": int(comprimidos),
+            "tasa": round(originales / comprimidos, 2) if comprimidos else None,
+        }
+    return resumen
@@ -0,0 +1,215 @@
+# backend-master/Core/consultas_lentas.py
+
+# Registro de consultas SQL lentas (por worker), para encontrar los recorridos completos de tablas
+# antes de que se quejen los usuarios.
+#   - Eventos before/after_cursor_execute del engine (database.py): se mide cada sentencia.
+#   - Las que tardan más de SQL_LENTA_MS se guardan con:
+#       * la SQL normalizada (sin espacios de más, con las listas IN colapsadas y los literales
+#         reemplazados por "?"), para agrupar las que son la misma consulta;
+#       * los parámetros redactados: se conservan números, fechas y booleanos; los textos se
+#         reemplazan por su largo (pueden ser nombres, DNI, contraseñas...);
+#       * la ruta y el id de la petición, y la función de Routes/Services/crud que la ejecutó;
+#       * el plan (EXPLAIN) de los SELECT, que se pide en un hilo aparte con una conexión propia,
+#         una sola vez por consulta normalizada. No frena la petición que fue lenta.
+#   - Se guardan las últimas SQL_LENTAS_MAXIMO (y un resumen por consulta normalizada, del mismo
+#     tamaño). Se ven en GET /api/metricas/consultas-lentas.
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as hora
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from Core.logs import id_peticion, scope_peticion
+from Core.metricas import metricas
+
+logger = logging.getLogger(__name__)
+
+
+SQL_LENTA_MS = float(os.getenv("SQL_LENTA_MS", "200"))
+SQL_LENTAS_MAXIMO = int(os.getenv("SQL_LENTAS_MAXIMO", "200"))
+SQL_EXPLAIN = os.getenv("SQL_EXPLAIN", "1").lower() in ("1", "true", "si", "sí")
+# EXPLAIN en cola como máximo; si hay más, se descartan (se vuelven a pedir en la próxima lenta)
+SQL_EXPLAIN_PENDIENTES = 10
+
+# Módulos del proyecto que se buscan en la pila para saber quién ejecutó la consulta
+_ORIGENES = ("Routes.", "Services.", "crud")
+
+_RE_ESPACIOS = re.compile(r"\s+")
+_RE_TEXTOS = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_RE_NUMEROS = re.compile(r"(?<![\w%)])-?\d+(?:\.\d+)?\b")
+_RE_MARCA = r"(?:%\(\w+\)s|%s|\?|:\w+)"
+_RE_LISTAS = re.compile(rf"\(\s*{_RE_MARCA}(?:\s*,\s*{_RE_MARCA})+\s*\)")
+_CLAVES_SECRETAS = ("password", "contrasena", "contraseña", "clave", "token", "secret")
+
+
+def normalizar_sql(sentencia: str) -> str:
+    sql = _RE_ESPACIOS.sub(" ", sentencia).strip()
+    sql = _RE_TEXTOS.sub("?", sql)
+    sql = _RE_NUMEROS.sub("?", sql)
+    return _RE_LISTAS.sub("(...)", sql)
+
+
+def _redactar_valor(valor):
+    if valor is None or isinstance(valor, (bool, int, float, Decimal)):
+        return valor if not isinstance(valor, Decimal) else str(valor)
+    if isinstance(valor, (date, datetime, hora)):
+        return valor.isoformat()
+    if isinstance(valor, (str, bytes)):
+        return f"<{type(valor).__name__} {len(valor)}>"
+    return f"<{type(valor).__name__}>"
+
+
+def redactar_parametros(parametros):
+    if isinstance(parametros, dict):
+        return {
+            clave: "***" if any(s in str(clave).lower() for s in _CLAVES_SECRETAS) else _redactar_valor(valor)
+            for clave, valor in parametros.items()
+        }
+    if isinstance(parametros, (list, tuple)):
+        return [_redactar_valor(valor) for valor in parametros]
+    return None
+
+
+def _origen() -> Optional[str]:
+    frame = sys._getframe(2)
+    while frame is not None:
+        modulo = frame.f_globals.get("__name__", "")
+        if modulo.startswith(_ORIGENES):
+            return f"{modulo}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return None
+
+
+def _ruta() -> Optional[str]:
+    scope = scope_peticion.get()
+    if scope is None:
+        return None
+    ruta = scope.get("route")
+    return f"{scope.get('method')} {getattr(ruta, 'path', None) or scope.get('path')}"
+
+
+def _a_json(valor):
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        return valor
+    if isinstance(valor, bytes):
+        return valor.decode("utf-8", "replace")
+    return str(valor)
+
+
+class RegistroConsultasLentas:
+    def __init__(self, maximo: int = SQL_LENTAS_MAXIMO):
+        self._lock = threading.Lock()
+        self._recientes = deque(maxlen=maximo)
+        self._resumen: "OrderedDict[str, dict]" = OrderedDict()
+        self._maximo = maximo
+        self._planes = {}                # SQL normalizada -> filas del EXPLAIN (o error)
+        self._ejecutor: Optional[ThreadPoolExecutor] = None
+        self._pid_ejecutor = None
+        self._pendientes = 0
+
+    # ---- Registro ----
+    def registrar(self, engine: Engine, sentencia: str, parametros, duracion_ms: float, varias: bool):
+        normalizada = normalizar_sql(sentencia)
+        registro = {
+            "ts": time.time(),
+            "duracion_ms": round(duracion_ms, 1),
+            "sql": normalizada,
+            "parametros": redactar_parametros(parametros) if not varias else f"<{len(parametros)} filas>",
+            "ruta": _ruta(),
+            "id_peticion": id_peticion.get(),
+            "origen": _origen(),
+        }
+        with self._lock:
+            self._recientes.append(registro)
+            resumen = self._resumen.pop(normalizada, None) or {"sql": normalizada, "cantidad": 0, "total_ms": 0.0, "max_ms": 0.0}
+            resumen["cantidad"] += 1
+            resumen["total_ms"] = round(resumen["total_ms"] + duracion_ms, 1)
+            resumen["max_ms"] = max(resumen["max_ms"], registro["duracion_ms"])
+            resumen["ultima_ruta"] = registro["ruta"]
+            self._resumen[normalizada] = resumen
+            while len(self._resumen) > self._maximo:
+                self._resumen.popitem(last=False)
+            pedir_plan = (SQL_EXPLAIN and not varias and normalizada not in self._planes
+                          and normalizada.upper().startswith("SELECT") and self._pendientes < SQL_EXPLAIN_PENDIENTES)
+            if pedir_plan:
+                self._planes[normalizada] = None   # en curso
+                self._pendientes += 1
+
+        metricas.sumar("sql.lentas")
+        logger.warning("Consulta lenta (%.1f ms) desde %s: %s", duracion_ms, registro["origen"] or registro["ruta"], normalizada[:300])
+        if pedir_plan:
+            self._ejecutor_actual().submit(self._explicar, engine, normalizada, sentencia, parametros)
+
+    # ---- EXPLAIN ----
+    def _ejecutor_actual(self) -> ThreadPoolExecutor:
+        # Los hilos no pasan a los workers creados con fork: un ejecutor por proceso
+        with self._lock:
+            if self._ejecutor is None or self._pid_ejecutor != os.getpid():
+                self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+                self._pid_ejecutor = os.getpid()
+                self._pendientes = 1
+            return self._ejecutor
+
+    def _explicar(self, engine: Engine, normalizada: str, sentencia: str, parametros):
+        prefijo = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+        try:
+            # Conexión DBAPI directa: no pasa por los eventos del engine (ni se mide a sí misma)
+            conexion = engine.raw_connection()
+            try:
+                cursor = conexion.cursor()
+                cursor.execute(prefijo + sentencia, parametros)
+                columnas = [c[0] for c in cursor.description]
+                plan = [{c: _a_json(v) for c, v in zip(columnas, fila)} for fila in cursor.fetchall()]
+                cursor.close()
+            finally:
+                conexion.close()
+        except Exception as e:
+            plan = {"error": str(e)}
+            logger.debug("EXPLAIN falló para %s: %s", normalizada[:200], e)
+        with self._lock:
+            self._planes[normalizada] = plan
+            self._pendientes -= 1
+
+    # ---- Consulta ----
+    def resumen(self, limite: int = 50) -> dict:
+        with self._lock:
+            recientes = [dict(r, plan=self._planes.get(r["sql"])) for r in reversed(self._recientes)][:limite]
+            agrupadas = sorted(self._resumen.values(), key=lambda r: -r["total_ms"])[:limite]
+            agrupadas = [dict(r, plan=self._planes.get(r["sql"])) for r in agrupadas]
+        return {"umbral_ms": SQL_LENTA_MS, "por_consulta": agrupadas, "recientes": recientes}
+
+
+consultas_lentas = RegistroConsultasLentas()
+
+
+def instalar_consultas_lentas(engine: Engine, registro: RegistroConsultasLentas = consultas_lentas):
+    """Mide las sentencias del engine y registra las que superan SQL_LENTA_MS."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, sentencia, parametros, contexto, varias):
+        conn.info.setdefault("inicio_sentencias", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, sentencia, parametros, contexto, varias):
+        inicios = conn.info.get("inicio_sentencias")
+        if not inicios:
+            return
+        duracion_ms = (time.perf_counter() - inicios.pop()) * 1000
+        if duracion_ms >= SQL_LENTA_MS:
+            registro.registrar(conn.engine, sentencia, parametros, duracion_ms, varias)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        # Si la sentencia falló no hay after_cursor_execute: se descarta su inicio
+        if contexto.connection is not None and contexto.connection.info.get("inicio_sentencias"):
+            contexto.connection.info["inicio_sentencias"].pop()
@@ -0,0 +1,183 @@
+# backend-master/Core/logs.py
+
+# Logging de la app.
+#   - No bloquea: los módulos escriben en una cola (QueueHandler) y un hilo aparte
+#     (QueueListener) formatea y escribe en stdout. Si la cola se llena, los mensajes nuevos se
+#     descartan (y se cuentan en la métrica logs.descartados) en lugar de frenar las peticiones.
+#   - Niveles: LOG_LEVEL para todo, y LOG_NIVELES por módulo, p. ej.
+#       LOG_NIVELES="Routes.routes_notas=DEBUG,sqlalchemy.engine=INFO"
+#   - Formato: LOG_FORMATO=json (una línea JSON por mensaje, para el recolector) o texto.
+#   - Correlación: MiddlewareIdPeticion toma X-Request-ID de la petición (o genera uno), lo
+#     devuelve en la respuesta y cada mensaje escrito durante la petición lo lleva (id_peticion).
+#   - Muestreo: de los mensajes DEBUG sólo se escribe 1 de cada LOG_MUESTREO_DEBUG por mensaje
+#     (el primero siempre); cada uno lleva cuántos representa ("muestreo").
+# Con fork (servidor.py con preload) el hilo de escritura no pasa al hijo: se vuelve a crear
+# en cada worker.
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from Core.metricas import metricas
+
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_NIVELES = os.getenv("LOG_NIVELES", "")
+LOG_FORMATO = os.getenv("LOG_FORMATO", "texto").lower()
+# Mensajes que entran en la cola antes de empezar a descartar
+LOG_COLA_MAXIMO = int(os.getenv("LOG_COLA_MAXIMO", "10000"))
+# 1 = se escriben todos los DEBUG
+LOG_MUESTREO_DEBUG = max(int(os.getenv("LOG_MUESTREO_DEBUG", "1")), 1)
+
+CABECERA_ID_PETICION = "X-Request-ID"
+
+# Id de la petición en curso (lo heredan los hilos del threadpool de FastAPI)
+id_peticion: ContextVar[Optional[str]] = ContextVar("id_peticion", default=None)
+# Scope ASGI de la petición en curso (el router le agrega "route" al elegir la ruta)
+scope_peticion: ContextVar[Optional[Scope]] = ContextVar("scope_peticion", default=None)
+
+_ID_VALIDO = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+_escritor: Optional[QueueListener] = None
+_manejador: Optional["_ManejadorCola"] = None
+
+
+class _FiltroContexto(logging.Filter):
+    """Agrega id_peticion y aplica el muestreo de DEBUG (corre en el hilo que llama al logger)."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._cuentas = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.id_peticion = id_peticion.get()
+        record.muestreo = 1
+        if record.levelno <= logging.DEBUG and LOG_MUESTREO_DEBUG > 1:
+            clave = (record.name, record.msg)
+            with self._lock:
+                n = self._cuentas.get(clave, 0)
+                self._cuentas[clave] = n + 1
+            if n % LOG_MUESTREO_DEBUG:
+                return False
+            record.muestreo = LOG_MUESTREO_DEBUG
+        return True
+
+
+class _ManejadorCola(QueueHandler):
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metricas.sumar("logs.descartados")
+
+
+class FormatoJSON(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+            "pid": record.process,
+        }
+        if getattr(record, "id_peticion", None):
+            datos["id_peticion"] = record.id_peticion
+        if getattr(record, "muestreo", 1) > 1:
+            datos["muestreo"] = record.muestreo
+        if record.exc_info:
+            datos["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False)
+
+
+class FormatoTexto(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(id_peticion)s]: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not getattr(record, "id_peticion", None):
+            record.id_peticion = "-"
+        return super().format(record)
+
+
+def _iniciar_escritor() -> queue.Queue:
+    global _escritor
+    salida = logging.StreamHandler()
+    salida.setFormatter(FormatoJSON() if LOG_FORMATO == "json" else FormatoTexto())
+    cola = queue.Queue(LOG_COLA_MAXIMO)
+    _escritor = QueueListener(cola, salida, respect_handler_level=True)
+    _escritor.start()
+    return cola
+
+
+def detener_logs():
+    """Escribe lo que quede en la cola y detiene el hilo de escritura."""
+    if _escritor is not None and _escritor._thread is not None:
+        _escritor.stop()
+
+
+def _despues_del_fork():
+    # El hilo del padre no existe en el hijo: cola y escritor nuevos
+    if _manejador is not None:
+        _manejador.queue = _iniciar_escritor()
+
+
+def configurar_logs():
+    """Configura el logging del proceso (una sola vez; main.py lo llama antes que nada)."""
+    global _manejador
+    if _manejador is not None:
+        return
+
+    raiz = logging.getLogger()
+    raiz.setLevel(LOG_LEVEL)
+    _manejador = _ManejadorCola(_iniciar_escritor())
+    _manejador.addFilter(_FiltroContexto())
+    raiz.addHandler(_manejador)
+
+    for par in filter(None, (p.strip() for p in LOG_NIVELES.split(","))):
+        nombre, _, nivel = par.partition("=")
+        logging.getLogger(nombre.strip()).setLevel(nivel.strip().upper())
+
+    atexit.register(detener_logs)
+    if hasattr(os, "register_at_fork"):  # no existe en Windows
+        os.register_at_fork(after_in_child=_despues_del_fork)
+
+
+class MiddlewareIdPeticion:
+    """Asigna un id a cada petición (X-Request-ID) para correlacionar sus logs."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recibido = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"x-request-id"), "")
+        valor = recibido if _ID_VALIDO.match(recibido) else uuid.uuid4().hex
+        token = id_peticion.set(valor)
+        token_scope = scope_peticion.set(scope)
+
+        async def enviar(mensaje: Message):
+            if mensaje["type"] == "http.response.start":
+                MutableHeaders(scope=mensaje)[CABECERA_ID_PETICION] = valor
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            id_peticion.reset(token)
+            scope_peticion.reset(token_scope)
@@ -0,0 +1,26 @@
+# backend-master/Core/metricas.py
+
+# Métricas del proceso: contadores simples en memoria (por worker).
+# Los módulos suman valores con `metricas.sumar("nombre", valor)` y GET /api/metricas los muestra.
+# Se reinician al reiniciar el proceso.
+
+import threading
+from collections import defaultdict
+from typing import Dict
+
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores: Dict[str, float] = defaultdict(float)
+
+    def sumar(self, nombre: str, valor: float = 1):
+        with self._lock:
+            self._contadores[nombre] += valor
+
+    def valores(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(sorted(self._contadores.items()))
+
+
+metricas = Metricas()
@@ -0,0 +1,71 @@
+# backend-master/Core/ndjson.py
+
+# Modo streaming NDJSON (un objeto JSON por línea) para los listados grandes.
+# Se pide con "Accept: application/x-ndjson" o con ?stream=1. En vez de traer todo con .all()
+# y armar la lista completa, se recorre la consulta por bloques (yield_per, cursor del lado del
+# servidor) y cada bloque se serializa y se envía apenas se lee. La memoria por petición queda
+# acotada al tamaño del bloque y no al de la tabla.
+# Mientras se lee, el cursor del servidor ocupa la conexión: la consulta tiene que traer todo lo
+# que usa el esquema en la misma sentencia (joinedload / contains_eager). Un selectinload o un
+# lazy-load lanzaría otra consulta en la conexión, y PyMySQL descarta el resto del resultado.
+#
+# Uso en un endpoint:
+#   if ndjson:
+#       return respuesta_ndjson(lambda db: db.query(...), schemas.XResponse, desde_orm=True)
+
+import os
+from typing import Callable, Iterator, Optional
+
+from fastapi import Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from database import localSession
+from Core.respuestas import adaptador
+
+
+# Filas que se leen de la base (y se envían) por vez
+NDJSON_TAMANO_BLOQUE = int(os.getenv("NDJSON_TAMANO_BLOQUE", "500"))
+
+MEDIA_TYPE_NDJSON = "application/x-ndjson"
+
+
+def modo_ndjson(
+    request: Request,
+    stream: bool = Query(False, description="Respuesta en streaming NDJSON (un objeto por línea)")
+) -> bool:
+    """Dependencia: True si el cliente pidió NDJSON (?stream=1 o Accept: application/x-ndjson)."""
+    return stream or MEDIA_TYPE_NDJSON in request.headers.get("accept", "")
+
+
+def _lineas(consulta: Callable[[Session], object], tipo, convertir: Optional[Callable],
+            desde_orm: bool, tamano: int) -> Iterator[bytes]:
+    # Abre su propia sesión: la del endpoint ya está cerrada cuando empieza el streaming
+    ta = adaptador(tipo)
+    db = localSession()
+    try:
+        bloque = []
+        # Query.yield_per (no execution_options) para que la Query no intente unificar filas
+        for fila in consulta(db).yield_per(tamano):
+            if convertir is not None:
+                fila = convertir(fila)
+            if desde_orm:
+                fila = ta.validate_python(fila, from_attributes=True)
+            bloque.append(ta.dump_json(fila, by_alias=True))
+            if len(bloque) >= tamano:
+                yield b"\n".join(bloque) + b"\n"
+                bloque = []
+        if bloque:
+            yield b"\n".join(bloque) + b"\n"
+    finally:
+        db.close()
+
+
+def respuesta_ndjson(consulta: Callable[[Session], object], tipo, convertir: Optional[Callable] = None,
+                     desde_orm: bool = False, tamano: int = NDJSON_TAMANO_BLOQUE) -> StreamingResponse:
+    """Envía el resultado de `consulta(db)` como NDJSON, una línea por fila con el esquema `tipo`.
+
+    `convertir` (opcional) transforma cada fila antes de serializarla (p. ej. arma el esquema a mano).
+    Con desde_orm=True cada fila es un objeto ORM que se valida contra `tipo`.
+    """
+    return StreamingResponse(_lineas(consulta, tipo, convertir, desde_orm, tamano), media_type=MEDIA_TYPE_NDJSON)
@@ -0,0 +1,247 @@
+# backend-master/Core/perfilador.py
+
+# Perfilador por muestreo de peticiones individuales, para diagnosticar en producción.
+#   - Se activa por petición:
+#       * con la cabecera "X-Perfil: 1" y un token de ADMIN_SISTEMA, o
+#       * al azar, para una fracción PERFIL_MUESTREO de las peticiones (0 = nunca, por defecto).
+#     Si no se pide, el middleware sólo mira las cabeceras: no hay muestreo ni hilos extra.
+#   - Mientras dura la petición, un hilo toma cada PERFIL_INTERVALO_MS la pila de:
+#       * el hilo del event loop, cuando está ejecutando esta petición (la pila pasa por el
+#         middleware de esta petición): código async, validación y armado del JSON;
+#       * los hilos del threadpool que ejecutan el endpoint de la ruta o validan su respuesta
+#         (endpoints sync: consultas SQLAlchemy, armado de esquemas).
+#     Si ninguno está trabajando en la petición, la muestra cuenta como "[espera]", así el
+#     perfil suma el tiempo real (wall-clock). Si llegan a la vez varias peticiones a la misma
+#     ruta en el mismo worker, sus hilos del threadpool no se distinguen.
+#   - Cada muestra se clasifica en una fase (sql, pydantic, json, app, espera) según los módulos
+#     de su pila.
+#   - Los perfiles se guardan en PERFIL_DIR, en formato speedscope (https://www.speedscope.app).
+#     Se guardan los últimos PERFIL_MAXIMO; al superar el máximo se borran los más viejos.
+#     La respuesta perfilada lleva la cabecera X-Perfil-Id; se descargan desde /api/perfiles.
+
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from Core.logs import id_peticion
+
+logger = logging.getLogger(__name__)
+
+
+PERFIL_MUESTREO = float(os.getenv("PERFIL_MUESTREO", "0"))
+PERFIL_INTERVALO_MS = float(os.getenv("PERFIL_INTERVALO_MS", "5"))
+PERFIL_MAXIMO = int(os.getenv("PERFIL_MAXIMO", "50"))
+PERFIL_DIR = Path(os.getenv("PERFIL_DIR", os.path.join(tempfile.gettempdir(), "academia_perfiles")))
+
+# Fases según el primer paquete "conocido" desde la punta de la pila
+FASES = (
+    ("sql", ("sqlalchemy", "pymysql", "MySQLdb", "sqlite3")),
+    ("pydantic", ("pydantic", "pydantic_core", "fastapi._compat")),
+    ("json", ("json", "orjson", "fastapi.encoders", "Core.respuestas", "Core.ndjson")),
+)
+
+_lock_archivos = threading.Lock()
+
+
+class _Muestreador(threading.Thread):
+    def __init__(self, hilo_loop: int, marca, scope: Scope):
+        super().__init__(name="perfilador", daemon=True)
+        self.hilo_loop = hilo_loop
+        self.marca = marca              # frame del middleware para esta petición
+        self.scope = scope
+        self.intervalo = PERFIL_INTERVALO_MS / 1000
+        self.detener = threading.Event()
+        self.muestras: List[tuple] = []  # (pila de (nombre, archivo, línea) desde la raíz, fase)
+        self.inicio = time.perf_counter()
+        self.fin = self.inicio
+
+    def _codigos_ruta(self):
+        # La ruta se conoce recién cuando el router la eligió
+        ruta = self.scope.get("route")
+        endpoint = self.scope.get("endpoint")
+        codigo = getattr(endpoint, "__code__", None)
+        return codigo, getattr(ruta, "response_field", None)
+
+    def _es_de_la_peticion(self, frame, codigo, campo) -> bool:
+        while frame is not None:
+            if frame is self.marca or (codigo is not None and frame.f_code is codigo):
+                return True
+            if campo is not None and frame.f_code.co_name == "validate" and frame.f_locals.get("self") is campo:
+                return True
+            frame = frame.f_back
+        return False
+
+    def _tomar(self):
+        codigo, campo = self._codigos_ruta()
+        propio = threading.get_ident()
+        pilas = []
+        for hilo, frame in sys._current_frames().items():
+            if hilo == propio:
+                continue
+            if hilo != self.hilo_loop and codigo is None:
+                continue
+            if self._es_de_la_peticion(frame, codigo, campo):
+                pilas.append(_pila(frame))
+        if not pilas:
+            self.muestras.append(((("[espera]", "", 0),), "espera"))
+        for pila in pilas:
+            self.muestras.append((pila, _fase(pila)))
+
+    def run(self):
+        while not self.detener.wait(self.intervalo):
+            self._tomar()
+        self.fin = time.perf_counter()
+
+
+def _pila(frame) -> tuple:
+    pila = []
+    while frame is not None:
+        codigo = frame.f_code
+        modulo = frame.f_globals.get("__name__", "")
+        pila.append((f"{codigo.co_name} ({modulo})", codigo.co_filename, codigo.co_firstlineno))
+        frame = frame.f_back
+    pila.reverse()
+    return tuple(pila)
+
+
+def _fase(pila: tuple) -> str:
+    for nombre, _, _ in reversed(pila):
+        modulo = nombre[nombre.rfind("(") + 1:-1]
+        for fase, prefijos in FASES:
+            if any(modulo == p or modulo.startswith(p + ".") for p in prefijos):
+                return fase
+    return "app"
+
+
+def a_speedscope(muestreador: _Muestreador, nombre: str, id_peticion_: Optional[str] = None) -> dict:
+    indices: Dict[tuple, int] = {}
+    frames, muestras = [], []
+    for pila, _ in muestreador.muestras:
+        fila = []
+        for frame in pila:
+            if frame not in indices:
+                indices[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            fila.append(indices[frame])
+        muestras.append(fila)
+    duracion = (muestreador.fin - muestreador.inicio) * 1000
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "exporter": "academia-perfilador",
+        "name": nombre,
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled", "name": nombre, "unit": "milliseconds",
+            "startValue": 0, "endValue": round(duracion, 3),
+            "samples": muestras, "weights": [PERFIL_INTERVALO_MS] * len(muestras),
+        }],
+        "fases_ms": {f: n * PERFIL_INTERVALO_MS for f, n in Counter(f for _, f in muestreador.muestras).items()},
+        "duracion_ms": round(duracion, 3),
+        "id_peticion": id_peticion_,
+    }
+
+
+def a_colapsado(perfil: dict) -> str:
+    """Pilas colapsadas ("a;b;c N"), el formato de entrada de flamegraph.pl e inferno."""
+    frames = perfil["shared"]["frames"]
+    cuentas = Counter(";".join(frames[i]["name"] for i in muestra) for muestra in perfil["profiles"][0]["samples"])
+    return "".join(f"{pila} {n}\n" for pila, n in cuentas.items())
+
+
+def _guardar(id_perfil: str, perfil: dict):
+    with _lock_archivos:
+        PERFIL_DIR.mkdir(parents=True, exist_ok=True)
+        (PERFIL_DIR / f"{id_perfil}.json").write_text(json.dumps(perfil), encoding="utf-8")
+        # Buffer circular: se conservan los PERFIL_MAXIMO más nuevos
+        archivos = sorted(PERFIL_DIR.glob("*.json"))
+        for viejo in archivos[:max(len(archivos) - PERFIL_MAXIMO, 0)]:
+            viejo.unlink(missing_ok=True)
+
+
+def listar_perfiles() -> List[dict]:
+    if not PERFIL_DIR.exists():
+        return []
+    resultado = []
+    for archivo in sorted(PERFIL_DIR.glob("*.json"), reverse=True):
+        try:
+            perfil = json.loads(archivo.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        resultado.append({"id": archivo.stem, "nombre": perfil.get("name"),
+                          "id_peticion": perfil.get("id_peticion"), "duracion_ms": perfil.get("duracion_ms"),
+                          "fases_ms": perfil.get("fases_ms")})
+    return resultado
+
+
+def leer_perfil(id_perfil: str) -> Optional[dict]:
+    archivo = PERFIL_DIR / f"{id_perfil}.json"
+    if not id_perfil.replace("-", "").isalnum() or not archivo.exists():
+        return None
+    return json.loads(archivo.read_text(encoding="utf-8"))
+
+
+def _es_admin(headers: Dict[bytes, bytes]) -> bool:
+    from auth import ALGORITHM, JWT_SECRET
+    autorizacion = headers.get(b"authorization", b"").decode("latin-1")
+    if not autorizacion.lower().startswith("bearer "):
+        return False
+    try:
+        payload = jwt.decode(autorizacion[7:], JWT_SECRET, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("rol_sistema") == "ADMIN_SISTEMA"
+
+
+class MiddlewarePerfil:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _pedido(self, scope: Scope) -> bool:
+        if PERFIL_MUESTREO > 0 and random.random() < PERFIL_MUESTREO:
+            return True
+        for clave, valor in scope["headers"]:
+            if clave == b"x-perfil":
+                return valor == b"1" and _es_admin(dict(scope["headers"]))
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._pedido(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # El nombre del archivo empieza con la fecha, así el orden alfabético es el cronológico
+        ahora = time.time()
+        id_perfil = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(ahora))}{int(ahora * 1000) % 1000:03d}-{uuid.uuid4().hex[:8]}"
+        muestreador = _Muestreador(threading.get_ident(), sys._getframe(), scope)
+
+        async def enviar(mensaje: Message):
+            if mensaje["type"] == "http.response.start":
+                MutableHeaders(scope=mensaje)["X-Perfil-Id"] = id_perfil
+            await send(mensaje)
+
+        muestreador.start()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            muestreador.detener.set()
+            await run_in_threadpool(muestreador.join)
+            nombre = f"{scope['method']} {scope['path']}"
+            if scope.get("query_string"):
+                nombre += "?" + scope["query_string"].decode("latin-1")
+            perfil = a_speedscope(muestreador, nombre, id_peticion.get())
+            await run_in_threadpool(_guardar, id_perfil, perfil)
+            logger.info("Perfil %s guardado (%s, %.1f ms)", id_perfil, nombre, perfil["duracion_ms"])
@@ -0,0 +1,166 @@
+# backend-master/Core/plazos.py
+
+# Plazos (deadlines) por ruta, para que un informe patológico no se quede con una conexión del
+# pool hasta que pool_timeout (30 s) deje sin conexiones al resto (p. ej. a la carga de notas).
+#   - PLAZOS_RUTAS: prefijo de ruta -> segundos (gana el prefijo más largo); None = sin plazo,
+#     para las escrituras masivas que commitean por partes (cortarlas a la mitad deja la carga
+#     a medias). El resto de las rutas usa PLAZO_DEFECTO_S. Con la variable PLAZOS se pisan o
+#     agregan, p. ej.
+#       PLAZOS="/api/notas/planilla-acta=20,/api/materias/tabla=5,/api/batch=none"
+#   - MiddlewarePlazos fija el plazo de la petición. El plazo cubre hasta que empieza la
+#     respuesta: el cuerpo de una respuesta por streaming (NDJSON) ya no tiene plazo.
+#   - Base de datos: cada SELECT lleva el hint MAX_EXECUTION_TIME con el tiempo que le queda a la
+#     petición (MySQL corta la consulta del lado del servidor) y, si el plazo ya venció, la
+#     sentencia siguiente ni se envía. Así el endpoint termina con error, la sesión se cierra
+#     (get_db) y la conexión vuelve al pool.
+#   - Las esperas async (p. ej. SMTP) se cancelan al vencer el plazo. Los hilos del threadpool
+#     no se pueden cancelar: terminan con la primera sentencia SQL que encuentre el plazo vencido.
+#   - Si el plazo venció antes de empezar la respuesta, se responde 503 con Retry-After (aunque
+#     el endpoint haya convertido el error en un 500). Se cuentan en la métrica plazos.vencidos.
+
+import logging
+import math
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import anyio
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from Core.metricas import metricas
+from Core.respuestas import RespuestaJSON
+
+logger = logging.getLogger(__name__)
+
+
+# Por debajo de pool_timeout (database.py): una petición que espera conexión no debe vencer
+# después de que la espera ya haya fallado
+PLAZO_DEFECTO_S = float(os.getenv("PLAZO_DEFECTO_S", "25"))
+PLAZO_RETRY_AFTER_S = int(os.getenv("PLAZO_RETRY_AFTER_S", "5"))
+
+PLAZOS_RUTAS: Dict[str, Optional[float]] = {
+    # Informes y tablas que recorren muchas filas
+    "/api/notas/planilla-acta": 15,
+    "/api/notas/informe-individual": 10,
+    "/api/estudiantes/notas/informe-individual": 10,
+    "/api/materias/tabla": 10,
+    # Carga de notas: corta, para que falle rápido en lugar de encolarse
+    "/api/notas/upsert": 5,
+    # Importación de estudiantes: commit por bloque, puede tardar lo que tarde el CSV
+    "/api/estudiantes/import": None,
+}
+
+for _par in filter(None, (p.strip() for p in os.getenv("PLAZOS", "").split(","))):
+    _prefijo, _, _segundos = _par.partition("=")
+    _segundos = _segundos.strip().lower()
+    PLAZOS_RUTAS[_prefijo.strip()] = None if _segundos in ("", "none", "no") else float(_segundos)
+
+# Errores de MySQL / MariaDB por tiempo máximo de ejecución superado
+_ERRORES_TIEMPO = (3024, 1969)
+
+
+class PlazoVencido(Exception):
+    pass
+
+
+class Plazo:
+    __slots__ = ("segundos", "limite", "vencido")
+
+    def __init__(self, segundos: Optional[float]):
+        self.segundos = segundos
+        self.limite: Optional[float] = None if segundos is None else time.monotonic() + segundos   # None: sin plazo
+        self.vencido = False
+
+    def restante(self) -> Optional[float]:
+        return None if self.limite is None else self.limite - time.monotonic()
+
+
+plazo_actual: ContextVar[Optional[Plazo]] = ContextVar("plazo_actual", default=None)
+
+
+def plazo_para(ruta: str) -> Optional[float]:
+    mejor = ""
+    for prefijo in PLAZOS_RUTAS:
+        if ruta.startswith(prefijo) and len(prefijo) > len(mejor):
+            mejor = prefijo
+    return PLAZOS_RUTAS[mejor] if mejor else PLAZO_DEFECTO_S
+
+
+def instalar_plazos(engine):
+    """Pasa el plazo de la petición a cada sentencia del engine."""
+    mysql = engine.dialect.name == "mysql"
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _antes(conn, cursor, sentencia, parametros, contexto, varias):
+        plazo = plazo_actual.get()
+        restante = plazo.restante() if plazo is not None else None
+        if restante is None:
+            return sentencia, parametros
+        if restante <= 0:
+            plazo.vencido = True
+            raise PlazoVencido(f"Plazo de {plazo.segundos:g} s vencido")
+        # MAX_EXECUTION_TIME sólo se aplica a los SELECT (en MariaDB el hint se ignora)
+        if mysql and sentencia[:6].upper() == "SELECT":
+            sentencia = f"SELECT /*+ MAX_EXECUTION_TIME({max(int(restante * 1000), 1)}) */{sentencia[6:]}"
+        return sentencia, parametros
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        plazo = plazo_actual.get()
+        original = contexto.original_exception
+        if plazo is not None and getattr(original, "args", None) and original.args[0] in _ERRORES_TIEMPO:
+            plazo.vencido = True
+
+
+class MiddlewarePlazos:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        plazo = Plazo(plazo_para(scope["path"]))
+        token = plazo_actual.set(plazo)
+        iniciada = False
+        descartar = False
+
+        async def enviar(mensaje: Message):
+            nonlocal iniciada, descartar
+            if mensaje["type"] == "http.response.start":
+                if plazo.vencido:
+                    # El endpoint convirtió el error en otra respuesta: se reemplaza por el 503
+                    descartar = True
+                    return
+                iniciada = True
+                plazo.limite = None
+                cancelacion.deadline = math.inf
+            if not descartar:
+                await send(mensaje)
+
+        try:
+            limite = math.inf if plazo.segundos is None else anyio.current_time() + plazo.segundos
+            with anyio.CancelScope(deadline=limite) as cancelacion:
+                await self.app(scope, receive, enviar)
+            if cancelacion.cancelled_caught:
+                plazo.vencido = True
+        except Exception:
+            if not plazo.vencido or iniciada:
+                raise
+        finally:
+            plazo_actual.reset(token)
+
+        if plazo.vencido and not iniciada:
+            ruta = getattr(scope.get("route"), "path", scope["path"])
+            metricas.sumar("plazos.vencidos")
+            metricas.sumar(f"plazos.vencidos {ruta}")
+            logger.warning("Plazo de %g s vencido en %s %s", plazo.segundos, scope["method"], ruta)
+            respuesta = RespuestaJSON(
+                status_code=503,
+                content={"detail": "La operación tardó demasiado. Intente nuevamente en unos segundos."},
+                headers={"Retry-After": str(PLAZO_RETRY_AFTER_S)},
+            )
+            await respuesta(scope, receive, send)
@@ -0,0 +1,301 @@
+# backend-master/Core/replicas.py
+
+# Réplicas de lectura (opcional). Con DB_REPLICAS vacío (por defecto) todo va a la base principal.
+#   - DB_REPLICAS: lista separada por comas de "host[:puerto]" (mismo usuario, contraseña y base
+#     que la principal) o de URLs completas. Para probar alcanza con una segunda base local.
+#   - Los endpoints de sólo lectura (informes, listados, tableros) piden la sesión con
+#     get_db_lectura / sesion_lectura() (database.py). Esa sesión lee de una réplica sana
+#     (rotando entre ellas), pero todo lo que escribe (flush, INSERT/UPDATE/DELETE) va igual a la
+#     principal.
+#   - Salud: un hilo por worker revisa cada DB_REPLICA_CHEQUEO_S que cada réplica responda y su
+#     retraso (SHOW REPLICA STATUS). Si no responde o el retraso supera DB_REPLICA_RETRASO_MAXIMO_S
+#     (o la replicación está detenida) deja de usarse hasta el próximo chequeo bueno. Un error de
+#     conexión durante una petición también la saca de la rotación.
+#   - Leer lo propio: después de una petición que escribió en la principal, el mismo cliente lee
+#     de la principal durante DB_REPLICA_PEGAJOSO_S (p. ej. upsert de una nota y después la
+#     planilla-acta). Se reconoce por el token: antes de responder, la petición que escribió
+#     guarda en t_lectura_primaria (en la principal, la ven todos los workers) hasta cuándo ese
+#     token lee de la principal, y cada sesión de lectura con token lo consulta (una búsqueda
+#     por clave primaria). El frontend de otro origen no manda cookies; los clientes del mismo
+#     origen se reconocen además por la cookie leer_primaria, sin consultar la tabla.
+#     t_lectura_primaria la crea /api/migrate o el arranque del worker; si no se puede usar, las
+#     peticiones con token leen de la principal.
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+
+import anyio
+from sqlalchemy import delete, event, select, text
+from sqlalchemy.dialects.mysql import insert as insert_mysql
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from Core.logs import scope_peticion
+from Core.metricas import metricas
+from models import LecturaPrimaria
+
+logger = logging.getLogger(__name__)
+
+
+DB_REPLICA_CHEQUEO_S = float(os.getenv("DB_REPLICA_CHEQUEO_S", "5"))
+DB_REPLICA_RETRASO_MAXIMO_S = float(os.getenv("DB_REPLICA_RETRASO_MAXIMO_S", "5"))
+DB_REPLICA_PEGAJOSO_S = int(os.getenv("DB_REPLICA_PEGAJOSO_S", str(int(DB_REPLICA_RETRASO_MAXIMO_S) + 5)))
+
+COOKIE_PRIMARIA = "leer_primaria"
+
+# Si t_lectura_primaria no se pudo usar, no se vuelve a intentar hasta pasado este tiempo
+SIN_TABLA_REINTENTO_S = 60
+# Cada cuánto un worker borra las filas vencidas de t_lectura_primaria
+LIMPIEZA_S = 300
+
+
+class Replica:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        url = engine.url
+        self.nombre = f"{url.host}:{url.port or 3306}" if url.host else str(url.database)
+        self.sana = False           # hasta el primer chequeo se lee de la principal
+        self.retraso: Optional[float] = None
+        self.error: Optional[str] = None
+
+        @event.listens_for(engine, "handle_error")
+        def _error(contexto):
+            if contexto.is_disconnect:
+                self.marcar_caida(str(contexto.original_exception))
+
+    def marcar_caida(self, error: str):
+        if self.sana:
+            logger.warning("Réplica %s fuera de rotación: %s", self.nombre, error)
+            metricas.sumar("replicas.caidas")
+        self.sana = False
+        self.error = error
+
+    def chequear(self):
+        try:
+            with self.engine.connect() as conexion:
+                conexion.execute(text("SELECT 1"))
+                retraso = _retraso(conexion) if self.engine.dialect.name == "mysql" else 0.0
+        except Exception as e:
+            self.marcar_caida(str(e))
+            return
+        self.retraso = retraso
+        if retraso is None or retraso > DB_REPLICA_RETRASO_MAXIMO_S:
+            self.marcar_caida("replicación detenida" if retraso is None else f"retraso de {retraso:g} s")
+            return
+        if not self.sana:
+            logger.info("Réplica %s en rotación (retraso %s s)", self.nombre, retraso)
+        self.sana = True
+        self.error = None
+
+
+def _retraso(conexion) -> Optional[float]:
+    # MySQL 8.0.22+: SHOW REPLICA STATUS / Seconds_Behind_Source; antes, SLAVE / Master
+    for consulta, columna in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+                              ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+        try:
+            fila = conexion.exec_driver_sql(consulta).mappings().first()
+        except Exception:
+            continue
+        if fila is None:
+            return 0.0   # no es una réplica (p. ej. una segunda base local para pruebas)
+        valor = fila.get(columna)
+        return None if valor is None else float(valor)
+    # Sin permiso REPLICATION CLIENT no se puede medir: se la toma como al día
+    return 0.0
+
+
+class GrupoReplicas:
+    def __init__(self, engines: List[Engine]):
+        self.replicas = [Replica(e) for e in engines]
+        self._siguiente = 0
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.replicas)
+
+    def _iniciar_chequeos(self):
+        # Un hilo por proceso: con fork (servidor.py) el del padre no existe en el hijo
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for replica in self.replicas:
+                replica.sana = False
+        threading.Thread(target=self._bucle, name="replicas", daemon=True).start()
+
+    def _bucle(self):
+        while True:
+            for replica in self.replicas:
+                replica.chequear()
+            time.sleep(DB_REPLICA_CHEQUEO_S)
+
+    def elegir(self) -> Optional[Engine]:
+        """Engine de una réplica sana (rotando), o None si no hay ninguna."""
+        if not self.replicas:
+            return None
+        if self._pid != os.getpid():
+            self._iniciar_chequeos()
+        sanas = [r for r in self.replicas if r.sana]
+        if not sanas:
+            metricas.sumar("replicas.lecturas_primaria")
+            return None
+        self._siguiente = (self._siguiente + 1) % len(sanas)
+        metricas.sumar("replicas.lecturas")
+        return sanas[self._siguiente].engine
+
+    def estado(self) -> List[dict]:
+        return [{"replica": r.nombre, "sana": r.sana, "retraso_s": r.retraso, "error": r.error} for r in self.replicas]
+
+
+class SesionEnrutada(Session):
+    """Sesión de lectura: las consultas van a `replica` y las escrituras a la principal."""
+
+    def __init__(self, *args, replica: Optional[Engine] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.replica is not None and not self._flushing and not isinstance(clause, UpdateBase):
+            return self.replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+# -------------------------------------------------------------------
+# Leer lo propio (read-after-write)
+# -------------------------------------------------------------------
+
+# Base principal (la registra instalar_escrituras)
+_principal: Optional[Engine] = None
+_sin_tabla_hasta = 0.0
+_ultima_limpieza = 0.0
+
+
+def _tabla_disponible() -> bool:
+    return time.monotonic() >= _sin_tabla_hasta
+
+
+def _tabla_fallo(e: Exception):
+    global _sin_tabla_hasta
+    if _tabla_disponible():
+        logger.warning("t_lectura_primaria no disponible (¿falta /api/migrate?), "
+                       "las peticiones con token leen de la principal: %s", getattr(e, "orig", e))
+    _sin_tabla_hasta = time.monotonic() + SIN_TABLA_REINTENTO_S
+
+
+def crear_lectura_primaria(conexion) -> None:
+    """Crea t_lectura_primaria si no existe. No hace commit."""
+    global _sin_tabla_hasta
+    LecturaPrimaria.__table__.create(conexion, checkfirst=True)
+    _sin_tabla_hasta = 0.0
+
+
+def _clave_token(scope: Scope) -> Optional[str]:
+    for clave, valor in scope["headers"]:
+        if clave == b"authorization":
+            return hashlib.blake2b(valor, digest_size=16).hexdigest()
+    return None
+
+
+def _tiene_cookie(scope: Scope) -> bool:
+    for clave, valor in scope["headers"]:
+        if clave == b"cookie" and cookie_parser(valor.decode("latin-1")).get(COOKIE_PRIMARIA) == "1":
+            return True
+    return False
+
+
+def debe_leer_primaria() -> bool:
+    scope = scope_peticion.get()
+    if scope is None:
+        return False
+    if scope.get("state", {}).get("escribio") or _tiene_cookie(scope):
+        return True
+    token = _clave_token(scope)
+    if token is None or _principal is None:
+        return False
+    if not _tabla_disponible():
+        return True
+    try:
+        with _principal.connect() as conexion:
+            hasta = conexion.execute(
+                select(LecturaPrimaria.hasta).where(LecturaPrimaria.clave == token)
+            ).scalar()
+    except Exception as e:
+        _tabla_fallo(e)
+        return True
+    return hasta is not None and hasta > time.time()
+
+
+def _upsert(conexion):
+    tabla = LecturaPrimaria.__table__
+    if conexion.dialect.name == "sqlite":
+        # Para las pruebas con SQLite
+        sentencia = insert_sqlite(tabla)
+        return sentencia.on_conflict_do_update(index_elements=["clave"], set_={"hasta": sentencia.excluded.hasta})
+    sentencia = insert_mysql(tabla)
+    return sentencia.on_duplicate_key_update(hasta=sentencia.inserted.hasta)
+
+
+def registrar_escritura(token: str):
+    """El token lee de la principal durante DB_REPLICA_PEGAJOSO_S, en todos los workers."""
+    global _ultima_limpieza
+    if _principal is None or not _tabla_disponible():
+        return
+    ahora = time.time()
+    try:
+        with _principal.begin() as conexion:
+            conexion.execute(_upsert(conexion), {"clave": token, "hasta": ahora + DB_REPLICA_PEGAJOSO_S})
+            if ahora - _ultima_limpieza > LIMPIEZA_S:
+                _ultima_limpieza = ahora
+                conexion.execute(delete(LecturaPrimaria).where(LecturaPrimaria.hasta < ahora))
+    except Exception as e:
+        _tabla_fallo(e)
+
+
+def instalar_escrituras(engine: Engine):
+    """Marca las peticiones que escriben en la principal (para leer lo propio después)."""
+    global _principal
+    _principal = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, sentencia, parametros, contexto, varias):
+        if sentencia[:6].upper() == "SELECT":
+            return
+        scope = scope_peticion.get()
+        if scope is None:
+            return
+        scope.setdefault("state", {})["escribio"] = True
+
+
+class MiddlewareLecturaPrimaria:
+    """En las peticiones que escribieron, antes de responder registra el token en
+    t_lectura_primaria y agrega la cookie leer_primaria."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def enviar(mensaje: Message):
+            if mensaje["type"] == "http.response.start" and scope.get("state", {}).get("escribio"):
+                token = _clave_token(scope)
+                if token is not None:
+                    await anyio.to_thread.run_sync(registrar_escritura, token)
+                MutableHeaders(scope=mensaje).append(
+                    "Set-Cookie", f"{COOKIE_PRIMARIA}=1; Max-Age={DB_REPLICA_PEGAJOSO_S}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(mensaje)
+
+        await self.app(scope, receive, enviar)
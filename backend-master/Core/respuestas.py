@@ -0,0 +1,61 @@
+# backend-master/Core/respuestas.py
+
+# Serialización de las respuestas JSON.
+#   - RespuestaJSON: clase de respuesta por defecto de la app (main.py). Usa orjson si está
+#     instalado (bastante más rápido que el json de la librería estándar) y si no, json.
+#   - respuesta_modelos(): camino rápido para listados grandes. Con response_model, FastAPI
+#     convierte los modelos que devuelve el endpoint a dict, los vuelve a validar, los pasa a
+#     tipos JSON y recién ahí los serializa. Si el endpoint ya tiene los modelos, pydantic-core
+#     los escribe directo a bytes y FastAPI devuelve la respuesta tal cual. El response_model
+#     del decorador queda para la documentación. Con objetos ORM (desde_orm=True) la validación
+#     desde atributos cuesta lo mismo que el camino de FastAPI: en los listados de materias no
+#     se midió ganancia y no se usa.
+# Ver benchmarks/bench_serializacion.py para la comparación.
+
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+from Core.trazas import span
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa el json de la librería estándar
+    orjson = None
+
+
+class RespuestaJSON(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with span("json.serializar"):
+            if orjson is None:
+                return super().render(content)
+            # OPT_NON_STR_KEYS: algunos esquemas usan dict con claves int (p. ej. calificaciones)
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def adaptador(tipo) -> TypeAdapter:
+    # Crear el TypeAdapter arma el validador y el serializador: se hace una vez por tipo
+    return TypeAdapter(tipo)
+
+
+def respuesta_modelos(datos: Any, tipo, desde_orm: bool = False, status_code: int = 200,
+                      headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Serializa `datos` como `tipo` (p. ej. list[schemas.MateriaResponse]) directo a JSON.
+
+    Con desde_orm=True los datos son objetos ORM y se validan (una vez) antes de serializar.
+    """
+    ta = adaptador(tipo)
+    if desde_orm:
+        with span("pydantic.validar"):
+            datos = ta.validate_python(datos, from_attributes=True)
+    with span("json.serializar"):
+        contenido = ta.dump_json(datos, by_alias=True)
+    return Response(
+        content=contenido,
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
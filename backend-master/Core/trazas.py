@@ -0,0 +1,370 @@
+# backend-master/Core/trazas.py
+
+# Trazas por petición (estilo tracing distribuido), para ver en qué se va el tiempo de los
+# endpoints de varios pasos (informe de notas, registro con envío de email, ...).
+#   - TRAZAS=archivo: los spans se escriben en TRAZAS_ARCHIVO, una línea JSON por span.
+#     TRAZAS=otlp: se envían en lotes a TRAZAS_OTLP_URL en el formato OTLP/HTTP JSON
+#     (un collector de OpenTelemetry, Jaeger, Tempo...). Vacío (por defecto): apagado, no se
+#     instala nada y span() no hace nada.
+#   - MiddlewareTrazas abre el span raíz de cada petición (o continúa la traza de la cabecera
+#     W3C "traceparent" si viene) y devuelve el id en X-Trace-Id. TRAZAS_MUESTREO: fracción de
+#     las peticiones nuevas que se trazan.
+#   - Spans automáticos: dependencias de FastAPI (incluye la validación del body), endpoint,
+#     validación de la respuesta, serialización JSON, pedido de conexión al pool y cada
+#     sentencia SQL. A mano: `with span("nombre", atributo=valor):` o el decorador @trazar.
+#   - El contexto viaja en un ContextVar: lo heredan las tareas de asyncio y los hilos de
+#     run_in_threadpool. Para hilos propios (ThreadPoolExecutor, threading.Thread) envolver la
+#     función con con_traza().
+#   - La exportación la hace un hilo aparte; si la cola se llena los spans se descartan (métrica
+#     trazas.descartadas) en lugar de frenar las peticiones.
+
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from Core.logs import id_peticion
+from Core.metricas import metricas
+
+logger = logging.getLogger(__name__)
+
+
+TRAZAS = os.getenv("TRAZAS", "").lower()           # "", "archivo" u "otlp"
+TRAZAS_ARCHIVO = os.getenv("TRAZAS_ARCHIVO", "trazas.jsonl")
+TRAZAS_OTLP_URL = os.getenv("TRAZAS_OTLP_URL", "http://localhost:4318/v1/traces")
+TRAZAS_MUESTREO = float(os.getenv("TRAZAS_MUESTREO", "1"))
+TRAZAS_SERVICIO = os.getenv("TRAZAS_SERVICIO", "backend-academia")
+TRAZAS_COLA_MAXIMO = int(os.getenv("TRAZAS_COLA_MAXIMO", "10000"))
+TRAZAS_LOTE = 256
+
+CABECERA_TRAZA = "X-Trace-Id"
+
+# Span en curso (None: la petición no se traza)
+_actual: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("span_actual", default=None)
+
+
+class Span:
+    __slots__ = ("nombre", "id_traza", "id_span", "id_padre", "inicio", "fin", "atributos", "error")
+
+    def __init__(self, nombre: str, id_traza: str, id_padre: Optional[str], atributos: dict):
+        self.nombre = nombre
+        self.id_traza = id_traza
+        self.id_span = os.urandom(8).hex()
+        self.id_padre = id_padre
+        self.inicio = time.time_ns()
+        self.fin = None
+        self.atributos = atributos
+        self.error = None
+
+    def terminar(self, error: Optional[BaseException] = None):
+        self.fin = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        _exportador.encolar(self)
+
+
+def hijo(nombre: str, **atributos) -> Optional[Span]:
+    """Crea un span hijo del actual sin volverlo el actual (para los eventos de SQLAlchemy)."""
+    padre = _actual.get()
+    if padre is None:
+        return None
+    return Span(nombre, padre.id_traza, padre.id_span, atributos)
+
+
+class span:
+    """Context manager: `with span("smtp.enviar", destino=...) as s:`. Sin traza no hace nada."""
+
+    __slots__ = ("nombre", "atributos", "_span", "_token")
+
+    def __init__(self, nombre: str, **atributos):
+        self.nombre = nombre
+        self.atributos = atributos
+        self._span = None
+
+    def __enter__(self) -> Optional[Span]:
+        self._span = hijo(self.nombre, **self.atributos)
+        if self._span is not None:
+            self._token = _actual.set(self._span)
+        return self._span
+
+    def __exit__(self, tipo, error, traza):
+        if self._span is not None:
+            _actual.reset(self._token)
+            self._span.terminar(error)
+        return False
+
+
+def trazar(nombre: str):
+    """Decorador: cada llamada a la función (sync o async) es un span."""
+    def decorador(funcion):
+        if inspect.iscoroutinefunction(funcion):
+            @functools.wraps(funcion)
+            async def envoltura_async(*args, **kwargs):
+                with span(nombre):
+                    return await funcion(*args, **kwargs)
+            return envoltura_async
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with span(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def con_traza(funcion):
+    """Envuelve `funcion` para que corra en otro hilo dentro de la traza actual."""
+    contexto = contextvars.copy_context()
+    return functools.partial(contexto.run, funcion)
+
+
+# -------------------------------------------------------------------
+# Exportación
+# -------------------------------------------------------------------
+
+def _a_dict(s: Span) -> dict:
+    return {
+        "id_traza": s.id_traza, "id_span": s.id_span, "id_padre": s.id_padre,
+        "nombre": s.nombre, "inicio_ns": s.inicio, "duracion_ms": round((s.fin - s.inicio) / 1e6, 3),
+        "atributos": s.atributos, "error": s.error,
+    }
+
+
+def _valor_otlp(valor) -> dict:
+    if isinstance(valor, bool):
+        return {"boolValue": valor}
+    if isinstance(valor, int):
+        return {"intValue": str(valor)}
+    if isinstance(valor, float):
+        return {"doubleValue": valor}
+    return {"stringValue": str(valor)}
+
+
+def _a_otlp(spans) -> dict:
+    return {"resourceSpans": [{
+        "resource": {"attributes": [
+            {"key": "service.name", "value": {"stringValue": TRAZAS_SERVICIO}},
+            {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+        ]},
+        "scopeSpans": [{
+            "scope": {"name": __name__},
+            "spans": [{
+                "traceId": s.id_traza, "spanId": s.id_span, "parentSpanId": s.id_padre or "",
+                "name": s.nombre, "kind": 2 if s.id_padre is None else 1,
+                "startTimeUnixNano": str(s.inicio), "endTimeUnixNano": str(s.fin),
+                "attributes": [{"key": k, "value": _valor_otlp(v)} for k, v in s.atributos.items() if v is not None],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class _Exportador:
+    def __init__(self):
+        self._cola: Optional[queue.Queue] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _iniciar(self):
+        # Un hilo por proceso: con fork (servidor.py) el del padre no existe en el hijo
+        with self._lock:
+            if self._pid != os.getpid():
+                self._cola = queue.Queue(TRAZAS_COLA_MAXIMO)
+                self._pid = os.getpid()
+                threading.Thread(target=self._bucle, args=(self._cola,), name="trazas", daemon=True).start()
+                atexit.register(self._vaciar, self._cola)
+
+    def encolar(self, s: Span):
+        if self._pid != os.getpid():
+            self._iniciar()
+        try:
+            self._cola.put_nowait(s)
+        except queue.Full:
+            metricas.sumar("trazas.descartadas")
+
+    def _bucle(self, cola: queue.Queue):
+        while True:
+            lote = [cola.get()]
+            # Se junta lo que llegue en el próximo segundo (o hasta TRAZAS_LOTE spans)
+            limite = time.monotonic() + 1
+            while len(lote) < TRAZAS_LOTE and (restante := limite - time.monotonic()) > 0:
+                try:
+                    lote.append(cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+            try:
+                self._escribir(lote)
+            except Exception as e:
+                metricas.sumar("trazas.descartadas", len(lote))
+                logger.warning("No se pudieron exportar %s spans: %s", len(lote), e)
+
+    def _vaciar(self, cola: queue.Queue):
+        # Al terminar el proceso: se exporta lo que quedó en la cola
+        lote = []
+        while True:
+            try:
+                lote.append(cola.get_nowait())
+            except queue.Empty:
+                break
+        if lote:
+            try:
+                self._escribir(lote)
+            except Exception as e:
+                logger.warning("No se pudieron exportar %s spans: %s", len(lote), e)
+
+    def _escribir(self, lote):
+        if TRAZAS == "otlp":
+            peticion = urllib.request.Request(
+                TRAZAS_OTLP_URL, data=json.dumps(_a_otlp(lote)).encode(),
+                headers={"Content-Type": "application/json"}, method="POST",
+            )
+            urllib.request.urlopen(peticion, timeout=5).close()
+        else:
+            with open(TRAZAS_ARCHIVO, "a", encoding="utf-8") as archivo:
+                archivo.writelines(json.dumps(_a_dict(s), ensure_ascii=False, default=str) + "\n" for s in lote)
+
+
+_exportador = _Exportador()
+
+
+# -------------------------------------------------------------------
+# Instalación
+# -------------------------------------------------------------------
+
+def _leer_traceparent(scope: Scope):
+    # W3C: "00-<id traza 32 hex>-<id span padre 16 hex>-<flags>"
+    for clave, valor in scope["headers"]:
+        if clave == b"traceparent":
+            partes = valor.decode("latin-1").strip().split("-")
+            if len(partes) == 4 and len(partes[1]) == 32 and len(partes[2]) == 16:
+                try:
+                    int(partes[1], 16), int(partes[2], 16), int(partes[3], 16)
+                except ValueError:
+                    return None
+                return partes[1], partes[2], int(partes[3], 16) & 1
+    return None
+
+
+class MiddlewareTrazas:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recibida = _leer_traceparent(scope)
+        if recibida is not None:
+            id_traza, id_padre, muestreada = recibida
+        else:
+            id_traza, id_padre, muestreada = os.urandom(16).hex(), None, random.random() < TRAZAS_MUESTREO
+        if not muestreada:
+            await self.app(scope, receive, send)
+            return
+
+        raiz = Span(f"{scope['method']} {scope['path']}", id_traza, id_padre,
+                    {"http.method": scope["method"], "http.target": scope["path"], "id_peticion": id_peticion.get()})
+        token = _actual.set(raiz)
+
+        async def enviar(mensaje: Message):
+            if mensaje["type"] == "http.response.start":
+                raiz.atributos["http.status_code"] = mensaje["status"]
+                MutableHeaders(scope=mensaje)[CABECERA_TRAZA] = id_traza
+            await send(mensaje)
+
+        error = None
+        try:
+            await self.app(scope, receive, enviar)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _actual.reset(token)
+            ruta = scope.get("route")
+            if ruta is not None:
+                raiz.nombre = f"{scope['method']} {ruta.path}"
+                raiz.atributos["http.route"] = ruta.path
+            raiz.terminar(error)
+
+
+def _envolver_async(modulo, nombre_funcion: str, nombre_span: str):
+    original = getattr(modulo, nombre_funcion)
+
+    @functools.wraps(original)
+    async def envoltura(*args, **kwargs):
+        with span(nombre_span):
+            return await original(*args, **kwargs)
+
+    setattr(modulo, nombre_funcion, envoltura)
+
+
+_fastapi_trazado = False
+
+
+def instalar_trazas(engine):
+    """Agrega los spans automáticos (FastAPI y SQLAlchemy). Sólo si TRAZAS está activo."""
+    global _fastapi_trazado
+    if not TRAZAS:
+        return
+
+    import fastapi.routing
+    from sqlalchemy import event
+    from Core.consultas_lentas import normalizar_sql
+
+    # Pasos del manejador de FastAPI (fastapi.routing.get_request_handler los busca por nombre).
+    # Una sola vez, aunque se instale en varios engines (réplicas).
+    if not _fastapi_trazado:
+        _envolver_async(fastapi.routing, "solve_dependencies", "fastapi.dependencias")
+        _envolver_async(fastapi.routing, "run_endpoint_function", "fastapi.endpoint")
+        _envolver_async(fastapi.routing, "serialize_response", "pydantic.respuesta")
+        _fastapi_trazado = True
+
+    # Pedido de conexión al pool (incluye la espera si está lleno y el pre-ping)
+    raw_connection = engine.raw_connection
+
+    @functools.wraps(raw_connection)
+    def conexion_trazada(*args, **kwargs):
+        with span("db.checkout", **{"db.pool": engine.pool.status()}):
+            return raw_connection(*args, **kwargs)
+
+    engine.raw_connection = conexion_trazada
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, sentencia, parametros, contexto, varias):
+        # None si la petición no se traza: así antes y después quedan siempre apareados
+        s = None
+        if _actual.get() is not None:
+            s = hijo("db.sql", **{"db.system": engine.dialect.name, "db.host": engine.url.host,
+                                   "db.statement": normalizar_sql(sentencia)[:2000]})
+        conn.info.setdefault("spans_sql", []).append(s)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, sentencia, parametros, contexto, varias):
+        spans = conn.info.get("spans_sql")
+        s = spans.pop() if spans else None
+        if s is not None:
+            if cursor.rowcount >= 0:  # los SELECT no lo informan
+                s.atributos["db.filas"] = cursor.rowcount
+            s.terminar()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        spans = contexto.connection.info.get("spans_sql") if contexto.connection is not None else None
+        s = spans.pop() if spans else None
+        if s is not None:
+            s.terminar(contexto.original_exception)
+
+    logger.info("Trazas activas: %s", TRAZAS_OTLP_URL if TRAZAS == "otlp" else TRAZAS_ARCHIVO)
@@ -1,9 +1,22 @@
 # Routes/__init__.py
 
 #   Esto  no hace falta, pero se pone para una mejor organización
-from .routes_estudiantes import router as estudiantes_router
-from .routes_materias import router as materias_router
-from .routes_periodos import router as periodos_router
-from .routes_personal import router as personal_router
+#   Los routers se importan recién cuando se piden (p. ej. "from Routes import materias_router"):
+#   importar un módulo de Routes no arrastra a todos los demás (ver Core/carga_perezosa.py).
+import importlib
+
+_ROUTERS = {
+    "estudiantes_router": ".routes_estudiantes",
+    "materias_router": ".routes_materias",
+    "periodos_router": ".routes_periodos",
+    "personal_router": ".routes_personal",
+}
+
+
+def __getattr__(nombre):
+    if nombre in _ROUTERS:
+        return importlib.import_module(_ROUTERS[nombre], __name__).router
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
 
 __all__ = ["estudiantes_router", "materias_router", "periodos_router", "personal_router"  ]
\ No newline at end of file
@@ -0,0 +1,177 @@
+#   backend_AcademiA\backend-master\Routes\routes_batch.py
+
+# POST /api/batch: varias peticiones GET en una sola llamada HTTP.
+# Pensado para las pantallas que disparan ráfagas de GETs chicos (notas por materia,
+# notas por período, etc.), sobre todo desde el celular donde cada ida y vuelta cuesta.
+#   - El usuario se resuelve UNA vez (JWT + consulta) y se reutiliza en cada sub-petición.
+#   - Las sub-peticiones se despachan adentro del mismo proceso, directo al router de la app
+#     (sin volver a pasar por la red ni por los middlewares).
+#   - Corren en paralelo con un máximo (BATCH_CONCURRENCIA). Cada "carril" de concurrencia
+#     usa una única sesión de BD para todas sus sub-peticiones; una sesión de SQLAlchemy no se
+#     puede usar desde dos hilos a la vez, por eso no se comparte una sola entre carriles.
+#     Con BATCH_CONCURRENCIA=1 todo el lote usa una sola sesión.
+#
+# Ejemplo:
+#   POST /api/batch
+#   {"requests": [{"id": "mat", "path": "/api/notas/estudiante-materia-curso/5/3/1"},
+#                 {"id": "ina", "path": "/api/estudiantes/inasistencias/5/2025"}]}
+#   -> {"resultados": {"mat": {"status": 200, "body": [...], "duracion_ms": 4.1}, ...},
+#       "duracion_ms": 6.3}
+
+import asyncio
+import json
+import logging
+import os
+import time
+from urllib.parse import unquote, urlsplit
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from auth import get_current_user
+from database import get_db, localSession
+from schemas import BatchRequest, BatchResponse, UserAuthData
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Batch"])
+
+# Máximo de sub-peticiones por lote
+MAX_PETICIONES = int(os.getenv("BATCH_MAX_PETICIONES", "50"))
+
+# Cuántas sub-peticiones corren al mismo tiempo (y cuántas sesiones de BD usa el lote)
+CONCURRENCIA = max(1, int(os.getenv("BATCH_CONCURRENCIA", "4")))
+
+RUTA_LOTE = "/api/batch"
+
+# Headers de la petición original que se copian a cada sub-petición
+HEADERS_REENVIADOS = (b"authorization", b"accept-language")
+
+
+def _validar_ruta(path: str):
+    partes = urlsplit(path)
+    if partes.scheme or partes.netloc or not partes.path.startswith("/api/"):
+        raise HTTPException(status_code=400, detail=f"Ruta no permitida en el lote: {path}")
+    if partes.path.rstrip("/") == RUTA_LOTE:
+        raise HTTPException(status_code=400, detail="No se puede anidar /api/batch")
+    return partes.path, partes.query
+
+
+def _leer_cuerpo(headers: dict, cuerpo: bytes):
+    if not cuerpo:
+        return None
+    if headers.get(b"content-type", b"").startswith(b"application/json"):
+        return json.loads(cuerpo)
+    return cuerpo.decode("utf-8", errors="replace")
+
+
+async def _despachar(request: Request, path: str, query: str, estado: dict):
+    # Arma el scope ASGI de la sub-petición a partir del de la petición original
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": unquote(path),
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [(k, v) for k, v in request.scope["headers"] if k in HEADERS_REENVIADOS]
+                   + [(b"accept", b"application/json")],
+        "state": estado,
+        "app": request.scope["app"],
+        # Para que las HTTPException de los endpoints se conviertan en respuestas JSON
+        "starlette.exception_handlers": request.scope["starlette.exception_handlers"],
+    }
+
+    respuesta = {"status": 500, "headers": {}, "cuerpo": []}
+    terminada = asyncio.Event()
+    pedido = {"leido": False}
+
+    async def receive():
+        # Primero el cuerpo (vacío) del GET; después, "desconexión" recién al terminar.
+        # Las StreamingResponse escuchan receive() mientras envían y no deben cortarse antes.
+        if not pedido["leido"]:
+            pedido["leido"] = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await terminada.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(mensaje):
+        if mensaje["type"] == "http.response.start":
+            respuesta["status"] = mensaje["status"]
+            respuesta["headers"] = dict(mensaje.get("headers", []))
+        elif mensaje["type"] == "http.response.body":
+            respuesta["cuerpo"].append(mensaje.get("body", b""))
+
+    try:
+        await request.app.router(scope, receive, send)
+    except StarletteHTTPException as e:
+        # 404 / 405 del propio router (ruta inexistente o sin GET)
+        return e.status_code, {"detail": e.detail}
+    finally:
+        terminada.set()
+
+    return respuesta["status"], _leer_cuerpo(respuesta["headers"], b"".join(respuesta["cuerpo"]))
+
+
+# ==================== ENDPOINT ====================
+
+@router.post("/batch", response_model=BatchResponse)
+async def ejecutar_lote(
+    lote: BatchRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: UserAuthData = Depends(get_current_user),
+):
+    inicio_lote = time.perf_counter()
+
+    if len(lote.requests) > MAX_PETICIONES:
+        raise HTTPException(status_code=400, detail=f"El lote admite hasta {MAX_PETICIONES} peticiones")
+    ids = [sub.id for sub in lote.requests]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Los id de las peticiones deben ser únicos")
+
+    # Se validan todas las rutas antes de ejecutar nada
+    rutas = {sub.id: _validar_ruta(sub.path) for sub in lote.requests}
+
+    resultados = {}
+    pendientes = iter(lote.requests)
+
+    async def carril(sesion: Session):
+        # Las sub-peticiones de un carril van de a una, así la sesión nunca se usa en paralelo
+        estado = {"sesion_lote": sesion, "usuario_lote": current_user}
+        for sub in pendientes:
+            path, query = rutas[sub.id]
+            inicio = time.perf_counter()
+            try:
+                status, cuerpo = await _despachar(request, path, query, estado)
+            except Exception as e:
+                logger.exception("Error en la sub-petición %s (%s): %s", sub.id, sub.path, e)
+                status, cuerpo = 500, {"detail": "Error interno del servidor"}
+            if status >= 500:
+                # Deja la sesión lista para la siguiente sub-petición del carril
+                sesion.rollback()
+            resultados[sub.id] = {
+                "status": status,
+                "body": cuerpo,
+                "duracion_ms": round((time.perf_counter() - inicio) * 1000, 2),
+            }
+
+    # El primer carril usa la sesión de esta petición (la misma con la que se resolvió el usuario)
+    sesiones = [db] + [localSession() for _ in range(min(CONCURRENCIA, len(lote.requests)) - 1)]
+    try:
+        await asyncio.gather(*(carril(sesion) for sesion in sesiones))
+    finally:
+        for sesion in sesiones[1:]:
+            sesion.close()
+
+    return {
+        # En el mismo orden en que se pidieron
+        "resultados": {i: resultados[i] for i in ids},
+        "duracion_ms": round((time.perf_counter() - inicio_lote) * 1000, 2),
+    }
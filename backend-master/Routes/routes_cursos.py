@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session, joinedload
 from database import get_db
 from models import Curso
 import models, schemas
+from Core.ndjson import modo_ndjson, respuesta_ndjson
 
 router = APIRouter(
     prefix="/cursos",
@@ -23,17 +24,25 @@ def obtener_cursos(db: Session = Depends(get_db)):
 
 
 #   GET de todos los cursos, con info de Ciclo Lectivo y Plan de cada uno
-@router.get("/completo/", response_model=list[schemas.CursoCicloLectivo])
-# Definición de función
-def obtener_cursos_ciclo_plan(db: Session = Depends(get_db)):
+def _consulta_cursos_ciclo_plan(db: Session):
     # Inicio de la consulta
-    cursos = db.query(models.Curso).options( 
+    return db.query(models.Curso).options( 
         # Carga del Ciclo
         joinedload(models.Curso.ciclo)
         # Carga del Plan encadenada
         .joinedload(models.CicloLectivo.plan)
         # Cierre de la consulta
-        ).all()
+        )
+
+
+@router.get("/completo/", response_model=list[schemas.CursoCicloLectivo])
+# Definición de función
+def obtener_cursos_ciclo_plan(db: Session = Depends(get_db), ndjson: bool = Depends(modo_ndjson)):
+    # Con ?stream=1 o Accept: application/x-ndjson, se envía por bloques (ver Core/ndjson.py)
+    if ndjson:
+        return respuesta_ndjson(_consulta_cursos_ciclo_plan, schemas.CursoCicloLectivo, desde_orm=True)
+
+    cursos = _consulta_cursos_ciclo_plan(db).all()
     # Retorno
     return cursos
     
@@ -1,43 +1,46 @@
 # Routes/routes_docentes.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 # Importaciones corregidas usando notación relativa (..)
-from database import localSession
+from database import get_db
 from models import Entidad as EntidadORM
 from schemas import (
+    DocenteCargaResponse,
     DocenteResponse, 
     DocenteCreate, 
     DocenteUpdate,
     UserAuthData
 )
 from auth import get_current_user
+from Services.docente_service import carga_docente
+from Core.ndjson import modo_ndjson, respuesta_ndjson
 
 from datetime import datetime
+from typing import Optional
 
 # 1. Definición del router
 router = APIRouter()
 
-# Dependencia de la base de datos
-def get_db():
-    db = localSession()
-    try:
-        yield db
-    finally:
-        db.close()
-
 #   # ==================== ENDPOINTS DOCENTES ====================
 #   
-@router.get("/", response_model=list[DocenteResponse])
-async def get_docentes(db: Session = Depends(get_db)):
-
+def _consulta_docentes(db: Session):
     # Buscamos entidades que no están eliminados y sean del tipo DOCENTE
-    docentes_db = db.query(EntidadORM).filter(
+    return db.query(EntidadORM).filter(
         EntidadORM.tipo_entidad.has(tipo_entidad="DOCENTE"),
         EntidadORM.apellido != "",
         EntidadORM.deleted_at.is_(None)
         
-    ).all()
+    )
+
+
+@router.get("/", response_model=list[DocenteResponse])
+async def get_docentes(db: Session = Depends(get_db), ndjson: bool = Depends(modo_ndjson)):
+    # Con ?stream=1 o Accept: application/x-ndjson, se envía por bloques (ver Core/ndjson.py)
+    if ndjson:
+        return respuesta_ndjson(_consulta_docentes, DocenteResponse, desde_orm=True)
+
+    docentes_db = _consulta_docentes(db).all()
 
     return docentes_db
 
@@ -65,6 +68,26 @@ async def get_docente(id: int, db: Session = Depends(get_db)):
     )
 
 
+# =====================================================
+#  GET - Carga del docente
+#   Materias por ciclo lectivo, inscriptos, notas cargadas/faltantes por tipo de nota y
+#   última fecha de carga. Se calcula con una sola consulta (ver Services/docente_service.py).
+# =====================================================
+
+@router.get("/{id}/carga", response_model=DocenteCargaResponse)
+def get_carga_docente(
+    id: int,
+    id_ciclo_lectivo: Optional[int] = Query(None, description="Sólo las materias de este ciclo lectivo"),
+    db: Session = Depends(get_db),
+    current_user: UserAuthData = Depends(get_current_user)
+):
+    # Lógica de permisos: el ADMIN o el propio docente
+    if current_user.rol_sistema != 'ADMIN_SISTEMA' and current_user.id_entidad != id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos para ver la carga de este docente.")
+
+    return carga_docente(db, id, id_ciclo_lectivo)
+
+
 # =====================================================
 #  POST - Nuevo Docente
 # =====================================================
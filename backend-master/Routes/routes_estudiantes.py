@@ -1,10 +1,10 @@
 # Routes/routes_estudiantes.py
 
-from fastapi import APIRouter, Depends, HTTPException, status 
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 
-from sqlalchemy.orm import Session,joinedload
-from database import localSession
-from typing import List
+from sqlalchemy.orm import Session
+from database import get_db
+from typing import List, Optional
 
 from models import ( 
     Entidad as EntidadORM, TipoEntidad, NombreMateria,  Inscripcion,
@@ -18,17 +18,22 @@ from schemas import (
     EstudianteUpdate,
     UserAuthData, # Para obtener el rol
     CicloLectivoSimple,
-    MateriaResponse
+    MateriaResponse,
+    EstudianteBusquedaResponse,
+    ImportacionEstudiantesResponse,
+    DashboardEstudianteResponse
 )
 
 from auth import get_current_user # Para obtener el usuario actual
 
-def get_db():
-    db = localSession()
-    try:
-        yield db
-    finally:
-        db.close()
+# Índice en memoria para la búsqueda rápida de estudiantes
+from Services.busqueda_service import indice_estudiantes
+from Services.importacion_service import importar_estudiantes_csv
+from Services.inasistencia_service import ANIO_MAXIMO, ANIO_MINIMO
+from Services.dashboard_service import armar_dashboard
+from Services.materia_service import con_perfil
+from Core.respuestas import respuesta_modelos
+from Core.ndjson import modo_ndjson, respuesta_ndjson
 
 # Definición del router
 router = APIRouter()
@@ -36,10 +41,34 @@ router = APIRouter()
  
  # ==================== ENDPOINTS ESTUDIANTES ====================
  
+def _consulta_estudiantes(db: Session):
+    return db.query(EntidadORM).filter(
+        # Buscar entidades que tengan un tipo relacionado cuyo nombre sea ALUMNO".
+        EntidadORM.tipo_entidad.has(TipoEntidad.tipo_entidad =="ESTUDIANTE"),
+        
+        EntidadORM.apellido != "",
+        EntidadORM.deleted_at.is_(None)
+    )
+
+
+def _estudiante(est: EntidadORM) -> EstudianteResponse:
+    return EstudianteResponse(
+        id_entidad=est.id_entidad,
+        name=f"{est.apellido}, {est.nombre}".strip(),
+        nombre=est.nombre,
+        apellido=est.apellido,
+        fec_nac=est.fec_nac,
+        email=est.email,
+        domicilio=est.domicilio,
+        telefono=est.telefono
+    )
+
+
 @router.get("/", response_model=list[EstudianteResponse])
 async def get_estudiantes(
     db: Session = Depends(get_db), 
-    current_user: UserAuthData = Depends(get_current_user) # Seguridad activa
+    current_user: UserAuthData = Depends(get_current_user), # Seguridad activa
+    ndjson: bool = Depends(modo_ndjson)
 ):
     # 1. Validación de permisos (Solo Admins)
     if current_user.tipo_rol.tipo_entidad != 'ADMIN_SISTEMA':
@@ -48,30 +77,54 @@ async def get_estudiantes(
             detail="No tienes permisos de administrador."
         )
 
-    # 2. Consulta a la base de datos
-    estudiantes_db = db.query(EntidadORM).filter(
-        # Buscar entidades que tengan un tipo relacionado cuyo nombre sea ALUMNO".
-        EntidadORM.tipo_entidad.has(TipoEntidad.tipo_entidad =="ESTUDIANTE"),
-        
-        EntidadORM.apellido != "",
-        EntidadORM.deleted_at.is_(None)
-    ).all()
+    # 2. Con ?stream=1 o Accept: application/x-ndjson, se envía por bloques (ver Core/ndjson.py)
+    if ndjson:
+        return respuesta_ndjson(_consulta_estudiantes, EstudianteResponse, convertir=_estudiante)
+
+    # 3. Consulta a la base de datos
+    estudiantes_db = _consulta_estudiantes(db).all()
     
-    # 3. Mapeo y entrega de datos
+    # 4. Mapeo y entrega de datos
+    #   Los modelos ya están validados: se serializan directo, sin que FastAPI los vuelva a validar
+    return respuesta_modelos([_estudiante(est) for est in estudiantes_db], list[EstudianteResponse])
+
+
+
+# # =====================================================
+#  GET - Buscar estudiantes por apellido, nombre, DNI, legajo o email
+#  Usa el índice en memoria (prefijo + aproximada por trigramas).
+#  Debe declararse ANTES de "/{id}", sinó "search" se toma como un ID.
+# =====================================================
+@router.get("/search", response_model=List[EstudianteBusquedaResponse])
+def buscar_estudiantes(
+    q: str = Query(..., min_length=1, description="Texto a buscar (apellido, nombre, DNI, legajo o email)"),
+    limite: int = Query(20, ge=1, le=100, description="Cantidad máxima de resultados"),
+    db: Session = Depends(get_db),
+    current_user: UserAuthData = Depends(get_current_user)
+):
+    # Sólo el personal (Admins y Docentes) puede buscar estudiantes
+    if current_user.rol_sistema not in ['ADMIN_SISTEMA', 'DOCENTE_APP']:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para buscar estudiantes."
+        )
+
+    # La primera vez carga el índice; luego sólo trae los cambios recientes
+    indice_estudiantes.asegurar_actualizado(db)
+
     return [
-        EstudianteResponse(
-            id_entidad=est.id_entidad,
-            name=f"{est.apellido}, {est.nombre}".strip(),
-            nombre=est.nombre,
-            apellido=est.apellido,
-            fec_nac=est.fec_nac,
-            email=est.email,
-            domicilio=est.domicilio,
-            telefono=est.telefono
-        ) for est in estudiantes_db
+        EstudianteBusquedaResponse(
+            id_entidad=doc.id_entidad,
+            name=f"{doc.apellido}, {doc.nombre}".strip(),
+            nombre=doc.nombre,
+            apellido=doc.apellido,
+            dni=doc.dni,
+            legajo=doc.legajo,
+            email=doc.email,
+            puntaje=puntaje
+        ) for doc, puntaje in indice_estudiantes.buscar(q, limite)
     ]
 
-
  
 # # =====================================================
 #  GET - Obtener Datos de un estudiante por ID
@@ -155,6 +208,9 @@ async def create_estudiante(estudiante: EstudianteCreate, db: Session = Depends(
      db.add(new_estudiante)
      db.commit()
      db.refresh(new_estudiante)
+
+     # Mantener actualizado el índice de búsqueda
+     indice_estudiantes.actualizar(new_estudiante)
      
      return EstudianteResponse(
          id_entidad=new_estudiante.id_entidad,
@@ -167,6 +223,34 @@ async def create_estudiante(estudiante: EstudianteCreate, db: Session = Depends(
          telefono=new_estudiante.telefono
      )
  
+# =====================================================
+#  POST - Importación masiva de estudiantes desde CSV
+#  Columnas: nombre, apellido, email, fec_nac, domicilio, telefono, dni, legajo
+#  (separador "," o ";"). Devuelve el informe de errores por fila.
+# =====================================================
+@router.post("/import", response_model=ImportacionEstudiantesResponse)
+def importar_estudiantes(
+    archivo: UploadFile = File(..., description="Archivo CSV con encabezado"),
+    db: Session = Depends(get_db),
+    current_user: UserAuthData = Depends(get_current_user)
+):
+    # Sólo los administradores pueden importar
+    if current_user.rol_sistema != 'ADMIN_SISTEMA':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos de administrador."
+        )
+
+    # El archivo se procesa fila por fila, en bloques
+    informe = importar_estudiantes_csv(db, archivo.file)
+
+    # Los nuevos estudiantes aparecerán en la próxima búsqueda
+    if informe["importados"]:
+        indice_estudiantes.forzar_refresco()
+
+    return informe
+
+ 
 @router.put("/{id}", response_model=EstudianteResponse)
 async def update_estudiante(id: int, estudiante: EstudianteUpdate, db: Session = Depends(get_db)):
      db_estudiante = db.query(EntidadORM).filter(EntidadORM.id_entidad == id).first()
@@ -190,6 +274,9 @@ async def update_estudiante(id: int, estudiante: EstudianteUpdate, db: Session =
          
      db.commit()
      db.refresh(db_estudiante)
+
+     # Mantener actualizado el índice de búsqueda
+     indice_estudiantes.actualizar(db_estudiante)
      
      return EstudianteResponse(
          id_entidad=db_estudiante.id_entidad,
@@ -211,6 +298,9 @@ async def delete_estudiante(id: int, db: Session = Depends(get_db)):
      
      db.delete(db_estudiante)
      db.commit()
+
+     # Quitarlo del índice de búsqueda
+     indice_estudiantes.quitar(id)
      
      return {"message": "Estudiante eliminado exitosamente"}
 
@@ -287,22 +377,21 @@ async def get_materias_ciclo_por_estudiante(id_ciclo: int, id_estudiante: int,
         raise HTTPException(status_code=404, detail="Estudiante no encontrado")
 
     # Consulta a la base de datos (usando SQL Alchemy)
-    # Buscamos en inscripciones, pero devolvemos los objetos 'materia'
-    inscripciones_db = (
-        db.query(InscripcionORM
-                 ).filter(
-                    InscripcionORM.id_entidad == id_estudiante,
-                    InscripcionORM.id_ciclo_lectivo == id_ciclo,
-                    InscripcionORM.deleted_at.is_(None)
-                ).options(
-                     # Cargamos las relaciones anidadas que pide la MateriaResponse
-                    joinedload(InscripcionORM.materia).joinedload(MateriaORM.nombre),
-                    joinedload(InscripcionORM.materia).joinedload(MateriaORM.curso),
-                    joinedload(InscripcionORM.materia).joinedload(MateriaORM.docente)
-                ).all()
-                )
-    #   Extraer solo los objetos MateriaORM de las inscripciones encontradas
-    materias_alu_ciclo = [ins.materia for ins in inscripciones_db if ins.materia]
+    # Materias en las que tiene inscripciones en el ciclo, con el perfil de carga "tabla"
+    # (las relaciones que pide MateriaResponse, sólo con las columnas que usa)
+    materias_inscriptas = (
+        db.query(InscripcionORM.id_materia)
+        .filter(
+            InscripcionORM.id_entidad == id_estudiante,
+            InscripcionORM.id_ciclo_lectivo == id_ciclo,
+            InscripcionORM.deleted_at.is_(None)
+        )
+    )
+    materias_alu_ciclo = (
+        con_perfil(db.query(MateriaORM), "tabla")
+        .filter(MateriaORM.id_materia.in_(materias_inscriptas))
+        .all()
+    )
     
     return materias_alu_ciclo
 
@@ -342,4 +431,27 @@ def get_ciclos_por_estudiante(id_entidad: int, db: Session = Depends(get_db)):
 
 
 
+# ========================================================================
+#  GET - Dashboard del estudiante
+#  Ciclos, materias del ciclo, matriz de notas y totales de inasistencias
+#  en UNA sola respuesta (reemplaza las llamadas sueltas del frontend).
+# ========================================================================
+
+@router.get("/{id_entidad}/dashboard", response_model=DashboardEstudianteResponse)
+async def get_dashboard_estudiante(
+    id_entidad: int,
+    ciclo_id: Optional[int] = Query(None, description="ID del ciclo lectivo (por defecto, el más reciente)"),
+    year: Optional[int] = Query(None, ge=ANIO_MINIMO, le=ANIO_MAXIMO,
+                                description="Año de las inasistencias (por defecto, el del ciclo)"),
+    current_user: UserAuthData = Depends(get_current_user)
+):
+    # Lógica de Permisos (Solo el ADMIN, los docentes o el PROPIO estudiante)
+    if current_user.rol_sistema not in ['ADMIN_SISTEMA', 'DOCENTE_APP'] and current_user.id_entidad != id_entidad:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos para ver este estudiante.")
+
+    # Las consultas abren sus propias sesiones para poder correr en paralelo
+    return await armar_dashboard(id_entidad, ciclo_id, year)
+
+
+
 routes_estudiantes = router
\ No newline at end of file
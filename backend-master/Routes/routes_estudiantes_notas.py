@@ -1,18 +1,12 @@
 #   backend_AcademiA\backend-master\Routes\routes_estudiantes_notas.py
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 import models, schemas
-from database import localSession
+from database import get_db_lectura
+from Services.materia_service import con_perfil
 
 
-def get_db():
-    db = localSession()
-    try:
-        yield db
-    finally:
-        db.close()
-
 
 
 router = APIRouter(prefix="/estudiantes/notas")
@@ -23,7 +17,7 @@ def obtener_informe_notas_estudiante(
     id_estudiante: int,
     ciclo_id: int = Query(..., description="ID del ciclo lectivo"),
     curso_id: int = Query(..., description="ID del curso"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_lectura)
 ):
     try:
         # 1. Obtener Columnas (Headers de tipos de nota)
@@ -50,9 +44,8 @@ def obtener_informe_notas_estudiante(
         # 3. Identificar las materias involucradas
         # Mapeamos materias por ID para evitar duplicados
         materias_query = (
-            db.query(models.Materia)
-            # Acceder una sola vez a la BD para cargar el nombre de la materia
-            .options(joinedload(models.Materia.nombre)) 
+            # Acceder una sola vez a la BD para cargar el id y el nombre de la materia
+            con_perfil(db.query(models.Materia), "simple")
             .filter(models.Materia.id_curso == curso_id)
             .all()
         )
@@ -1,68 +1,47 @@
 #   backend-master\backend-master\Routes\attendance_estudiantes.py
 
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import extract  # Para filtrar por año
-from typing import List
+from typing import List, Optional
 
 # --- Importaciones del proyecto ---
-from models import Inasistencia
 import schemas
-from database import localSession          
+from database import get_db
+from Services.inasistencia_service import ANIO_MAXIMO, ANIO_MINIMO, rango_anio, totales_anio, json_inasistencias
+
+logger = logging.getLogger(__name__)
 
 # Creamos la instancia del router con un prefijo claro para organizar las rutas de la API.
 router = APIRouter(prefix="/estudiantes/inasistencias")
 
-# Dependencia para la base de datos
-def get_db():
-    db = localSession()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # ---------------------------------------------------------------
 # Endpoint Principal
 # ---------------------------------------------------------------
 
 # El parámetro de la ruta recibe id_entidad y year como parte de la URL.
+# Opcionalmente se puede filtrar por materia y/o curso (?id_materia=..&id_curso=..).
 @router.get("/{id_entidad}/{year}", response_model=schemas.InasistenciaResponse)
 def get_asistencias_entidad(
     id_entidad: int,  # Parámetro de ruta
-    year: int,   # Parámetro de ruta
+    year: int = Path(..., ge=ANIO_MINIMO, le=ANIO_MAXIMO),   # Parámetro de ruta
+    id_materia: Optional[int] = Query(None),
+    id_curso: Optional[int] = Query(None),
     db: Session = Depends(get_db)
 ):
     # Debug
-    print(f"\n🔍 DEBUG: Buscando usuario ID: {id_entidad} en año {year}") # <--- DEBUG
-    print(f"🔍 DEBUG: Buscando inasistencias para Entidad ID: {id_entidad} en año {year}") # <--- DEBUG
-    
-    # # Consulta a la base de datos
-    # Similar a SELECT * FROM t_inasistencia WHERE id_entidad = ... AND YEAR(fecha_inasistencia) = ...;
-    inasistencias = db.query(Inasistencia).filter(
-            Inasistencia.id_entidad == id_entidad,
-            extract('year', Inasistencia.fecha_inasistencia) == year
-        ).all()
-    
-    # Calculamos total inasistencias e inasistencias justificadas
-    total_inasistencia = sum((i.tipo_obj.valor if i.tipo_obj else 0) for i in inasistencias)
-    total_inasistencia_justif = sum((i.tipo_obj.valor if i.tipo_obj else 0) for i in inasistencias if i.justificada)
-    
-    # Retornamos el objeto siguiendo la estructura de schemas.InasistenciaResponse
-    return {
-        "totalInasistencia": total_inasistencia,
-        "totalInasistenciaJustif": total_inasistencia_justif,
-        "detailedRecords": [
-            {
-                "date": i.fecha_inasistencia.strftime("%d/%m/%Y"),
-                # Accedemos a la descripción del tipo a través de la relación
-                "type": i.tipo_obj.descripcion if i.tipo_obj else "Desconocido",
-                "value": i.tipo_obj.valor if i.tipo_obj else 0.0,
-                "justified": bool(i.justificada),
-                "reason": i.motivo_inasistencia or ""
-            }
-            for i in inasistencias
-        ]
-    }
+    logger.debug("🔍 Buscando inasistencias para Entidad ID: %s en año %s", id_entidad, year)
 
+    # Rango semiabierto [1/1/year, 1/1/year+1): a diferencia de YEAR(fecha) = year, usa el índice
+    desde, hasta = rango_anio(year)
 
+    # Totales del resumen mensual precalculado (a lo sumo 12 filas por curso y marca de justificada)
+    total, total_justif = totales_anio(db, id_entidad, year, id_materia, id_curso)
 
+    # El detalle se envía en streaming con la misma estructura de schemas.InasistenciaResponse
+    return StreamingResponse(
+        json_inasistencias(total, total_justif, id_entidad, desde, hasta, id_materia, id_curso),
+        media_type="application/json"
+    )
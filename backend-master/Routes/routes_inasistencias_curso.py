@@ -0,0 +1,76 @@
+#   backend-master\backend-master\Routes\routes_inasistencias_curso.py
+
+# Asistencia de un curso completo: carga del parte diario del preceptor, grilla
+# estudiante x día y estudiantes que superaron el límite de inasistencias.
+
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+# --- Importaciones del proyecto ---
+import schemas
+from auth import get_current_user
+from database import get_db, get_db_lectura
+from Services.inasistencia_service import matriz_curso, registrar_inasistencias_curso
+from Services.alertas_service import alertas_curso
+
+router = APIRouter(prefix="/inasistencias/curso", tags=["Asistencias"])
+
+
+def _verificar_permiso(current_user: schemas.UserAuthData, accion: str):
+    if current_user.rol_sistema not in ['ADMIN_SISTEMA', 'DOCENTE_APP']:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"No tienes permisos para {accion}."
+        )
+
+
+# ---------------------------------------------------------------
+# POST /api/inasistencias/curso/{id_curso}/{fecha}
+# ---------------------------------------------------------------
+# Recibe las inasistencias del día de todo el curso (o de una materia) y las guarda de una vez.
+# Si se vuelve a enviar el parte, se actualizan las existentes en lugar de duplicarlas.
+@router.post("/{id_curso}/{fecha}", response_model=schemas.InasistenciaCursoCargaResponse)
+def cargar_inasistencias_curso(
+    id_curso: int,
+    fecha: date,  # Formato aaaa-mm-dd
+    carga: schemas.InasistenciaCursoCarga,
+    db: Session = Depends(get_db),
+    current_user: schemas.UserAuthData = Depends(get_current_user)
+):
+    _verificar_permiso(current_user, "cargar inasistencias")
+    return registrar_inasistencias_curso(db, id_curso, fecha, carga)
+
+
+# ---------------------------------------------------------------
+# GET /api/inasistencias/curso/{id_curso}/matriz?desde=aaaa-mm-dd&hasta=aaaa-mm-dd
+# ---------------------------------------------------------------
+# Grilla estudiante x día del curso, armada con una sola consulta agrupada.
+@router.get("/{id_curso}/matriz", response_model=schemas.InasistenciaMatrizResponse)
+def get_matriz_inasistencias_curso(
+    id_curso: int,
+    desde: date = Query(...),
+    hasta: date = Query(...),  # Inclusive
+    id_materia: Optional[int] = Query(None),
+    db: Session = Depends(get_db_lectura),
+    current_user: schemas.UserAuthData = Depends(get_current_user)
+):
+    _verificar_permiso(current_user, "ver la asistencia del curso")
+    return matriz_curso(db, id_curso, desde, hasta, id_materia)
+
+
+# ---------------------------------------------------------------
+# GET /api/inasistencias/curso/{id_curso}/alertas?anio=aaaa
+# ---------------------------------------------------------------
+# Estudiantes que superaron el límite de inasistencias (según el último escaneo).
+@router.get("/{id_curso}/alertas", response_model=List[schemas.InasistenciaAlerta])
+def get_alertas_inasistencias_curso(
+    id_curso: int,
+    anio: int = Query(default_factory=lambda: date.today().year),
+    db: Session = Depends(get_db_lectura),
+    current_user: schemas.UserAuthData = Depends(get_current_user)
+):
+    _verificar_permiso(current_user, "ver la asistencia del curso")
+    return alertas_curso(db, id_curso, anio)
@@ -1,43 +1,43 @@
 #  backend-master\backend-master\Routes\routes_materias.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from database import localSession
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+from database import get_db_lectura
 from models import Materia
 import models, schemas 
+from Services.materia_service import con_perfil, contar_materias, tabla_materias
+from Services.catalogo_service import etag_catalogo, no_modificado
+from Core.ndjson import modo_ndjson, respuesta_ndjson
 
 router = APIRouter()
 
-def get_db():
-    db = localSession()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # ========================================================================
 #  Obtener todaslas materias
 # ========================================================================
 
-@router.get("/", response_model=list[schemas.MateriaResponse])
-async def get_materias(db: Session = Depends(get_db)):
-    #   Traemos el objeto completo con carga ansiosa (Eager Loading)
-    materias = (
-        db.query(models.Materia)
-        .options(
-            # Trae el nombre de la materia
-            joinedload(models.Materia.nombre),
-
-            # Trae el docente (Entidad)
-            joinedload(models.Materia.docente),
-            
-            # 3. Trae el Curso -> Ciclo -> Plan (Triple Join)
-            joinedload(models.Materia.curso)
-                .joinedload(models.Curso.ciclo)
-                .joinedload(models.CicloLectivo.plan)
-            ) 
+def _consulta_materias(db: Session, perfil: str = "tabla"):
+    #   Traemos el objeto completo con el perfil de carga "tabla":
+    #   nombre en JOIN; curso (con ciclo y plan) y docente en una consulta aparte cada uno,
+    #   leyendo sólo las columnas que usa MateriaResponse
+    return (
+        con_perfil(db.query(models.Materia), perfil)
         .order_by(models.Materia.id_materia) # ordena por ID
-        .all()
     )
+
+
+def _consulta_materias_stream(db: Session):
+    #   En streaming todo va en JOIN (perfil "stream"): no puede haber consultas extra mientras
+    #   el cursor del servidor está abierto
+    return _consulta_materias(db, "stream")
+
+
+@router.get("/", response_model=list[schemas.MateriaResponse])
+async def get_materias(db: Session = Depends(get_db_lectura), ndjson: bool = Depends(modo_ndjson)):
+    #   Con ?stream=1 o Accept: application/x-ndjson, se envía por bloques (ver Core/ndjson.py)
+    if ndjson:
+        return respuesta_ndjson(_consulta_materias_stream, schemas.MateriaResponse, desde_orm=True)
+
+    materias = _consulta_materias(db).all()
     
     # Devolvemos la lista de objetos tal cual
     # Pydantic se encargará de mapear los IDs y el nombre_rel automáticamente
@@ -45,31 +45,80 @@ async def get_materias(db: Session = Depends(get_db)):
 
 
 # ========================================================================
-#  Obtener todaslas materias e info. Para tablas
+#  Obtener las materias e info. Para tablas
+#   Paginada, con filtros y orden. El total va en la cabecera X-Total-Count.
+#   Las respuestas llevan el ETag de la versión del catálogo de materias: si el cliente manda
+#   If-None-Match con la misma versión se responde 304 sin volver a consultar.
 # ========================================================================
 
+def filtros_tabla(
+    id_ciclo_lectivo: Optional[int] = Query(None, description="ID del ciclo lectivo"),
+    id_plan: Optional[int] = Query(None, description="ID del plan"),
+    id_curso: Optional[int] = Query(None, description="ID del curso"),
+    id_docente: Optional[int] = Query(None, description="ID (id_entidad) del docente"),
+    nombre: Optional[str] = Query(None, min_length=1, max_length=100, description="Parte del nombre de la materia"),
+) -> dict:
+    return {
+        "id_ciclo_lectivo": id_ciclo_lectivo, "id_plan": id_plan, "id_curso": id_curso,
+        "id_docente": id_docente, "nombre": nombre,
+    }
+
+
+def _cabeceras_cache(etag: str) -> dict:
+    # El cliente puede guardar la respuesta pero tiene que revalidarla siempre (If-None-Match)
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _respuesta_304(etag: str) -> Response:
+    return Response(status_code=304, headers=_cabeceras_cache(etag))
+
+
 @router.get("/tabla/", response_model=list[schemas.MateriaResponse])
-def obtener_materias_tabla(db: Session = Depends(get_db)):
-    return db.query(models.Materia).options(
-        joinedload(models.Materia.nombre),
-        joinedload(models.Materia.docente),
-        joinedload(models.Materia.curso)
-            .joinedload(models.Curso.ciclo)
-            .joinedload(models.CicloLectivo.plan)
-    ).all()
+def obtener_materias_tabla(
+    request: Request,
+    response: Response,
+    filtros: dict = Depends(filtros_tabla),
+    pagina: int = Query(1, ge=1, description="Número de página (desde 1)"),
+    tamano: int = Query(50, ge=1, le=500, description="Materias por página"),
+    orden: Literal["id_materia", "nombre", "curso", "ciclo", "plan", "docente"] = Query("id_materia"),
+    desc: bool = Query(False, description="Orden descendente"),
+    db: Session = Depends(get_db_lectura)
+):
+    etag = etag_catalogo(db, "materias")
+    if no_modificado(request, etag):
+        return _respuesta_304(etag)
+
+    total, materias = tabla_materias(db, filtros, pagina, tamano, orden, desc)
+    response.headers["X-Total-Count"] = str(total)
+    response.headers.update(_cabeceras_cache(etag))
+    return materias
+
+
+@router.get("/tabla/count", response_model=schemas.MateriaTablaTotal)
+def contar_materias_tabla(
+    request: Request,
+    response: Response,
+    filtros: dict = Depends(filtros_tabla),
+    db: Session = Depends(get_db_lectura)
+):
+    etag = etag_catalogo(db, "materias")
+    if no_modificado(request, etag):
+        return _respuesta_304(etag)
+
+    response.headers.update(_cabeceras_cache(etag))
+    return {"total": contar_materias(db, filtros)}
 
 
 # ========================================================================
 #  Obtener las materias de un curso en particular
-#   Tiene un problema: sólo hace joinedload(models.Materia.nombre), con lo cual ejecuta
-#   una consulta a la base por cada materia.
+#   Perfil "por-curso": todas las materias comparten el curso, que viene en el mismo JOIN;
+#   los docentes en una sola consulta aparte (antes se cargaban de a uno por materia).
 # ========================================================================
 
 @router.get("/curso/{id_curso}", response_model=list[schemas.MateriaResponse])
-async def get_materias_curso(id_curso: int, db: Session = Depends(get_db)):
+async def get_materias_curso(id_curso: int, db: Session = Depends(get_db_lectura)):
     materias = (
-        db.query(models.Materia)
-        .options(joinedload(models.Materia.nombre))
+        con_perfil(db.query(models.Materia), "por-curso")
         .filter(models.Materia.id_curso == id_curso) # Filtramos por la columna del curso
         .all()
     )
@@ -86,7 +135,7 @@ materias_router = router
 # ========================================================================
 
 @router.get("/curso/{id_curso}/simple", response_model=list[schemas.MateriaSimpleResponse])
-async def get_materias_curso_simple(id_curso: int, db: Session = Depends(get_db)):
+async def get_materias_curso_simple(id_curso: int, db: Session = Depends(get_db_lectura)):
     # Seleccionamos COLUMNAS ESPECÍFICAS. Devuelve una lista de tuplas con nombre.
     materias = (
         db.query(
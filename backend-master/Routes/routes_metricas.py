@@ -0,0 +1,41 @@
+#   backend_AcademiA\backend-master\Routes\routes_metricas.py
+
+# GET /api/metricas: contadores del proceso (ver Core/metricas.py).
+# GET /api/metricas/consultas-lentas: consultas SQL lentas con su plan (ver Core/consultas_lentas.py).
+# Cada worker tiene los suyos: la respuesta es la del worker que atendió la petición.
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from auth import get_current_user
+from schemas import UserAuthData
+from Core.metricas import metricas
+from Core.compresion import resumen_compresion
+from Core.consultas_lentas import consultas_lentas
+from Core.admision import estado_admision
+from database import replicas
+
+router = APIRouter(tags=["Métricas"])
+
+
+@router.get("/metricas")
+def get_metricas(current_user: UserAuthData = Depends(get_current_user)):
+    if current_user.rol_sistema != 'ADMIN_SISTEMA':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos de administrador.")
+
+    return {
+        "compresion": resumen_compresion(),
+        "admision": estado_admision(),
+        "contadores": metricas.valores(),
+        "replicas": replicas.estado(),
+    }
+
+
+@router.get("/metricas/consultas-lentas")
+def get_consultas_lentas(
+    limite: int = Query(50, ge=1, le=500),
+    current_user: UserAuthData = Depends(get_current_user)
+):
+    if current_user.rol_sistema != 'ADMIN_SISTEMA':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos de administrador.")
+
+    return consultas_lentas.resumen(limite)
@@ -1,20 +1,28 @@
 # backend-master/Routes/routes_notas.py
 
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 
 # Importaciones CLAVE:
 # Importar el servicio (ajusta la ruta de importación si es necesario, 
 # asumiendo que está en la carpeta 'Services' al mismo nivel que 'Routes')
 from Services import nota_service 
+from Services.materia_service import con_perfil
+from Services.notas_faltantes_service import json_faltantes, resumen_faltantes, validar_filtros
 
 # Importamos todos los modelos y esquemas, por practicidad y limpieza
 import models, schemas, database
 
 # Uso la función de DB está de database.py en la raíz
-from database  import get_db
+from database  import get_db, get_db_lectura
+from auth import get_current_user
+
+logger = logging.getLogger(__name__)
 
 
 # Definición del Router
@@ -53,7 +61,7 @@ def obtener_acta_calificaciones(
     ciclo_id: int = Query(..., description="ID del ciclo lectivo"),
     curso_id: int = Query(..., description="ID del curso"),
     materia_id: int = Query(..., description="ID de la materia"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_lectura)
 ):
     try:
         # Obtener Columnas (Encabezados)
@@ -118,10 +126,39 @@ def obtener_acta_calificaciones(
         )
 
     except Exception as e:
-        print(f"Error: {str(e)}")
+        logger.exception("Error armando la planilla del acta: %s", e)
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
     
 
+# =====================================================
+#  GET - Notas faltantes de un ciclo (curso y período opcionales)
+#   Celdas (estudiante, materia, tipo de nota) sin cargar, calculadas en la base.
+#   Se envía en streaming: primero los totales y el resumen por curso/materia/tipo, después
+#   el detalle de cada celda faltante (?detalle=false para recibir sólo el resumen).
+# =====================================================
+
+@router.get("/faltantes", response_model=schemas.NotasFaltantesResponse)
+def obtener_notas_faltantes(
+    ciclo: int = Query(..., description="ID del ciclo lectivo"),
+    curso: Optional[int] = Query(None, description="ID del curso"),
+    periodo: Optional[int] = Query(None, description="Sólo cuentan las notas cargadas en este período"),
+    tipos: Optional[List[int]] = Query(None, description="Tipos de nota requeridos (por defecto, los finales)"),
+    detalle: bool = Query(True, description="Incluir el detalle de cada celda faltante"),
+    db: Session = Depends(get_db_lectura),
+    current_user: schemas.UserAuthData = Depends(get_current_user)
+):
+    if current_user.rol_sistema not in ['ADMIN_SISTEMA', 'DOCENTE_APP']:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos para ver las notas faltantes.")
+
+    validar_filtros(db, ciclo, periodo)
+    resumen = resumen_faltantes(db, ciclo, curso, periodo, tipos)
+
+    return StreamingResponse(
+        json_faltantes(resumen, ciclo, curso, periodo, tipos, con_detalle=detalle),
+        media_type="application/json"
+    )
+
+
 # =====================================================
 #  POST - UPSERT de nota (VERSIÓN SIMPLIFICADA)
 # =====================================================
@@ -131,9 +168,7 @@ def upsert_nota(
     db: Session = Depends(database.get_db)
 ):
     try:
-        print("="*60)
-        print("📥 PAYLOAD RECIBIDO:", payload.dict())
-        print("="*60)
+        logger.debug("📥 PAYLOAD RECIBIDO: %s", payload.dict())
         
         # 1. Buscar si la nota ya existe
         nota_db = db.query(models.Nota).filter(
@@ -144,7 +179,7 @@ def upsert_nota(
         
         if nota_db:
             # ===== ACTUALIZAR nota existente =====
-            print(f"📝 Actualizando nota existente ID: {nota_db.id_nota}")
+            logger.debug("📝 Actualizando nota existente ID: %s", nota_db.id_nota)
             nota_db.nota = payload.valor
             
             # Actualizar campos opcionales si vienen
@@ -156,7 +191,7 @@ def upsert_nota(
             db.commit()
             db.refresh(nota_db)
             
-            print(f"✅ Nota actualizada: {nota_db.nota}")
+            logger.debug("✅ Nota actualizada: %s", nota_db.nota)
             return {
                 "status": "success", 
                 "message": "Nota actualizada correctamente",
@@ -167,7 +202,7 @@ def upsert_nota(
             }
         else:
             # ===== CREAR nueva nota =====
-            print(f"✨ Creando nueva nota para alumno {payload.id_alumno}")
+            logger.debug("✨ Creando nueva nota para alumno %s", payload.id_alumno)
             
             nueva_nota = models.Nota(
                 id_entidad_estudiante=payload.id_alumno,
@@ -182,7 +217,7 @@ def upsert_nota(
             db.commit()
             db.refresh(nueva_nota)
             
-            print(f"✅ Nota creada con ID: {nueva_nota.id_nota}")
+            logger.debug("✅ Nota creada con ID: %s", nueva_nota.id_nota)
             return {
                 "status": "success", 
                 "message": "Nota creada correctamente",
@@ -194,18 +229,14 @@ def upsert_nota(
             
     except Exception as e:
         db.rollback()
-        print(f"❌ ERROR DE BASE DE DATOS:")
-        print(f"   Tipo: {type(e).__name__}")
-        print(f"   Detalle: {str(e)}")
+        logger.error("❌ ERROR DE BASE DE DATOS: %s: %s", type(e).__name__, e)
         raise HTTPException(
             status_code=500, 
             detail=f"Error de base de datos: {str(e)}"
         )
     except Exception as e:
         db.rollback()
-        print(f"❌ ERROR GENERAL:")
-        print(f"   Tipo: {type(e).__name__}")
-        print(f"   Detalle: {str(e)}")
+        logger.error("❌ ERROR GENERAL: %s: %s", type(e).__name__, e)
         raise HTTPException(
             status_code=500, 
             detail=f"Error al guardar nota: {str(e)}"
@@ -221,7 +252,7 @@ def obtener_informe_notas_estudiante(
     id_estudiante: int,
     ciclo_id: int = Query(..., description="ID del ciclo lectivo"),
     curso_id: int = Query(..., description="ID del curso"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_lectura)
 ):
     try:
         # 1. Obtener Columnas (Headers de tipos de nota)
@@ -250,8 +281,7 @@ def obtener_informe_notas_estudiante(
         # 3. Identificar las materias involucradas
         # Mapeamos materias por ID para evitar duplicados
         materias_query = (
-            db.query(models.Materia)
-            .options(joinedload(models.Materia.nombre)) # Trae el nombre junto con la materia
+            con_perfil(db.query(models.Materia), "simple") # Sólo id y nombre de la materia
             .filter(models.Materia.id_curso == curso_id)
             .all()
         )
@@ -0,0 +1,42 @@
+#   backend_AcademiA\backend-master\Routes\routes_perfiles.py
+
+# Perfiles de peticiones tomados por el perfilador (ver Core/perfilador.py). Sólo administradores.
+#   GET /api/perfiles                       lista de los perfiles guardados (más nuevos primero)
+#   GET /api/perfiles/{id}                  perfil en formato speedscope (abrir en speedscope.app)
+#   GET /api/perfiles/{id}?formato=colapsado  pilas colapsadas para flamegraph.pl / inferno
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from auth import get_current_user
+from schemas import UserAuthData
+from Core.perfilador import a_colapsado, leer_perfil, listar_perfiles
+
+router = APIRouter(prefix="/perfiles", tags=["Perfiles"])
+
+
+def _solo_admin(current_user: UserAuthData = Depends(get_current_user)) -> UserAuthData:
+    if current_user.rol_sistema != 'ADMIN_SISTEMA':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos de administrador.")
+    return current_user
+
+
+@router.get("")
+def get_perfiles(current_user: UserAuthData = Depends(_solo_admin)):
+    return listar_perfiles()
+
+
+@router.get("/{id_perfil}")
+def get_perfil(
+    id_perfil: str,
+    formato: Literal["speedscope", "colapsado"] = Query("speedscope"),
+    current_user: UserAuthData = Depends(_solo_admin)
+):
+    perfil = leer_perfil(id_perfil)
+    if perfil is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    if formato == "colapsado":
+        return PlainTextResponse(a_colapsado(perfil))
+    return perfil
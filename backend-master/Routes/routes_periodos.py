@@ -1,18 +1,11 @@
 # routes/routes_periodos.py
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from database import localSession
+from database import get_db
 from models import Periodo  
 
 router = APIRouter()
 
-def get_db():
-    db = localSession()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/", response_model=list[dict])
 async def get_periodos(db: Session = Depends(get_db)):
     periodos = db.query(Periodo).order_by(Periodo.id_periodo).all()
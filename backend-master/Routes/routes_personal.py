@@ -1,55 +1,60 @@
 # backend_AcademiA\backend-master\Routes\routes_personal
 
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from database import localSession
+from sqlalchemy.orm import Session, contains_eager
+from database import get_db
 from models import Entidad as EntidadORM, TipoEntidad as TipoEntidadORM    # Uso EntidadORM para entender que es del ORM
 
 from models_schemas.personal_schemas import PersonalResponse
+from Core.ndjson import modo_ndjson, respuesta_ndjson
+
+logger = logging.getLogger(__name__)
 
 # Definición del router
 router = APIRouter()
 
-# Dependencia de la base de datos
-def get_db():
-    db = localSession()
-    try:
-        yield db
-    finally:
-        db.close()
-
 
 #   # ==================== ENDPOINTS PERSONAL ====================
 #   Obtener todos
+def _consulta_personal(db: Session):
+    # Hacemos la consulta con el JOIN (el tipo se carga del mismo JOIN, no uno por fila)
+    return db.query(EntidadORM).join(TipoEntidadORM).options(
+        contains_eager(EntidadORM.tipo_entidad)
+    ).filter(
+        TipoEntidadORM.id_tipo_entidad.in_([3, 4, 5, 6, 8, 9]),
+        EntidadORM.deleted_at.is_(None) # Filtramos los no eliminados
+    )
+
+
+def _personal(p: EntidadORM) -> PersonalResponse:
+    return PersonalResponse(
+        apellido=p.apellido,   # Asignamos apellido
+        nombre=p.nombre,       # Asignamos nombre
+        dni=p.dni,
+        domicilio=p.domicilio,
+        localidad=p.localidad,
+        telefono=p.telefono,
+        cel=p.cel,
+        email=p.email,
+        # Accedemos al nombre del tipo a través de la relación
+        tipo_entidad=p.tipo_entidad.tipo_entidad
+    )
+
+
 @router.get("/personal", response_model=list[PersonalResponse])
-def get_personal(db: Session = Depends(get_db)):
+def get_personal(db: Session = Depends(get_db), ndjson: bool = Depends(modo_ndjson)):
+    # Con ?stream=1 o Accept: application/x-ndjson, se envía por bloques (ver Core/ndjson.py)
+    if ndjson:
+        return respuesta_ndjson(_consulta_personal, PersonalResponse, convertir=_personal)
     
-    # Información de conexión y tabla
-    print(f"Base de datos conectada → {db.bind.url}")
-    print(f"Tabla usada → {EntidadORM.__tablename__}")
-    print("-"*60)
+    # Información de conexión y tabla (LOG_LEVEL=DEBUG)
+    logger.debug("Base de datos conectada → %s | Tabla usada → %s", db.bind.url, EntidadORM.__tablename__)
 
-    # Hacemos la consulta con el JOIN
-    resultados = db.query(EntidadORM).join(TipoEntidadORM).filter(
-        TipoEntidadORM.id_tipo_entidad.in_([3, 4, 5, 6, 8, 9]),
-        EntidadORM.deleted_at.is_(None) # Filtramos los no eliminados
-    ).all()
+    resultados = _consulta_personal(db).all()
     
-    print(f"Datos leidos: {resultados}")
-    print(f"\n🔍 Total registros: {len(resultados)}")
+    logger.debug("🔍 Total registros: %s", len(resultados))
 
     # Mapeamos los datos al esquema
-    return [
-        PersonalResponse(
-            apellido=p.apellido,   # Asignamos apellido
-            nombre=p.nombre,       # Asignamos nombre
-            dni=p.dni,
-            domicilio=p.domicilio,
-            localidad=p.localidad,
-            telefono=p.telefono,
-            cel=p.cel,
-            email=p.email,
-            # Accedemos al nombre del tipo a través de la relación
-            tipo_entidad=p.tipo_entidad.tipo_entidad
-        ) for p in resultados
-    ]
\ No newline at end of file
+    return [_personal(p) for p in resultados]
\ No newline at end of file
@@ -0,0 +1,57 @@
+#   backend_AcademiA\backend-master\Routes\routes_salud.py
+
+# Chequeos de salud para el balanceador / orquestador (sin autenticación):
+#   GET /api/salud/vivo   liveness: el proceso responde (no toca la base).
+#   GET /api/salud/listo  readiness: el worker terminó de calentar y la base responde.
+#                         Si no, 503 (y el calentamiento se reintenta en segundo plano).
+# Sólo devuelven el estado: el detalle de los errores (host, usuario de la base...) va al log.
+
+import logging
+import threading
+
+from fastapi import APIRouter, status
+from sqlalchemy import text
+
+from database import engine
+from Core.arranque import estado, reintentar_calentamiento
+from Core.respuestas import RespuestaJSON
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/salud", tags=["Salud"])
+
+# Un solo chequeo de la base a la vez: con la base caída los demás responden con el último
+# resultado en lugar de acumularse esperando el timeout de conexión
+_chequeando = threading.Lock()
+_base_ok = False
+
+
+def _base_responde() -> bool:
+    global _base_ok
+    if not _chequeando.acquire(blocking=False):
+        return _base_ok
+    try:
+        with engine.connect() as conexion:
+            conexion.execute(text("SELECT 1"))
+        _base_ok = True
+    except Exception as e:
+        _base_ok = False
+        logger.warning("Chequeo de salud: la base no responde: %s", e)
+    finally:
+        _chequeando.release()
+    return _base_ok
+
+
+@router.get("/vivo")
+def salud_vivo():
+    return {"estado": "ok", "pid": estado["pid"]}
+
+
+@router.get("/listo")
+def salud_listo():
+    if not estado["listo"]:
+        reintentar_calentamiento()
+        return RespuestaJSON(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"estado": "calentando"})
+    if not _base_responde():
+        return RespuestaJSON(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"estado": "sin base de datos"})
+    return {"estado": "listo"}
@@ -3,7 +3,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
-from database import localSession
+from database import get_db
 from models import ( 
     Entidad as EntidadORM, 
 )
@@ -14,13 +14,6 @@ from schemas import (
 
 from auth import get_current_user # Para obtener el usuario actual
 
-def get_db():
-    db = localSession()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Definición del router
 router = APIRouter()
 
@@ -0,0 +1,164 @@
+# backend-master/Services/alertas_service.py
+
+# Totales acumulados de inasistencias y alertas por límite.
+# El escaneo (scan_inasistencias.py) mantiene t_inasistencia_acumulada de forma incremental:
+#   1. Busca qué (estudiante, curso, año) cambiaron desde la última corrida: inasistencias con
+#      updated_at posterior a la marca, más los acumulados que la carga marcó para recalcular.
+#   2. Recalcula sólo esos totales, sumando el resumen mensual (t_inasistencia_resumen).
+#   3. Actualiza/inserta los acumulados en lote y marca alertada_en a quienes cruzan el límite.
+
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import case, extract, func, insert, update
+from sqlalchemy.orm import Session
+
+from models import Entidad, Inasistencia, InasistenciaAcumulada, InasistenciaResumen
+
+
+# Límite de inasistencias (suma de valores) a partir del cual se genera la alerta
+LIMITE_INASISTENCIAS = float(os.getenv("INASISTENCIAS_LIMITE", "25"))
+
+# Cantidad de estudiantes que se recalculan por consulta
+TAMANO_BLOQUE = 500
+
+Clave = Tuple[int, int, int]  # (id_entidad, id_curso, anio)
+
+
+def _claves_modificadas(db: Session, desde: Optional[datetime]) -> Set[Clave]:
+    anio = extract("year", Inasistencia.fecha_inasistencia)
+    consulta = db.query(Inasistencia.id_entidad, Inasistencia.id_curso, anio).filter(
+        Inasistencia.id_entidad.isnot(None),
+        Inasistencia.id_curso.isnot(None),
+        Inasistencia.fecha_inasistencia.isnot(None)
+    )
+    if desde is not None:
+        consulta = consulta.filter(Inasistencia.updated_at >= desde)
+    claves = {(e, c, int(a)) for e, c, a in consulta.distinct()}
+
+    marcadas = db.query(
+        InasistenciaAcumulada.id_entidad, InasistenciaAcumulada.id_curso, InasistenciaAcumulada.anio
+    ).filter(InasistenciaAcumulada.recalcular.is_(True))
+    claves.update((e, c, a) for e, c, a in marcadas)
+    return claves
+
+
+def _por_anio(claves: Set[Clave]) -> Dict[int, List[int]]:
+    # Estudiantes de las claves, agrupados por año (para consultar por bloques de estudiantes)
+    por_anio: Dict[int, Set[int]] = defaultdict(set)
+    for id_entidad, _, anio in claves:
+        por_anio[anio].add(id_entidad)
+    return {anio: sorted(entidades) for anio, entidades in por_anio.items()}
+
+
+def _recalcular(db: Session, claves: Set[Clave]) -> Dict[Clave, Tuple[float, float]]:
+    # Los totales salen del resumen mensual (a lo sumo 24 filas por estudiante, curso y año),
+    # agrupando por año y por bloques de estudiantes
+    totales = {clave: (0.0, 0.0) for clave in claves}
+    for anio, entidades in _por_anio(claves).items():
+        for i in range(0, len(entidades), TAMANO_BLOQUE):
+            filas = (
+                db.query(
+                    InasistenciaResumen.id_entidad,
+                    InasistenciaResumen.id_curso,
+                    func.coalesce(func.sum(InasistenciaResumen.total), 0),
+                    func.coalesce(func.sum(case((InasistenciaResumen.justificada.is_(True), InasistenciaResumen.total), else_=0)), 0),
+                )
+                .filter(
+                    InasistenciaResumen.id_entidad.in_(entidades[i:i + TAMANO_BLOQUE]),
+                    InasistenciaResumen.anio == anio
+                )
+                .group_by(InasistenciaResumen.id_entidad, InasistenciaResumen.id_curso)
+            )
+            for id_entidad, id_curso, total, justificadas in filas:
+                if (id_entidad, id_curso, anio) in totales:
+                    totales[(id_entidad, id_curso, anio)] = (float(total), float(justificadas))
+    return totales
+
+
+def _existentes(db: Session, claves: Set[Clave]) -> Dict[Clave, Optional[datetime]]:
+    # Acumulados ya guardados de las claves (y su alertada_en). Sólo los de los estudiantes
+    # tocados, por la clave primaria (id_entidad, id_curso, anio): no todo el año
+    existentes = {}
+    for anio, entidades in _por_anio(claves).items():
+        for i in range(0, len(entidades), TAMANO_BLOQUE):
+            filas = db.query(
+                InasistenciaAcumulada.id_entidad, InasistenciaAcumulada.id_curso,
+                InasistenciaAcumulada.anio, InasistenciaAcumulada.alertada_en
+            ).filter(
+                InasistenciaAcumulada.id_entidad.in_(entidades[i:i + TAMANO_BLOQUE]),
+                InasistenciaAcumulada.anio == anio
+            )
+            for id_entidad, id_curso, anio_fila, alertada_en in filas:
+                if (id_entidad, id_curso, anio_fila) in claves:
+                    existentes[(id_entidad, id_curso, anio_fila)] = alertada_en
+    return existentes
+
+
+def escanear(db: Session, desde: Optional[datetime] = None) -> dict:
+    """Actualiza los acumulados de lo modificado desde `desde` (None = todo) y devuelve un resumen.
+
+    No hace commit: lo decide quien llama (ver scan_inasistencias.py).
+    """
+    ahora = datetime.now()
+    claves = _claves_modificadas(db, desde)
+    totales = _recalcular(db, claves)
+
+    existentes = _existentes(db, claves)
+
+    actualizar, insertar, nuevas_alertas = [], [], []
+    for clave, (total, justificadas) in totales.items():
+        alertada_en = existentes.get(clave)
+        if total >= LIMITE_INASISTENCIAS:
+            if alertada_en is None:
+                alertada_en = ahora
+                nuevas_alertas.append({"id_entidad": clave[0], "id_curso": clave[1], "anio": clave[2], "total": total})
+        else:
+            # Si se corrigieron inasistencias y quedó por debajo, la alerta se levanta
+            alertada_en = None
+        datos = {
+            "id_entidad": clave[0], "id_curso": clave[1], "anio": clave[2],
+            "total": total, "total_justificadas": justificadas,
+            "recalcular": False, "alertada_en": alertada_en,
+        }
+        (actualizar if clave in existentes else insertar).append(datos)
+
+    if actualizar:
+        db.execute(update(InasistenciaAcumulada), actualizar)
+    if insertar:
+        db.execute(insert(InasistenciaAcumulada), insertar)
+
+    return {
+        "recalculados": len(totales),
+        "insertados": len(insertar),
+        "actualizados": len(actualizar),
+        "nuevas_alertas": nuevas_alertas,
+    }
+
+
+def alertas_curso(db: Session, id_curso: int, anio: int) -> List[dict]:
+    """Estudiantes del curso que superaron el límite en el año, de mayor a menor total."""
+    filas = (
+        db.query(InasistenciaAcumulada, Entidad.apellido, Entidad.nombre)
+        .join(Entidad, Entidad.id_entidad == InasistenciaAcumulada.id_entidad)
+        .filter(
+            InasistenciaAcumulada.id_curso == id_curso,
+            InasistenciaAcumulada.anio == anio,
+            InasistenciaAcumulada.alertada_en.isnot(None)
+        )
+        .order_by(InasistenciaAcumulada.total.desc(), Entidad.apellido, Entidad.nombre)
+        .all()
+    )
+    return [
+        {
+            "id_entidad": a.id_entidad,
+            "name": f"{apellido}, {nombre}",
+            "totalInasistencia": a.total,
+            "totalInasistenciaJustif": a.total_justificadas,
+            "limite": LIMITE_INASISTENCIAS,
+            "alertada_en": a.alertada_en,
+        }
+        for a, apellido, nombre in filas
+    ]
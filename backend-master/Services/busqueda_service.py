@@ -0,0 +1,379 @@
+# backend-master/Services/busqueda_service.py
+
+# Índice en memoria para buscar estudiantes por apellido, nombre, DNI, legajo o email.
+#   - Normaliza acentos y mayúsculas ("Muñoz" == "munoz").
+#   - Búsqueda por prefijo sobre una lista ordenada de tokens (bisect).
+#   - Búsqueda aproximada por trigramas cuando el prefijo no alcanza.
+# El índice vive en cada proceso (worker). Se carga de la BD la primera vez que se usa,
+# lo actualizan los endpoints de alta/edición/baja y se refresca de forma incremental
+# (por updated_at) para tomar los cambios hechos desde otros workers.
+# Las bajas físicas (DELETE) no dejan updated_at ni deleted_at: cada RECONCILIACION_SEGUNDOS
+# se leen los ids vigentes (sólo la columna id) y se quitan del índice los que ya no están.
+
+import os
+import math
+import heapq
+import time
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from itertools import islice
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import Entidad as EntidadORM, TipoEntidad
+
+
+# Cada cuántos segundos se buscan cambios hechos por otros procesos
+REFRESCO_SEGUNDOS = int(os.getenv("BUSQUEDA_REFRESCO_SEGUNDOS", "30"))
+
+# Cada cuántos segundos se buscan estudiantes borrados desde otros procesos
+RECONCILIACION_SEGUNDOS = int(os.getenv("BUSQUEDA_RECONCILIACION_SEGUNDOS", "120"))
+
+# Peso de cada campo en el ranking (el apellido es lo que más se busca)
+PESOS_CAMPOS = {
+    "apellido": 5.0,
+    "nombre": 4.0,
+    "dni": 4.0,
+    "legajo": 3.0,
+    "email": 1.0,
+}
+
+# Similitud mínima (trigramas compartidos / trigramas del término) para la búsqueda aproximada
+SIMILITUD_MINIMA = 0.35
+
+# Candidatos de la búsqueda aproximada que se verifican contra los trigramas más comunes
+MAX_CANDIDATOS_APROXIMADA = 500
+
+# Límite de tokens recorridos por un prefijo muy corto (ej: "a")
+MAX_TOKENS_PREFIJO = 5000
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Pasa a minúsculas, quita acentos y reemplaza lo que no sea letra o número por espacios."""
+    if not texto:
+        return ""
+    sin_acentos = unicodedata.normalize("NFKD", str(texto))
+    sin_acentos = "".join(c for c in sin_acentos if not unicodedata.combining(c))
+    return "".join(c if c.isalnum() else " " for c in sin_acentos.lower()).strip()
+
+
+def trigramas(token: str) -> Set[str]:
+    # Se agregan bordes para que el inicio y el final de la palabra también cuenten
+    relleno = f"  {token} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+@dataclass
+class DocumentoEstudiante:
+    id_entidad: int
+    nombre: str
+    apellido: str
+    dni: Optional[int]
+    legajo: Optional[str]
+    email: Optional[str]
+    # Tokens indexados: (token, peso del campo)
+    tokens: List[Tuple[str, float]] = field(default_factory=list)
+    # Orden alfabético para desempatar resultados con el mismo puntaje
+    clave: Tuple[str, str] = ("", "")
+
+
+class IndiceEstudiantes:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs: Dict[int, DocumentoEstudiante] = {}
+        # Lista ordenada de (token, id_entidad, peso) para búsquedas por prefijo
+        self._tokens: List[Tuple[str, int, float]] = []
+        # trigrama -> ids de entidad que lo contienen
+        self._trigramas: Dict[str, Set[int]] = defaultdict(set)
+        self._cargado = False
+        self._ultimo_refresco = 0.0
+        self._ultima_reconciliacion = 0.0
+        self._marca_updated_at: Optional[datetime] = None
+
+    # ------------------------------------------------------------------
+    # Carga y mantenimiento
+    # ------------------------------------------------------------------
+
+    def _consulta_base(self, db: Session):
+        return db.query(
+            EntidadORM.id_entidad,
+            EntidadORM.nombre,
+            EntidadORM.apellido,
+            EntidadORM.dni,
+            EntidadORM.legajo,
+            EntidadORM.email,
+            EntidadORM.updated_at,
+            EntidadORM.deleted_at,
+        ).filter(
+            EntidadORM.tipo_entidad.has(TipoEntidad.tipo_entidad == "ESTUDIANTE")
+        )
+
+    def cargar(self, db: Session):
+        """Reconstruye el índice completo desde la base de datos."""
+        filas = self._consulta_base(db).filter(EntidadORM.deleted_at.is_(None)).all()
+        with self._lock:
+            self._docs.clear()
+            self._tokens.clear()
+            self._trigramas.clear()
+            for f in filas:
+                self._tokens.extend(self._agregar(f))
+            # Una sola ordenación al final es mucho más rápida que insertar uno a uno
+            self._tokens.sort()
+            self._marca_updated_at = max((f.updated_at for f in filas if f.updated_at), default=None)
+            self._cargado = True
+            self._ultimo_refresco = self._ultima_reconciliacion = time.monotonic()
+
+    def asegurar_actualizado(self, db: Session):
+        """Carga el índice si hace falta, o trae los cambios desde el último refresco."""
+        if not self._cargado:
+            self.cargar(db)
+            return
+        if time.monotonic() - self._ultimo_refresco < REFRESCO_SEGUNDOS:
+            return
+
+        consulta = self._consulta_base(db)
+        if self._marca_updated_at is not None:
+            consulta = consulta.filter(EntidadORM.updated_at >= self._marca_updated_at)
+        cambios = consulta.all()
+
+        with self._lock:
+            for f in cambios:
+                if f.deleted_at is not None:
+                    self.quitar(f.id_entidad)
+                else:
+                    self.actualizar(f)
+                if f.updated_at and (self._marca_updated_at is None or f.updated_at > self._marca_updated_at):
+                    self._marca_updated_at = f.updated_at
+            self._ultimo_refresco = time.monotonic()
+
+        if time.monotonic() - self._ultima_reconciliacion >= RECONCILIACION_SEGUNDOS:
+            self._reconciliar(db)
+
+    def _reconciliar(self, db: Session):
+        # Quita del índice los estudiantes que ya no existen (borrados desde otro worker). Sólo
+        # se miran los que ya estaban antes de la consulta: un alta de este worker mientras tanto
+        # no se pierde
+        with self._lock:
+            indexados = set(self._docs)
+        vigentes = {
+            id_entidad for (id_entidad,) in db.query(EntidadORM.id_entidad).filter(
+                EntidadORM.tipo_entidad.has(TipoEntidad.tipo_entidad == "ESTUDIANTE"),
+                EntidadORM.deleted_at.is_(None)
+            )
+        }
+        with self._lock:
+            for id_entidad in indexados - vigentes:
+                self._quitar(id_entidad)
+            self._ultima_reconciliacion = time.monotonic()
+
+    def forzar_refresco(self):
+        """Hace que la próxima búsqueda traiga los cambios (ej: luego de una importación masiva)."""
+        self._ultimo_refresco = 0.0
+        self._ultima_reconciliacion = 0.0
+
+    def actualizar(self, entidad):
+        """Agrega o reemplaza una entidad (objeto ORM o fila con los mismos atributos).
+
+        Un objeto ORM que no es ESTUDIANTE (p. ej. un docente editado con PUT /api/estudiantes/{id})
+        no se indexa: se quita si estaba.
+        """
+        if not self._cargado:
+            # Si nunca se cargó, la primera búsqueda leerá todo de la BD
+            return
+        tipo = getattr(entidad, "tipo_entidad", None)
+        if tipo is not None and tipo.tipo_entidad != "ESTUDIANTE":
+            self.quitar(entidad.id_entidad)
+            return
+        with self._lock:
+            self._quitar(entidad.id_entidad)
+            for token, id_entidad, peso in self._agregar(entidad):
+                insort(self._tokens, (token, id_entidad, peso))
+
+    def quitar(self, id_entidad: int):
+        if not self._cargado:
+            return
+        with self._lock:
+            self._quitar(id_entidad)
+
+    def _agregar(self, entidad) -> List[Tuple[str, int, float]]:
+        doc = DocumentoEstudiante(
+            id_entidad=entidad.id_entidad,
+            nombre=entidad.nombre or "",
+            apellido=entidad.apellido or "",
+            dni=entidad.dni,
+            legajo=getattr(entidad, "legajo", None),
+            email=entidad.email,
+        )
+        doc.clave = (normalizar(doc.apellido), normalizar(doc.nombre))
+        vistos = set()
+        for campo, valor in (
+            ("apellido", doc.apellido),
+            ("nombre", doc.nombre),
+            ("dni", doc.dni),
+            ("legajo", doc.legajo),
+            ("email", doc.email),
+        ):
+            for token in normalizar(valor).split():
+                if token in vistos:
+                    continue
+                vistos.add(token)
+                doc.tokens.append((token, PESOS_CAMPOS[campo]))
+
+        self._docs[doc.id_entidad] = doc
+        nuevos = []
+        for token, peso in doc.tokens:
+            nuevos.append((token, doc.id_entidad, peso))
+            for tri in trigramas(token):
+                self._trigramas[tri].add(doc.id_entidad)
+        return nuevos
+
+    def _quitar(self, id_entidad: int):
+        doc = self._docs.pop(id_entidad, None)
+        if doc is None:
+            return
+        for token, peso in doc.tokens:
+            pos = bisect_left(self._tokens, (token, id_entidad, peso))
+            if pos < len(self._tokens) and self._tokens[pos] == (token, id_entidad, peso):
+                del self._tokens[pos]
+            for tri in trigramas(token):
+                ids = self._trigramas.get(tri)
+                if ids is not None:
+                    ids.discard(id_entidad)
+                    if not ids:
+                        del self._trigramas[tri]
+
+    # ------------------------------------------------------------------
+    # Búsqueda
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _puntaje(termino: str, token: str, peso: float) -> float:
+        # Coincidencia exacta vale el doble; un prefijo vale según cuánto del token cubre
+        return peso * (2.0 if token == termino else len(termino) / len(token))
+
+    def _rango(self, termino: str) -> Tuple[int, int]:
+        # Posiciones de la lista ordenada cuyos tokens empiezan con el término
+        inicio = bisect_left(self._tokens, (termino,))
+        fin = bisect_left(self._tokens, (termino + "\uffff",))
+        return inicio, min(fin, inicio + MAX_TOKENS_PREFIJO)
+
+    def _por_prefijo(self, terminos: List[str]) -> Dict[int, float]:
+        # Se recorre el rango del término más selectivo y los demás términos se verifican sólo
+        # sobre esos candidatos (AND): recorriendo su rango si es más corto que los tokens de los
+        # candidatos, o si no los tokens de cada candidato.
+        rangos = sorted(((self._rango(t), t) for t in terminos), key=lambda r: r[0][1] - r[0][0])
+        (inicio, fin), primero = rangos[0]
+
+        puntajes: Dict[int, float] = {}
+        largo = len(primero)
+        for token, id_entidad, peso in self._tokens[inicio:fin]:
+            puntaje = peso * 2.0 if token == primero else peso * largo / len(token)
+            if puntaje > puntajes.get(id_entidad, 0.0):
+                puntajes[id_entidad] = puntaje
+
+        tokens_por_doc = len(self._tokens) / max(len(self._docs), 1)
+        for (inicio, fin), termino in rangos[1:]:
+            filtrados: Dict[int, float] = {}
+            if fin - inicio < MAX_TOKENS_PREFIJO and fin - inicio < len(puntajes) * tokens_por_doc:
+                mejores: Dict[int, float] = {}
+                for token, id_entidad, peso in self._tokens[inicio:fin]:
+                    if id_entidad in puntajes:
+                        puntaje = self._puntaje(termino, token, peso)
+                        if puntaje > mejores.get(id_entidad, 0.0):
+                            mejores[id_entidad] = puntaje
+                puntajes = {i: puntajes[i] + p for i, p in mejores.items()}
+                continue
+            for id_entidad, acumulado in puntajes.items():
+                mejor = max(
+                    (self._puntaje(termino, token, peso)
+                     for token, peso in self._docs[id_entidad].tokens if token.startswith(termino)),
+                    default=0.0,
+                )
+                if mejor:
+                    filtrados[id_entidad] = acumulado + mejor
+            puntajes = filtrados
+        return puntajes
+
+    def _aproximada(self, termino: str, candidatos: Optional[Set[int]] = None) -> Dict[int, float]:
+        tris = trigramas(termino)
+        minimo = max(1, math.ceil(SIMILITUD_MINIMA * len(tris)))
+        listas = sorted((self._trigramas.get(tri, set()) for tri in tris), key=len)
+        if candidatos is None:
+            # Filtro por prefijo: quien comparta "minimo" trigramas aparece sí o sí en alguna
+            # de las (n - minimo + 1) listas más cortas. Ahí se cuentan las coincidencias de una
+            # sola pasada y sólo los MAX_CANDIDATOS_APROXIMADA con más coincidencias se verifican
+            # contra las listas largas (los trigramas comunes, p. ej. de "gmail").
+            corte = len(listas) - minimo + 1
+            conteo = Counter()
+            for ids in listas[:corte]:
+                conteo.update(ids)
+            if len(conteo) > MAX_CANDIDATOS_APROXIMADA:
+                conteo = self._mas_coincidencias(conteo)
+            largas = listas[corte:]
+        else:
+            conteo = dict.fromkeys(candidatos, 0)
+            largas = listas
+        for ids in largas:
+            for id_entidad in ids.intersection(conteo):
+                conteo[id_entidad] += 1
+        total = len(tris)
+        return {i: c / total for i, c in conteo.items() if c >= minimo}
+
+    @staticmethod
+    def _mas_coincidencias(conteo: Counter) -> Dict[int, int]:
+        # Los MAX_CANDIDATOS_APROXIMADA que más coinciden, cortando por cantidad de coincidencias
+        # (sin ordenar todo). Entre los empatados en el corte quedan los primeros.
+        por_cantidad = Counter(conteo.values())
+        acumulado, umbral = 0, 1
+        for cantidad in sorted(por_cantidad, reverse=True):
+            if acumulado + por_cantidad[cantidad] >= MAX_CANDIDATOS_APROXIMADA:
+                umbral = cantidad
+                break
+            acumulado += por_cantidad[cantidad]
+        elegidos = {i: c for i, c in conteo.items() if c > umbral}
+        empatados = (i for i, c in conteo.items() if c == umbral)
+        elegidos.update((i, umbral) for i in islice(empatados, MAX_CANDIDATOS_APROXIMADA - len(elegidos)))
+        return elegidos
+
+    def buscar(self, q: str, limite: int = 20) -> List[Tuple[DocumentoEstudiante, float]]:
+        terminos = normalizar(q).split()
+        if not terminos:
+            return []
+
+        with self._lock:
+            # 1. Prefijo: todos los términos deben coincidir (AND)
+            puntajes = self._por_prefijo(terminos)
+            resultados = self._mejores(puntajes.items(), limite)
+
+            # 2. Aproximada por trigramas, sólo si el prefijo no llenó el cupo.
+            #    Sus resultados van siempre después de las coincidencias por prefijo.
+            #    Los números (DNI, legajo) y los términos muy cortos no se buscan así.
+            aproximables = [t for t in terminos if len(t) >= 3 and not t.isdigit()]
+            if len(resultados) < limite and aproximables:
+                # El término más largo es el más selectivo; los demás sólo se verifican
+                # sobre los candidatos que ya coincidieron.
+                aproximables.sort(key=len, reverse=True)
+                aproximados = self._aproximada(aproximables[0])
+                for termino in aproximables[1:]:
+                    encontrados = self._aproximada(termino, set(aproximados))
+                    aproximados = {i: p + encontrados[i] for i, p in aproximados.items() if i in encontrados}
+                extra = [(i, p / len(aproximables)) for i, p in aproximados.items() if i not in puntajes]
+                resultados += self._mejores(extra, limite - len(resultados))
+
+            return [(self._docs[i], round(p, 3)) for i, p in resultados]
+
+    def _mejores(self, puntajes, limite: int) -> List[Tuple[int, float]]:
+        # Mayor puntaje primero; a igual puntaje, orden alfabético por apellido y nombre
+        docs = self._docs
+        mejores = heapq.nsmallest(limite, ((-p, docs[i].clave, i) for i, p in puntajes))
+        return [(i, -p) for p, _, i in mejores]
+
+
+# Instancia única por proceso
+indice_estudiantes = IndiceEstudiantes()
@@ -0,0 +1,133 @@
+# backend-master/Services/catalogo_service.py
+
+# Versiones de catálogos, para cachear respuestas con ETag.
+# Un catálogo es un grupo de tablas que se devuelven juntas (p. ej. "materias": materia, nombre,
+# curso, ciclo, plan y docentes). Su versión combina:
+#   - el contador de t_catalogo_version, que se incrementa en la misma transacción cada vez que
+#     la app modifica alguna de esas tablas (listener after_flush de la sesión), y
+#   - cantidad de filas y último updated_at de las tablas que tienen esa marca, para que también
+#     se noten los cambios hechos directamente en la base.
+# Todo se lee con una sola consulta, mucho más barata que armar la respuesta.
+# t_catalogo_version la crea /api/migrate o, si el usuario de la base puede, el arranque del
+# worker (crear_versiones). Mientras no exista, el contador no se usa: las escrituras siguen
+# (el UPDATE va en un SAVEPOINT y su error se ignora) y la versión sale sólo de las marcas.
+
+import hashlib
+import logging
+import time
+from itertools import chain
+from typing import Dict, Tuple
+
+from fastapi import Request
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from models import CatalogoVersion, CicloLectivo, Curso, Entidad, Materia, NombreMateria, Plan
+
+logger = logging.getLogger(__name__)
+
+
+# Tipo de entidad de los docentes (los únicos que forman parte del catálogo de materias)
+ID_TIPO_DOCENTE = 2
+
+# Modelos que, al modificarse desde la app, cambian la versión del catálogo
+MODELOS_CATALOGO: Dict[str, Tuple[type, ...]] = {
+    "materias": (Materia, NombreMateria, Curso, CicloLectivo, Plan, Entidad),
+}
+
+# Modelos con updated_at cuya cantidad y última modificación entran en la versión
+MARCAS_CATALOGO: Dict[str, Tuple[type, ...]] = {
+    "materias": (Materia, NombreMateria, Curso),
+}
+
+# Si t_catalogo_version no se pudo usar, no se vuelve a intentar hasta este momento (monotonic)
+SIN_CONTADOR_REINTENTO_S = 60
+_sin_contador_hasta = 0.0
+
+
+def _contador_disponible() -> bool:
+    return time.monotonic() >= _sin_contador_hasta
+
+
+def _contador_fallo(e: Exception):
+    global _sin_contador_hasta
+    if _contador_disponible():
+        logger.warning("t_catalogo_version no disponible (¿falta /api/migrate?): %s", getattr(e, "orig", e))
+    _sin_contador_hasta = time.monotonic() + SIN_CONTADOR_REINTENTO_S
+
+
+def crear_versiones(conexion) -> None:
+    """Crea t_catalogo_version (si no existe) y la fila de cada catálogo (el listener sólo
+    incrementa filas existentes). No hace commit."""
+    global _sin_contador_hasta
+    CatalogoVersion.__table__.create(conexion, checkfirst=True)
+    existentes = set(conexion.execute(select(CatalogoVersion.catalogo)).scalars())
+    faltantes = [{"catalogo": c, "version": 0} for c in MODELOS_CATALOGO if c not in existentes]
+    if faltantes:
+        conexion.execute(insert(CatalogoVersion), faltantes)
+    _sin_contador_hasta = 0.0
+
+
+def _catalogos_de(obj) -> set:
+    if isinstance(obj, Entidad) and obj.id_tipo_entidad != ID_TIPO_DOCENTE:
+        return set()
+    return {nombre for nombre, modelos in MODELOS_CATALOGO.items() if isinstance(obj, modelos)}
+
+
+@event.listens_for(Session, "after_flush")
+def _incrementar_versiones(session, contexto):
+    catalogos = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        catalogos |= _catalogos_de(obj)
+    if not catalogos or not _contador_disponible():
+        return
+    conexion = session.connection()
+    try:
+        # SAVEPOINT: si la tabla no existe, sólo se deshace el incremento y la escritura sigue
+        with conexion.begin_nested():
+            # En orden, para que dos transacciones bloqueen las filas siempre en la misma secuencia
+            for catalogo in sorted(catalogos):
+                conexion.execute(
+                    update(CatalogoVersion)
+                    .where(CatalogoVersion.catalogo == catalogo)
+                    .values(version=CatalogoVersion.version + 1)
+                )
+    except DBAPIError as e:
+        _contador_fallo(e)
+
+
+def version_catalogo(db: Session, catalogo: str) -> str:
+    columnas = []
+    for modelo in MARCAS_CATALOGO.get(catalogo, ()):
+        columnas.append(select(func.count()).select_from(modelo).scalar_subquery())
+        columnas.append(select(func.max(modelo.updated_at)).scalar_subquery())
+    contador = select(CatalogoVersion.version).where(CatalogoVersion.catalogo == catalogo).scalar_subquery()
+
+    fila = None
+    if _contador_disponible():
+        try:
+            fila = db.execute(select(contador, *columnas)).one()
+        except DBAPIError as e:
+            # Es una lectura (la primera de la petición): se descarta la transacción y se sigue
+            db.rollback()
+            _contador_fallo(e)
+    if fila is None:
+        fila = (None, *db.execute(select(*columnas)).one())
+    return hashlib.sha1(repr(tuple(fila)).encode()).hexdigest()[:16]
+
+
+def etag_catalogo(db: Session, catalogo: str) -> str:
+    # ETag débil: la misma versión puede serializarse distinto (p. ej. comprimida)
+    return f'W/"{catalogo}-{version_catalogo(db, catalogo)}"'
+
+
+def no_modificado(request: Request, etag: str) -> bool:
+    """True si el cliente ya tiene la versión `etag` (If-None-Match)."""
+    cabecera = request.headers.get("if-none-match")
+    if not cabecera:
+        return False
+    if cabecera.strip() == "*":
+        return True
+    valor = etag.removeprefix("W/")
+    return any(e.strip().removeprefix("W/") == valor for e in cabecera.split(","))
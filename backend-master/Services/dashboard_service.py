@@ -0,0 +1,204 @@
+# backend-master/Services/dashboard_service.py
+
+# Arma el tablero (dashboard) del estudiante en una sola respuesta:
+# ciclos, materias del ciclo, matriz de notas y totales de inasistencias.
+# Reemplaza las 15+ llamadas que hacía el frontend (ciclos, materias, informe,
+# notas por materia, inasistencias) por un número fijo de consultas:
+#   - Ronda 1 (en paralelo): existencia del estudiante y sus ciclos lectivos.
+#   - Ronda 2 (en paralelo): materias, notas, tipos de nota y totales de inasistencias.
+# Cada consulta de una ronda corre en su propio hilo y con su propia sesión, porque
+# el driver (pymysql) es sincrónico y una sesión no se puede compartir entre hilos.
+
+import asyncio
+from datetime import date
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+import models
+from database import sesion_lectura
+from Services.inasistencia_service import totales_anio
+
+
+# ID del tipo de nota "Definitiva" (igual que en los informes de notas)
+ID_TIPO_NOTA_DEFINITIVA = 7
+
+
+def _en_sesion(consulta, *args):
+    # Cada consulta abre y cierra su propia sesión (se ejecuta en un hilo del pool).
+    # Es de sólo lectura: puede leer de una réplica (ver Core/replicas.py)
+    db = sesion_lectura()
+    try:
+        return consulta(db, *args)
+    finally:
+        db.close()
+
+
+async def _en_paralelo(*consultas):
+    return await asyncio.gather(*(run_in_threadpool(_en_sesion, c, *args) for c, *args in consultas))
+
+
+# -------------------------------------------------------------------
+# Consultas
+# -------------------------------------------------------------------
+
+def _existe_estudiante(db: Session, id_entidad: int) -> bool:
+    return db.query(models.Entidad.id_entidad).filter(
+        models.Entidad.id_entidad == id_entidad,
+        models.Entidad.deleted_at.is_(None)
+    ).first() is not None
+
+
+def _ciclos(db: Session, id_entidad: int):
+    # Ciclos lectivos en los que el estudiante tiene inscripciones
+    return (
+        db.query(
+            models.CicloLectivo.id_ciclo_lectivo,
+            models.CicloLectivo.nombre_ciclo_lectivo,
+            models.CicloLectivo.fecha_inicio_cl,
+        )
+        .join(models.Inscripcion, models.Inscripcion.id_ciclo_lectivo == models.CicloLectivo.id_ciclo_lectivo)
+        .filter(
+            models.Inscripcion.id_entidad == id_entidad,
+            models.Inscripcion.deleted_at.is_(None)
+        )
+        .group_by(
+            models.CicloLectivo.id_ciclo_lectivo,
+            models.CicloLectivo.nombre_ciclo_lectivo,
+            models.CicloLectivo.fecha_inicio_cl,
+        )
+        .order_by(models.CicloLectivo.id_ciclo_lectivo.desc())
+        .all()
+    )
+
+
+def _materias(db: Session, id_entidad: int, id_ciclo: int):
+    # Materias en las que está inscripto en el ciclo, con curso y docente
+    return (
+        db.query(
+            models.Materia.id_materia,
+            models.NombreMateria.nombre_materia,
+            models.Curso.id_curso,
+            models.Curso.curso,
+            models.Entidad.apellido.label("docente_apellido"),
+            models.Entidad.nombre.label("docente_nombre"),
+        )
+        .join(models.Inscripcion, models.Inscripcion.id_materia == models.Materia.id_materia)
+        .join(models.NombreMateria, models.NombreMateria.id_nombre_materia == models.Materia.id_nombre_materia)
+        .join(models.Curso, models.Curso.id_curso == models.Materia.id_curso)
+        .outerjoin(models.Entidad, models.Entidad.id_entidad == models.Materia.id_entidad)
+        .filter(
+            models.Inscripcion.id_entidad == id_entidad,
+            models.Inscripcion.id_ciclo_lectivo == id_ciclo,
+            models.Inscripcion.deleted_at.is_(None)
+        )
+        .order_by(models.NombreMateria.nombre_materia)
+        .all()
+    )
+
+
+def _notas(db: Session, id_entidad: int, id_ciclo: int):
+    # Todas las notas del estudiante en las materias del ciclo
+    materias_ciclo = (
+        db.query(models.Inscripcion.id_materia)
+        .filter(
+            models.Inscripcion.id_entidad == id_entidad,
+            models.Inscripcion.id_ciclo_lectivo == id_ciclo,
+            models.Inscripcion.deleted_at.is_(None)
+        )
+    )
+    return (
+        db.query(models.Nota.id_materia, models.Nota.id_tipo_nota, models.Nota.nota)
+        .filter(
+            models.Nota.id_entidad_estudiante == id_entidad,
+            models.Nota.id_materia.in_(materias_ciclo)
+        )
+        .all()
+    )
+
+
+def _tipos_nota(db: Session):
+    return (
+        db.query(models.TipoNota.id_tipo_nota, models.TipoNota.tipo_nota)
+        .order_by(models.TipoNota.id_tipo_nota)
+        .all()
+    )
+
+
+def _totales_inasistencias(db: Session, id_entidad: int, anio: int):
+    # Mismos totales que GET /estudiantes/inasistencias/{id}/{year} (del resumen mensual)
+    return totales_anio(db, id_entidad, anio)
+
+
+# -------------------------------------------------------------------
+# Armado del tablero
+# -------------------------------------------------------------------
+
+async def armar_dashboard(id_entidad: int, id_ciclo: Optional[int] = None, anio: Optional[int] = None) -> dict:
+    # Ronda 1: estudiante y ciclos
+    existe, ciclos = await _en_paralelo(
+        (_existe_estudiante, id_entidad),
+        (_ciclos, id_entidad),
+    )
+    if not existe:
+        raise HTTPException(status_code=404, detail="Estudiante no encontrado")
+
+    # Si no se indica ciclo, se toma el más reciente
+    if id_ciclo is None and ciclos:
+        id_ciclo = ciclos[0].id_ciclo_lectivo
+    ciclo_actual = next((c for c in ciclos if c.id_ciclo_lectivo == id_ciclo), None)
+
+    # El año de las inasistencias es el del ciclo (o el actual)
+    if anio is None:
+        anio = ciclo_actual.fecha_inicio_cl.year if ciclo_actual and ciclo_actual.fecha_inicio_cl else date.today().year
+
+    # Ronda 2: todo lo que depende del ciclo
+    if id_ciclo:
+        materias, notas, tipos_nota, totales = await _en_paralelo(
+            (_materias, id_entidad, id_ciclo),
+            (_notas, id_entidad, id_ciclo),
+            (_tipos_nota,),
+            (_totales_inasistencias, id_entidad, anio),
+        )
+    else:
+        materias, notas = [], []
+        tipos_nota, totales = await _en_paralelo(
+            (_tipos_nota,),
+            (_totales_inasistencias, id_entidad, anio),
+        )
+
+    # Matriz de notas: {id_materia: {id_tipo_nota: nota}}
+    notas_por_materia = {}
+    for n in notas:
+        notas_por_materia.setdefault(n.id_materia, {})[n.id_tipo_nota] = float(n.nota)
+
+    filas = []
+    for m in materias:
+        calificaciones = {t.id_tipo_nota: notas_por_materia.get(m.id_materia, {}).get(t.id_tipo_nota)
+                          for t in tipos_nota}
+        notas_val = [v for v in calificaciones.values() if v is not None]
+        filas.append({
+            "id_materia": m.id_materia,
+            "nombre_materia": m.nombre_materia,
+            "id_curso": m.id_curso,
+            "curso": m.curso,
+            "docente": f"{m.docente_apellido}, {m.docente_nombre}" if m.docente_apellido else "Sin asignar",
+            "calificaciones": calificaciones,
+            "promedio": round(sum(notas_val) / len(notas_val), 2) if notas_val else None,
+            "definitiva": calificaciones.get(ID_TIPO_NOTA_DEFINITIVA),
+        })
+
+    return {
+        "id_entidad": id_entidad,
+        "ciclos": [{"id_ciclo_lectivo": c.id_ciclo_lectivo, "nombre_ciclo_lectivo": c.nombre_ciclo_lectivo} for c in ciclos],
+        "id_ciclo_lectivo": id_ciclo,
+        "columnas": [{"id_tipo_nota": t.id_tipo_nota, "label": t.tipo_nota} for t in tipos_nota],
+        "materias": filas,
+        "inasistencias": {
+            "anio": anio,
+            "totalInasistencia": totales[0],
+            "totalInasistenciaJustif": totales[1],
+        },
+    }
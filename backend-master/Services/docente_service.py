@@ -0,0 +1,113 @@
+# backend-master/Services/docente_service.py
+
+# Carga de un docente: sus materias agrupadas por ciclo lectivo, con la cantidad de inscriptos,
+# las notas cargadas y faltantes por tipo de nota y la última fecha de carga.
+# Todo sale de una sola consulta, sin importar cuántas materias tenga el docente:
+#   materias del docente x tipos de nota
+#     LEFT JOIN (inscriptos por materia)
+#     LEFT JOIN (notas cargadas por materia y tipo de nota)
+# Las dos subconsultas agrupadas se limitan a las materias del docente, así no recorren
+# todas las notas e inscripciones.
+
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, distinct, func, select, true
+from sqlalchemy.orm import Session
+
+from models import CicloLectivo, Curso, Entidad, Inscripcion, Materia, NombreMateria, Nota, TipoNota
+
+
+# Tipo de entidad de los docentes
+ID_TIPO_DOCENTE = 2
+
+
+def carga_docente(db: Session, id_docente: int, id_ciclo_lectivo: Optional[int] = None) -> dict:
+    docente = db.query(Entidad.id_entidad, Entidad.nombre, Entidad.apellido).filter(
+        Entidad.id_entidad == id_docente,
+        Entidad.id_tipo_entidad == ID_TIPO_DOCENTE,
+        Entidad.deleted_at.is_(None)
+    ).first()
+    if docente is None:
+        raise HTTPException(status_code=404, detail="Docente no encontrado")
+
+    materias_docente = select(Materia.id_materia).where(Materia.id_entidad == id_docente)
+
+    inscriptos = (
+        select(Inscripcion.id_materia, func.count(distinct(Inscripcion.id_entidad)).label("inscriptos"))
+        .where(Inscripcion.id_materia.in_(materias_docente), Inscripcion.deleted_at.is_(None))
+        .group_by(Inscripcion.id_materia)
+        .subquery()
+    )
+
+    # Sólo cuentan las notas de estudiantes inscriptos en la materia
+    notas = (
+        select(
+            Nota.id_materia,
+            Nota.id_tipo_nota,
+            func.count(distinct(Nota.id_entidad_estudiante)).label("cargadas"),
+            func.max(Nota.fecha_carga).label("ultima_carga"),
+        )
+        .join(Inscripcion, and_(
+            Inscripcion.id_materia == Nota.id_materia,
+            Inscripcion.id_entidad == Nota.id_entidad_estudiante,
+            Inscripcion.deleted_at.is_(None)
+        ))
+        .where(Nota.id_materia.in_(materias_docente))
+        .group_by(Nota.id_materia, Nota.id_tipo_nota)
+        .subquery()
+    )
+
+    consulta = (
+        select(
+            Materia.id_materia, NombreMateria.nombre_materia, Curso.id_curso, Curso.curso,
+            CicloLectivo.id_ciclo_lectivo, CicloLectivo.nombre_ciclo_lectivo,
+            TipoNota.id_tipo_nota, TipoNota.tipo_nota,
+            func.coalesce(inscriptos.c.inscriptos, 0),
+            func.coalesce(notas.c.cargadas, 0),
+            notas.c.ultima_carga,
+        )
+        .join(NombreMateria, NombreMateria.id_nombre_materia == Materia.id_nombre_materia)
+        .join(Curso, Curso.id_curso == Materia.id_curso)
+        .outerjoin(CicloLectivo, CicloLectivo.id_ciclo_lectivo == Curso.id_ciclo_lectivo)
+        .outerjoin(TipoNota, true())  # Cada materia con todos los tipos de nota
+        .outerjoin(inscriptos, inscriptos.c.id_materia == Materia.id_materia)
+        .outerjoin(notas, and_(
+            notas.c.id_materia == Materia.id_materia,
+            notas.c.id_tipo_nota == TipoNota.id_tipo_nota
+        ))
+        .where(Materia.id_entidad == id_docente)
+        .order_by(
+            CicloLectivo.fecha_inicio_cl.desc(), Curso.curso, NombreMateria.nombre_materia,
+            Materia.id_materia, TipoNota.id_tipo_nota
+        )
+    )
+    if id_ciclo_lectivo is not None:
+        consulta = consulta.where(Curso.id_ciclo_lectivo == id_ciclo_lectivo)
+
+    # Una fila por (materia, tipo de nota): se agrupa por ciclo y por materia respetando el orden
+    ciclos = {}
+    for (id_materia, nombre_materia, id_curso, curso, id_ciclo, nombre_ciclo,
+         id_tipo_nota, tipo_nota, total_inscriptos, cargadas, ultima_carga) in db.execute(consulta):
+        ciclo = ciclos.setdefault(id_ciclo, {
+            "id_ciclo_lectivo": id_ciclo, "nombre_ciclo_lectivo": nombre_ciclo, "materias": {}
+        })
+        materia = ciclo["materias"].setdefault(id_materia, {
+            "id_materia": id_materia, "nombre_materia": nombre_materia,
+            "id_curso": id_curso, "curso": curso,
+            "inscriptos": total_inscriptos, "notas": [], "ultima_carga": None,
+        })
+        if id_tipo_nota is None:
+            continue
+        materia["notas"].append({
+            "id_tipo_nota": id_tipo_nota, "tipo_nota": tipo_nota,
+            "cargadas": cargadas, "faltantes": max(total_inscriptos - cargadas, 0),
+        })
+        if ultima_carga is not None and (materia["ultima_carga"] is None or ultima_carga > materia["ultima_carga"]):
+            materia["ultima_carga"] = ultima_carga
+
+    return {
+        "id_entidad": docente.id_entidad,
+        "name": f"{docente.apellido}, {docente.nombre}",
+        "ciclos": [{**c, "materias": list(c["materias"].values())} for c in ciclos.values()],
+    }
@@ -0,0 +1,244 @@
+# backend-master/Services/importacion_service.py
+
+# Importación masiva de estudiantes desde un CSV.
+#   - Lee el archivo fila por fila (no lo carga entero en memoria).
+#   - Valida cada fila con el esquema EstudianteImport (hereda de EstudianteCreate).
+#   - Por cada bloque de filas hace UNA consulta para detectar emails y DNIs ya registrados.
+#   - Inserta cada bloque con executemany y hace commit por bloque. Si la base rechaza el bloque,
+#     lo reintenta fila por fila: sólo se rechazan las filas con error.
+#   - Devuelve un informe con los errores de cada fila rechazada (sin el detalle de la base, que
+#     incluye la SQL y los datos de otras filas: ése va al log).
+#   - Acepta UTF-8 y Windows-1252 (lo que exporta Excel en español). Si el archivo deja de ser un
+#     CSV válido a mitad de camino, se importa lo anterior y el error queda en el informe.
+
+import codecs
+import csv
+import io
+import logging
+import re
+from itertools import groupby
+from typing import BinaryIO, Dict, List
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from Core.plazos import PlazoVencido
+from models import Entidad as EntidadORM
+from schemas import EstudianteImport
+
+logger = logging.getLogger(__name__)
+
+
+# Cantidad de filas que se validan, verifican e insertan juntas
+TAMANO_BLOQUE = 500
+
+# Tipo de entidad ESTUDIANTE (igual que en create_estudiante)
+ID_TIPO_ENTIDAD_ESTUDIANTE = 1
+
+# Fechas en formato dd/mm/aaaa (como se muestran en el frontend)
+_FECHA_DMY = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+
+
+def _normalizar_fila(fila: Dict[str, str]) -> Dict[str, object]:
+    # Encabezados sin espacios ni mayúsculas y celdas vacías como None
+    datos = {}
+    for clave, valor in fila.items():
+        if clave is None:
+            continue
+        valor = valor.strip() if isinstance(valor, str) else valor
+        datos[clave.strip().lower()] = valor or None
+
+    fecha = datos.get("fec_nac")
+    if isinstance(fecha, str):
+        coincidencia = _FECHA_DMY.match(fecha)
+        if coincidencia:
+            dia, mes, anio = coincidencia.groups()
+            datos["fec_nac"] = f"{anio}-{int(mes):02d}-{int(dia):02d}"
+    return datos
+
+
+def _cp1252_como_respaldo(error: UnicodeDecodeError):
+    # Los bytes que no son UTF-8 válido se leen como Windows-1252 (y los 5 bytes que ésta no
+    # define, como latin-1): un CSV de Excel en español se lee bien aunque no venga en UTF-8
+    malos = error.object[error.start:error.end]
+    texto = "".join(chr(b) if b in (0x81, 0x8D, 0x8F, 0x90, 0x9D) else bytes([b]).decode("cp1252")
+                    for b in malos)
+    return texto, error.end
+
+
+codecs.register_error("importacion_cp1252", _cp1252_como_respaldo)
+
+
+def _abrir_csv(archivo: BinaryIO) -> csv.DictReader:
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", errors="importacion_cp1252", newline="")
+    # Excel en español suele exportar con ";" como separador. Si el encabezado no tiene
+    # separador (una sola columna) se usa el dialecto por defecto
+    muestra = texto.readline()
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t") if muestra else csv.excel
+    except csv.Error:
+        dialecto = csv.excel
+    return csv.DictReader(_reanudar(muestra, texto), dialect=dialecto)
+
+
+def _leer_filas(archivo: BinaryIO, informe: dict):
+    # (número de fila, fila). La fila 1 es el encabezado, los datos empiezan en la 2.
+    # Un error de formato (p. ej. un byte NUL o un campo sin cerrar) corta la lectura: las filas
+    # anteriores se importan y el error se informa en la fila siguiente a la última leída
+    lector = _abrir_csv(archivo)
+    numero = 1
+    try:
+        for numero, fila in enumerate(lector, start=2):
+            yield numero, fila
+    except csv.Error as e:
+        informe["total_filas"] += 1
+        informe["errores"].append({
+            "fila": numero + 1,
+            "errores": [f"El archivo no es un CSV válido a partir de esta fila: {e}"],
+        })
+
+
+def _reanudar(primera_linea: str, resto):
+    # Devuelve la línea de encabezado ya leída y luego el resto del archivo
+    yield primera_linea
+    yield from resto
+
+
+def _mensaje_error(e: Exception) -> str:
+    # Mensaje para el informe, sin la SQL ni los parámetros
+    codigo = getattr(getattr(e, "orig", None), "args", (None,))[0]
+    if codigo == 1062:
+        return "El email, DNI o legajo ya está registrado"
+    if isinstance(e, IntegrityError):
+        return "Faltan datos obligatorios o algún dato no es válido"
+    if isinstance(e, DataError):
+        return "Algún dato es demasiado largo o tiene un formato inválido"
+    return "Error de base de datos"
+
+
+def _insertar(db: Session, filas: List[dict]):
+    # executemany necesita las mismas claves en todas las filas: se agrupan por columnas
+    for _, grupo in groupby(sorted(filas, key=sorted), key=sorted):
+        db.execute(insert(EntidadORM), list(grupo))
+
+
+def _procesar_bloque(db: Session, bloque: List[tuple], informe: dict):
+    # 1. Una sola consulta para los emails y DNIs ya registrados en la base
+    emails = {e.email for _, e in bloque if e.email}
+    dnis = {e.dni for _, e in bloque if e.dni}
+    condiciones = []
+    if emails:
+        condiciones.append(EntidadORM.email.in_(emails))
+    if dnis:
+        condiciones.append(EntidadORM.dni.in_(dnis))
+
+    emails_existentes, dnis_existentes = set(), set()
+    if condiciones:
+        for email, dni in db.query(EntidadORM.email, EntidadORM.dni).filter(or_(*condiciones)):
+            emails_existentes.add(email)
+            dnis_existentes.add(dni)
+
+    # 2. Armado de las filas a insertar. Las columnas sin valor no se envían (como en
+    #    create_estudiante): así se aplica el valor por defecto de la base y no un NULL explícito
+    filas, numeros = [], []
+    for numero, est in bloque:
+        errores = []
+        if est.email and est.email in emails_existentes:
+            errores.append("El email ya está registrado")
+        if est.dni and est.dni in dnis_existentes:
+            errores.append("El DNI ya está registrado")
+        if errores:
+            informe["errores"].append({"fila": numero, "errores": errores})
+            continue
+        valores = {
+            "nombre": est.nombre.strip(),
+            "apellido": est.apellido.strip(),
+            "email": est.email,
+            "fec_nac": est.fec_nac,
+            "domicilio": est.domicilio,
+            "telefono": est.telefono,
+            "dni": est.dni,
+            "legajo": est.legajo,
+            "id_tipo_entidad": ID_TIPO_ENTIDAD_ESTUDIANTE,
+        }
+        filas.append({clave: valor for clave, valor in valores.items() if valor is not None})
+        numeros.append(numero)
+
+    # 3. Inserción del bloque completo con executemany
+    if not filas:
+        return
+    try:
+        _insertar(db, filas)
+        db.commit()
+        informe["importados"] += len(filas)
+        return
+    except PlazoVencido:
+        # No es un error de las filas: se corta la importación (ver Core/plazos.py)
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        # Sólo el error del driver: el de SQLAlchemy trae los parámetros de todo el bloque
+        logger.warning("Falló la inserción del bloque de filas %s a %s, se reintenta fila por fila: %s",
+                       numeros[0], numeros[-1], getattr(e, "orig", e))
+
+    # 4. El bloque falló: fila por fila, para rechazar sólo las que tienen error
+    for numero, fila in zip(numeros, filas):
+        try:
+            db.execute(insert(EntidadORM), fila)
+            db.commit()
+            informe["importados"] += 1
+        except PlazoVencido:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            logger.info("Fila %s rechazada por la base: %s", numero, getattr(e, "orig", e))
+            informe["errores"].append({"fila": numero, "errores": [_mensaje_error(e)]})
+
+
+def importar_estudiantes_csv(db: Session, archivo: BinaryIO) -> dict:
+    """Importa estudiantes desde un CSV y devuelve el informe por fila."""
+    informe = {"total_filas": 0, "importados": 0, "errores": []}
+
+    # Duplicados dentro del mismo archivo
+    emails_vistos, dnis_vistos = set(), set()
+    bloque: List[tuple] = []
+
+    for numero, fila in _leer_filas(archivo, informe):
+        informe["total_filas"] += 1
+        try:
+            est = EstudianteImport(**_normalizar_fila(fila))
+        except ValidationError as e:
+            informe["errores"].append({
+                "fila": numero,
+                "errores": [f"{'.'.join(str(l) for l in err['loc'])}: {err['msg']}" for err in e.errors()],
+            })
+            continue
+
+        errores = []
+        if est.email and est.email in emails_vistos:
+            errores.append("Email repetido en el archivo")
+        if est.dni and est.dni in dnis_vistos:
+            errores.append("DNI repetido en el archivo")
+        if errores:
+            informe["errores"].append({"fila": numero, "errores": errores})
+            continue
+        if est.email:
+            emails_vistos.add(est.email)
+        if est.dni:
+            dnis_vistos.add(est.dni)
+
+        bloque.append((numero, est))
+        if len(bloque) >= TAMANO_BLOQUE:
+            _procesar_bloque(db, bloque, informe)
+            bloque = []
+
+    if bloque:
+        _procesar_bloque(db, bloque, informe)
+
+    informe["errores"].sort(key=lambda e: e["fila"])
+    informe["rechazados"] = len(informe["errores"])
+    return informe
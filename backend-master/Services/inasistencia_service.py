@@ -0,0 +1,388 @@
+# backend-master/Services/inasistencia_service.py
+
+# Consultas de inasistencias de un estudiante.
+#   - Filtran por rango de fechas semiabierto [desde, hasta) y no con YEAR(fecha), así la
+#     base puede usar el índice (id_entidad, fecha_inasistencia, ...) de t_inasistencia.
+#   - Los totales se leen del resumen mensual (t_inasistencia_resumen) o, si se filtra por
+#     materia, se calculan en la base en una sola consulta agregada.
+#   - El detalle se lee por bloques y se envía en streaming (no se arma la lista en memoria).
+# Y la carga de la asistencia diaria de un curso completo, en una sola transacción, y la
+# grilla estudiante x día de un curso.
+
+import json
+import logging
+from datetime import date, timedelta
+from typing import Iterator, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, delete, func, insert, update
+from sqlalchemy.orm import Session
+
+from models import Curso, Entidad, Inasistencia, InasistenciaAcumulada, Inscripcion, Materia, TipoInasistencia
+from schemas import InasistenciaCursoCarga
+from database import localSession
+from Services.resumen_inasistencias_service import DeltasResumen, aplicar_deltas, clave_resumen, totales_resumen
+
+logger = logging.getLogger(__name__)
+
+
+# Filas del detalle que se leen de la base (y se envían) por vez
+TAMANO_BLOQUE = 500
+
+# Años aceptados por las rutas que reciben un año (date() no admite más allá de 9999)
+ANIO_MINIMO, ANIO_MAXIMO = 1900, 2100
+
+
+def rango_anio(anio: int) -> Tuple[date, date]:
+    """Rango semiabierto [1/1/anio, 1/1/anio+1)."""
+    return date(anio, 1, 1), date(anio + 1, 1, 1)
+
+
+def _filtros(id_entidad: int, desde: date, hasta: date,
+             id_materia: Optional[int] = None, id_curso: Optional[int] = None) -> list:
+    filtros = [
+        Inasistencia.id_entidad == id_entidad,
+        Inasistencia.fecha_inasistencia >= desde,
+        Inasistencia.fecha_inasistencia < hasta,
+    ]
+    if id_materia is not None:
+        filtros.append(Inasistencia.id_materia == id_materia)
+    if id_curso is not None:
+        filtros.append(Inasistencia.id_curso == id_curso)
+    return filtros
+
+
+def totales_inasistencias(db: Session, id_entidad: int, desde: date, hasta: date,
+                          id_materia: Optional[int] = None, id_curso: Optional[int] = None) -> Tuple[float, float]:
+    """Devuelve (total, total justificadas) sumando el valor de cada tipo de inasistencia."""
+    valor = func.coalesce(TipoInasistencia.valor, 0)
+    total, justificadas = (
+        db.query(
+            func.coalesce(func.sum(valor), 0),
+            func.coalesce(func.sum(case((Inasistencia.justificada.is_(True), valor), else_=0)), 0),
+        )
+        .outerjoin(TipoInasistencia, TipoInasistencia.id_tipo_inasistencia == Inasistencia.id_tipo_inasistencia)
+        .filter(*_filtros(id_entidad, desde, hasta, id_materia, id_curso))
+        .one()
+    )
+    return float(total), float(justificadas)
+
+
+def totales_anio(db: Session, id_entidad: int, anio: int,
+                 id_materia: Optional[int] = None, id_curso: Optional[int] = None) -> Tuple[float, float]:
+    """Totales del año: del resumen mensual, o de t_inasistencia si se filtra por materia
+    (el resumen no distingue materias)."""
+    if id_materia is None:
+        return totales_resumen(db, id_entidad, anio, id_curso)
+    return totales_inasistencias(db, id_entidad, *rango_anio(anio), id_materia, id_curso)
+
+
+def _detalle(db: Session, id_entidad: int, desde: date, hasta: date,
+             id_materia: Optional[int], id_curso: Optional[int]):
+    # Sólo las columnas necesarias y el tipo en el mismo JOIN (sin lazy-load por fila)
+    return (
+        db.query(
+            Inasistencia.fecha_inasistencia,
+            Inasistencia.justificada,
+            Inasistencia.motivo_inasistencia,
+            TipoInasistencia.descripcion,
+            TipoInasistencia.valor,
+        )
+        .outerjoin(TipoInasistencia, TipoInasistencia.id_tipo_inasistencia == Inasistencia.id_tipo_inasistencia)
+        .filter(*_filtros(id_entidad, desde, hasta, id_materia, id_curso))
+        .order_by(Inasistencia.fecha_inasistencia)
+        .execution_options(yield_per=TAMANO_BLOQUE)
+    )
+
+
+def _registro(fila) -> dict:
+    # Mismo formato que InasistenciaBase
+    return {
+        "date": fila.fecha_inasistencia.strftime("%d/%m/%Y"),
+        "type": fila.descripcion or "Desconocido",
+        "value": float(fila.valor or 0.0),
+        "justified": bool(fila.justificada),
+        "reason": fila.motivo_inasistencia or "",
+    }
+
+
+def json_inasistencias(total: float, total_justif: float, id_entidad: int, desde: date, hasta: date,
+                       id_materia: Optional[int] = None, id_curso: Optional[int] = None) -> Iterator[bytes]:
+    """Genera el JSON de InasistenciaResponse por partes: primero los totales y luego el detalle.
+
+    Abre su propia sesión: la del endpoint ya está cerrada cuando empieza el streaming.
+    """
+    yield (f'{{"totalInasistencia":{json.dumps(total)},'
+           f'"totalInasistenciaJustif":{json.dumps(total_justif)},'
+           f'"detailedRecords":[').encode()
+
+    db = localSession()
+    try:
+        separador = ""
+        bloque = []
+        for fila in _detalle(db, id_entidad, desde, hasta, id_materia, id_curso):
+            bloque.append(separador + json.dumps(_registro(fila), ensure_ascii=False))
+            separador = ","
+            if len(bloque) >= TAMANO_BLOQUE:
+                yield "".join(bloque).encode()
+                bloque = []
+        if bloque:
+            yield "".join(bloque).encode()
+    finally:
+        db.close()
+
+    yield b"]}"
+
+
+# -------------------------------------------------------------------
+# Carga de la asistencia diaria de un curso
+# -------------------------------------------------------------------
+
+def _filtro_materia(id_materia: Optional[int]):
+    # La asistencia general del curso se guarda con id_materia NULL
+    return Inasistencia.id_materia.is_(None) if id_materia is None else Inasistencia.id_materia == id_materia
+
+
+def _validar_carga(db: Session, id_curso: int, carga: InasistenciaCursoCarga):
+    ids = [i.id_entidad for i in carga.inasistencias]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Un estudiante figura más de una vez en el parte")
+    if not ids:
+        return
+
+    # Tipos de inasistencia: una consulta
+    tipos = {i.id_tipo_inasistencia for i in carga.inasistencias}
+    existentes = {t for (t,) in db.query(TipoInasistencia.id_tipo_inasistencia)
+                  .filter(TipoInasistencia.id_tipo_inasistencia.in_(tipos))}
+    if tipos - existentes:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Tipos de inasistencia inexistentes: {sorted(tipos - existentes)}")
+
+    # Nómina: una consulta contra las inscripciones del curso (o de la materia indicada)
+    nomina = (
+        db.query(Inscripcion.id_entidad)
+        .join(Materia, Materia.id_materia == Inscripcion.id_materia)
+        .filter(
+            Materia.id_curso == id_curso,
+            Inscripcion.deleted_at.is_(None),
+            Inscripcion.id_entidad.in_(ids)
+        )
+    )
+    if carga.id_materia is not None:
+        nomina = nomina.filter(Inscripcion.id_materia == carga.id_materia)
+    inscriptos = {e for (e,) in nomina.distinct()}
+    fuera = sorted(set(ids) - inscriptos)
+    if fuera:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Estudiantes no inscriptos en el curso/materia: {fuera}")
+
+
+def registrar_inasistencias_curso(db: Session, id_curso: int, fecha: date, carga: InasistenciaCursoCarga) -> dict:
+    """Guarda el parte diario de un curso: upsert por (entidad, curso, materia, fecha).
+
+    Volver a enviar el mismo parte no duplica nada (idempotente), aunque los dos envíos lleguen
+    a la vez. Todo va en una sola transacción: el bloqueo del curso, una consulta de existentes,
+    un UPDATE por lotes, un INSERT por lotes, si se pide reemplazar, un DELETE, y la
+    actualización del resumen mensual.
+    """
+    _validar_carga(db, id_curso, carga)
+
+    # Un parte a la vez por curso: dos envíos simultáneos (doble clic, reintento del cliente) se
+    # serializan sobre la fila del curso. Bloquear sólo las inasistencias del día no alcanza:
+    # si todavía no hay ninguna, los bloqueos de rango de InnoDB no impiden que ambos inserten.
+    # Las lecturas siguientes también son con bloqueo, así ven lo que el otro envío acaba de
+    # confirmar (y no la foto del inicio de la transacción) y el resumen se ajusta con eso.
+    db.query(Curso.id_curso).filter(Curso.id_curso == id_curso).with_for_update().first()
+
+    del_dia = [
+        Inasistencia.id_curso == id_curso,
+        Inasistencia.fecha_inasistencia == fecha,
+        _filtro_materia(carga.id_materia),
+    ]
+
+    # Valor de cada tipo de inasistencia (tabla chica) para actualizar el resumen mensual
+    valores = dict(db.query(TipoInasistencia.id_tipo_inasistencia, TipoInasistencia.valor))
+    deltas = DeltasResumen()
+
+    # Inasistencias ya cargadas ese día para esos estudiantes. Si un estudiante tiene más de una
+    # (envíos simultáneos anteriores a este bloqueo), se conserva la primera y se borran las demás
+    ids = [i.id_entidad for i in carga.inasistencias]
+    existentes, duplicadas = {}, []
+    if ids:
+        for e in (db.query(Inasistencia.id_entidad, Inasistencia.id_inasistencia,
+                           Inasistencia.id_tipo_inasistencia, Inasistencia.justificada)
+                  .filter(*del_dia, Inasistencia.id_entidad.in_(ids))
+                  .order_by(Inasistencia.id_inasistencia)
+                  .with_for_update()):
+            if e.id_entidad in existentes:
+                duplicadas.append(e)
+                deltas.restar(clave_resumen(e.id_entidad, id_curso, fecha, e.justificada),
+                              valores.get(e.id_tipo_inasistencia))
+            else:
+                existentes[e.id_entidad] = e
+
+    actualizar, insertar = [], []
+    for i in carga.inasistencias:
+        datos = {
+            "id_tipo_inasistencia": i.id_tipo_inasistencia,
+            "justificada": i.justificada,
+            "motivo_inasistencia": i.motivo_inasistencia,
+        }
+        deltas.sumar(clave_resumen(i.id_entidad, id_curso, fecha, i.justificada), valores.get(i.id_tipo_inasistencia))
+        if i.id_entidad in existentes:
+            anterior = existentes[i.id_entidad]
+            deltas.restar(clave_resumen(i.id_entidad, id_curso, fecha, anterior.justificada),
+                          valores.get(anterior.id_tipo_inasistencia))
+            actualizar.append({"id_inasistencia": anterior.id_inasistencia, **datos})
+        else:
+            insertar.append({
+                "id_entidad": i.id_entidad,
+                "id_curso": id_curso,
+                "id_materia": carga.id_materia,
+                "fecha_inasistencia": fecha,
+                **datos,
+            })
+
+    eliminadas = 0
+    try:
+        if duplicadas:
+            resultado = db.execute(
+                delete(Inasistencia)
+                .where(Inasistencia.id_inasistencia.in_([d.id_inasistencia for d in duplicadas]))
+                .execution_options(synchronize_session=False)
+            )
+            eliminadas += resultado.rowcount
+        if actualizar:
+            # UPDATE por clave primaria, en lote (executemany)
+            db.execute(update(Inasistencia), actualizar)
+        if insertar:
+            db.execute(insert(Inasistencia), insertar)
+        if carga.reemplazar:
+            # Los que ya no figuran en el parte estuvieron presentes
+            ausentes = [Inasistencia.id_entidad.not_in(ids)] if ids else []
+            a_borrar = db.query(Inasistencia.id_entidad, Inasistencia.id_tipo_inasistencia,
+                                Inasistencia.justificada).filter(*del_dia, *ausentes).with_for_update().all()
+            for b in a_borrar:
+                deltas.restar(clave_resumen(b.id_entidad, id_curso, fecha, b.justificada),
+                              valores.get(b.id_tipo_inasistencia))
+            presentes = sorted({b.id_entidad for b in a_borrar})
+            if presentes:
+                resultado = db.execute(
+                    delete(Inasistencia)
+                    .where(*del_dia, Inasistencia.id_entidad.in_(presentes))
+                    .execution_options(synchronize_session=False)
+                )
+                eliminadas += resultado.rowcount
+                # El escaneo de límites no ve los borrados: se le pide recalcular a esos estudiantes
+                db.execute(
+                    update(InasistenciaAcumulada)
+                    .where(
+                        InasistenciaAcumulada.id_entidad.in_(presentes),
+                        InasistenciaAcumulada.id_curso == id_curso,
+                        InasistenciaAcumulada.anio == fecha.year
+                    )
+                    .values(recalcular=True)
+                    .execution_options(synchronize_session=False)
+                )
+        # Resumen mensual: en la misma transacción que las inasistencias
+        aplicar_deltas(db, deltas)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        # El detalle (SQL, parámetros) va al log, no al cliente
+        logger.exception("Error al guardar las inasistencias del curso %s del %s: %s", id_curso, fecha, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail="Error al guardar las inasistencias")
+
+    return {
+        "id_curso": id_curso,
+        "fecha": fecha,
+        "id_materia": carga.id_materia,
+        "insertadas": len(insertar),
+        "actualizadas": len(actualizar),
+        "eliminadas": eliminadas,
+    }
+
+
+# -------------------------------------------------------------------
+# Grilla de asistencia de un curso (estudiantes x días)
+# -------------------------------------------------------------------
+
+# Rango máximo de la grilla
+MAX_DIAS_MATRIZ = 366
+
+
+def nomina_curso(db: Session, id_curso: int, id_materia: Optional[int] = None):
+    """Estudiantes inscriptos en las materias del curso (o en la materia indicada), por apellido."""
+    consulta = (
+        db.query(Entidad.id_entidad, Entidad.apellido, Entidad.nombre)
+        .join(Inscripcion, Inscripcion.id_entidad == Entidad.id_entidad)
+        .join(Materia, Materia.id_materia == Inscripcion.id_materia)
+        .filter(
+            Materia.id_curso == id_curso,
+            Inscripcion.deleted_at.is_(None),
+            Entidad.deleted_at.is_(None)
+        )
+    )
+    if id_materia is not None:
+        consulta = consulta.filter(Inscripcion.id_materia == id_materia)
+    return consulta.distinct().order_by(Entidad.apellido, Entidad.nombre).all()
+
+
+def matriz_curso(db: Session, id_curso: int, desde: date, hasta: date, id_materia: Optional[int] = None) -> dict:
+    """Grilla densa de inasistencias del curso entre desde y hasta (ambos inclusive).
+
+    Filas: estudiantes de la nómina. Columnas: días hábiles del rango (más los fines de semana
+    que tengan registros). Cada celda es la suma del valor de las inasistencias del día (0 = presente).
+    """
+    if hasta < desde:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'hasta' debe ser posterior a 'desde'")
+    if (hasta - desde).days >= MAX_DIAS_MATRIZ:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"El rango no puede superar los {MAX_DIAS_MATRIZ} días")
+
+    # Una sola consulta agrupada por estudiante y día
+    filtros = [
+        Inasistencia.id_curso == id_curso,
+        Inasistencia.fecha_inasistencia >= desde,
+        Inasistencia.fecha_inasistencia < hasta + timedelta(days=1),
+    ]
+    if id_materia is not None:
+        filtros.append(Inasistencia.id_materia == id_materia)
+    celdas = (
+        db.query(
+            Inasistencia.id_entidad,
+            Inasistencia.fecha_inasistencia,
+            func.coalesce(func.sum(TipoInasistencia.valor), 0),
+        )
+        .outerjoin(TipoInasistencia, TipoInasistencia.id_tipo_inasistencia == Inasistencia.id_tipo_inasistencia)
+        .filter(*filtros)
+        .group_by(Inasistencia.id_entidad, Inasistencia.fecha_inasistencia)
+        .all()
+    )
+
+    estudiantes = nomina_curso(db, id_curso, id_materia)
+
+    con_registros = {f for _, f, _ in celdas}
+    fechas = [d for d in (desde + timedelta(days=n) for n in range((hasta - desde).days + 1))
+              if d.weekday() < 5 or d in con_registros]
+    columna = {f: i for i, f in enumerate(fechas)}
+    fila = {e.id_entidad: i for i, e in enumerate(estudiantes)}
+
+    valores = [[0.0] * len(fechas) for _ in estudiantes]
+    for id_entidad, fecha, valor in celdas:
+        # Las inasistencias de quien ya no está en la nómina no se muestran
+        if id_entidad in fila:
+            valores[fila[id_entidad]][columna[fecha]] = float(valor)
+
+    return {
+        "id_curso": id_curso,
+        "id_materia": id_materia,
+        "desde": desde,
+        "hasta": hasta,
+        "fechas": fechas,
+        "estudiantes": [{"id_entidad": e.id_entidad, "name": f"{e.apellido}, {e.nombre}"} for e in estudiantes],
+        "valores": valores,
+        "totales": [sum(v) for v in valores],
+    }
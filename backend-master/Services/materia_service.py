@@ -0,0 +1,144 @@
+# backend-master/Services/materia_service.py
+
+# Perfiles de carga de Materia y sus relaciones.
+# Cada perfil elige, por relación, cómo traerla y qué columnas leer (sólo las que usa el esquema):
+#   - joinedload: en la misma consulta. Conviene para relaciones de una fila por materia y con
+#     pocas columnas (el nombre), o cuando todas las materias comparten la misma fila (el curso,
+#     cuando se listan las materias de UN curso).
+#   - selectinload: una consulta extra con IN de los ids distintos. Conviene cuando la fila
+#     relacionada se repite en muchas materias (docente, curso en listados generales): se trae
+#     una vez cada una en lugar de repetirla en cada fila del JOIN.
+# Perfiles:
+#   "tabla"     -> MateriaResponse completo para listados de muchas materias.
+#   "por-curso" -> MateriaResponse completo para las materias de un solo curso.
+#   "simple"    -> sólo id y nombre; el resto de las relaciones no se carga (raiseload).
+#   "stream"    -> MateriaResponse completo para NDJSON (Core/ndjson.py): todo en JOIN. Con
+#                  yield_per el cursor del servidor queda abierto mientras se lee, y PyMySQL no
+#                  admite otra consulta en la misma conexión (las de selectinload) hasta terminarlo.
+# Ver benchmarks/bench_materias_carga.py para la comparación.
+# Al final, la consulta paginada y filtrada de la tabla de materias.
+
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session, joinedload, load_only, raiseload, selectinload
+
+from models import CicloLectivo, Curso, Entidad, Materia, NombreMateria, Plan
+
+
+def _nombre():
+    return joinedload(Materia.nombre).load_only(NombreMateria.nombre_materia)
+
+
+def _docente(estrategia=selectinload):
+    # Sólo los campos del esquema Entidad (no toda la fila del docente)
+    return estrategia(Materia.docente).load_only(
+        Entidad.id_entidad, Entidad.nombre, Entidad.apellido, Entidad.email, Entidad.domicilio
+    )
+
+
+def _curso(estrategia):
+    # Curso -> Ciclo -> Plan, con las columnas de CursoCicloLectivo. Ciclo y plan van siempre
+    # en JOIN con el curso: son una fila por curso.
+    return (
+        estrategia(Materia.curso).load_only(Curso.id_curso, Curso.curso, Curso.id_ciclo_lectivo)
+        .joinedload(Curso.ciclo).load_only(
+            CicloLectivo.id_ciclo_lectivo, CicloLectivo.nombre_ciclo_lectivo, CicloLectivo.id_plan)
+        .joinedload(CicloLectivo.plan).load_only(Plan.id_plan, Plan.nombre_plan)
+    )
+
+
+_COLUMNAS_RESPONSE = load_only(Materia.id_materia, Materia.id_nombre_materia, Materia.id_curso, Materia.id_entidad)
+
+PERFILES_CARGA = {
+    "tabla": (_COLUMNAS_RESPONSE, _nombre(), _curso(selectinload), _docente()),
+    "por-curso": (_COLUMNAS_RESPONSE, _nombre(), _curso(joinedload), _docente()),
+    "simple": (load_only(Materia.id_materia, Materia.id_nombre_materia), _nombre(), raiseload("*")),
+    "stream": (_COLUMNAS_RESPONSE, _nombre(), _curso(joinedload), _docente(joinedload)),
+}
+
+
+def con_perfil(consulta: Query, perfil: str) -> Query:
+    """Aplica un perfil de carga a una consulta de Materia."""
+    try:
+        opciones = PERFILES_CARGA[perfil]
+    except KeyError:
+        raise ValueError(f"Perfil de carga desconocido: {perfil}")
+    return consulta.options(*opciones)
+
+
+# ========================================================================
+#  Tabla de materias paginada (GET /api/materias/tabla/)
+#   1. Con los filtros y el orden se buscan sólo los ids de la página: la consulta usa los
+#      índices de materia, curso y ciclo y no arrastra las columnas de las relaciones.
+#   2. Las materias de esa página se cargan con el perfil "tabla".
+# ========================================================================
+
+# Columnas por las que se puede ordenar la tabla
+ORDENES_TABLA = {
+    "id_materia": (Materia.id_materia,),
+    "nombre": (NombreMateria.nombre_materia,),
+    "curso": (Curso.curso,),
+    "ciclo": (CicloLectivo.nombre_ciclo_lectivo,),
+    "plan": (Plan.nombre_plan,),
+    "docente": (Entidad.apellido, Entidad.nombre),
+}
+
+
+def _consulta_tabla(db: Session, filtros: dict, orden: Optional[str] = None) -> Query:
+    # Sólo se hacen los JOIN que piden los filtros o el orden
+    con_nombre = bool(filtros.get("nombre")) or orden == "nombre"
+    con_plan = filtros.get("id_plan") is not None or orden == "plan"
+    con_ciclo = con_plan or orden == "ciclo"
+    con_curso = con_ciclo or filtros.get("id_ciclo_lectivo") is not None or orden == "curso"
+
+    consulta = db.query(Materia.id_materia)
+    if con_nombre:
+        consulta = consulta.join(Materia.nombre)
+    if con_curso:
+        consulta = consulta.join(Materia.curso)
+    if con_ciclo:
+        consulta = consulta.outerjoin(Curso.ciclo)
+    if orden == "plan":
+        consulta = consulta.outerjoin(CicloLectivo.plan)
+    if orden == "docente":
+        consulta = consulta.join(Materia.docente)
+
+    if filtros.get("id_curso") is not None:
+        consulta = consulta.filter(Materia.id_curso == filtros["id_curso"])
+    if filtros.get("id_docente") is not None:
+        consulta = consulta.filter(Materia.id_entidad == filtros["id_docente"])
+    if filtros.get("id_ciclo_lectivo") is not None:
+        consulta = consulta.filter(Curso.id_ciclo_lectivo == filtros["id_ciclo_lectivo"])
+    if filtros.get("id_plan") is not None:
+        consulta = consulta.filter(CicloLectivo.id_plan == filtros["id_plan"])
+    if filtros.get("nombre"):
+        consulta = consulta.filter(NombreMateria.nombre_materia.icontains(filtros["nombre"], autoescape=True))
+    return consulta
+
+
+def contar_materias(db: Session, filtros: dict) -> int:
+    return _consulta_tabla(db, filtros).with_entities(func.count(Materia.id_materia)).scalar()
+
+
+def tabla_materias(db: Session, filtros: dict, pagina: int, tamano: int,
+                   orden: str = "id_materia", descendente: bool = False) -> Tuple[int, List[Materia]]:
+    """(total que cumple los filtros, materias de la página pedida)."""
+    total = contar_materias(db, filtros)
+    if total == 0 or (pagina - 1) * tamano >= total:
+        return total, []
+
+    # El id al final deja el orden estable entre páginas cuando hay valores repetidos
+    columnas = ORDENES_TABLA[orden] + (Materia.id_materia,)
+    ids = [
+        id_materia for (id_materia,) in
+        _consulta_tabla(db, filtros, orden)
+        .order_by(*(c.desc() if descendente else c.asc() for c in columnas))
+        .offset((pagina - 1) * tamano)
+        .limit(tamano)
+    ]
+
+    posiciones = {id_materia: i for i, id_materia in enumerate(ids)}
+    materias = con_perfil(db.query(Materia), "tabla").filter(Materia.id_materia.in_(ids)).all()
+    materias.sort(key=lambda m: posiciones[m.id_materia])
+    return total, materias
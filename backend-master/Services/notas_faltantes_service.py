@@ -0,0 +1,146 @@
+# backend-master/Services/notas_faltantes_service.py
+
+# Notas faltantes de un ciclo lectivo (opcionalmente de un curso y un período).
+# Las celdas esperadas son inscripción (estudiante, materia) x tipo de nota requerido; una celda
+# falta si no hay una nota para ese estudiante, materia y tipo (y período, si se indica).
+# Todo se resuelve en la base con un anti-join (NOT EXISTS) sobre el índice de t_nota:
+#   - el resumen agrupado por curso, materia y tipo de nota es una sola consulta;
+#   - el detalle (una fila por celda faltante) se lee por bloques y se envía en streaming.
+
+import json
+from typing import Iterator, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import case, exists, func, select
+from sqlalchemy.orm import Session
+
+from models import CicloLectivo, Curso, Entidad, Inscripcion, Materia, NombreMateria, Nota, Periodo, TipoNota
+from database import sesion_lectura
+
+
+# Filas del detalle que se leen de la base (y se envían) por vez
+TAMANO_BLOQUE = 1000
+
+
+def validar_filtros(db: Session, id_ciclo: int, id_periodo: Optional[int]):
+    if db.get(CicloLectivo, id_ciclo) is None:
+        raise HTTPException(status_code=404, detail="Ciclo lectivo no encontrado")
+    if id_periodo is not None and db.get(Periodo, id_periodo) is None:
+        raise HTTPException(status_code=404, detail="Período no encontrado")
+
+
+def _celdas(id_ciclo: int, id_curso: Optional[int], id_periodo: Optional[int], tipos: Optional[List[int]]):
+    """(inscriptos, condición de tipo requerido, condición de celda sin nota)."""
+    # Inscripciones distintas (estudiante, materia) del ciclo
+    inscriptos = (
+        select(Inscripcion.id_entidad, Inscripcion.id_materia)
+        .join(Materia, Materia.id_materia == Inscripcion.id_materia)
+        .where(Inscripcion.id_ciclo_lectivo == id_ciclo, Inscripcion.deleted_at.is_(None))
+    )
+    if id_curso is not None:
+        inscriptos = inscriptos.where(Materia.id_curso == id_curso)
+    inscriptos = inscriptos.distinct().subquery("inscriptos")
+
+    # Sin lista explícita se piden los tipos de nota finales (las columnas del acta)
+    requerido = TipoNota.id_tipo_nota.in_(tipos) if tipos else TipoNota.es_final.is_(True)
+
+    condiciones = [
+        Nota.id_materia == inscriptos.c.id_materia,
+        Nota.id_entidad_estudiante == inscriptos.c.id_entidad,
+        Nota.id_tipo_nota == TipoNota.id_tipo_nota,
+    ]
+    if id_periodo is not None:
+        condiciones.append(Nota.id_periodo == id_periodo)
+    sin_nota = ~exists().where(*condiciones)
+
+    return inscriptos, requerido, sin_nota
+
+
+def resumen_faltantes(db: Session, id_ciclo: int, id_curso: Optional[int] = None,
+                      id_periodo: Optional[int] = None, tipos: Optional[List[int]] = None) -> dict:
+    inscriptos, requerido, sin_nota = _celdas(id_ciclo, id_curso, id_periodo, tipos)
+    filas = db.execute(
+        select(
+            Curso.id_curso, Curso.curso, Materia.id_materia, NombreMateria.nombre_materia,
+            TipoNota.id_tipo_nota, TipoNota.tipo_nota,
+            func.count(),
+            func.coalesce(func.sum(case((sin_nota, 1), else_=0)), 0),
+        )
+        .select_from(inscriptos)
+        .join(Materia, Materia.id_materia == inscriptos.c.id_materia)
+        .join(NombreMateria, NombreMateria.id_nombre_materia == Materia.id_nombre_materia)
+        .join(Curso, Curso.id_curso == Materia.id_curso)
+        .join(TipoNota, requerido)
+        .group_by(
+            Curso.id_curso, Curso.curso, Materia.id_materia, NombreMateria.nombre_materia,
+            TipoNota.id_tipo_nota, TipoNota.tipo_nota
+        )
+        .order_by(Curso.curso, NombreMateria.nombre_materia, Materia.id_materia, TipoNota.id_tipo_nota)
+    ).all()
+
+    grupos = [
+        {
+            "id_curso": id_curso_, "curso": curso, "id_materia": id_materia,
+            "nombre_materia": nombre_materia, "id_tipo_nota": id_tipo_nota, "tipo_nota": tipo_nota,
+            "esperadas": esperadas, "faltantes": int(faltantes),
+        }
+        for id_curso_, curso, id_materia, nombre_materia, id_tipo_nota, tipo_nota, esperadas, faltantes in filas
+    ]
+    return {
+        "esperadas": sum(g["esperadas"] for g in grupos),
+        "faltantes": sum(g["faltantes"] for g in grupos),
+        "grupos": grupos,
+    }
+
+
+def _detalle(db: Session, id_ciclo: int, id_curso: Optional[int], id_periodo: Optional[int],
+             tipos: Optional[List[int]]):
+    inscriptos, requerido, sin_nota = _celdas(id_ciclo, id_curso, id_periodo, tipos)
+    return db.execute(
+        select(
+            inscriptos.c.id_entidad, Entidad.apellido, Entidad.nombre,
+            Materia.id_curso, inscriptos.c.id_materia, TipoNota.id_tipo_nota,
+        )
+        .select_from(inscriptos)
+        .join(Materia, Materia.id_materia == inscriptos.c.id_materia)
+        .join(Entidad, Entidad.id_entidad == inscriptos.c.id_entidad)
+        .join(TipoNota, requerido)
+        .where(sin_nota)
+        .order_by(Materia.id_curso, inscriptos.c.id_materia, Entidad.apellido, Entidad.nombre,
+                  inscriptos.c.id_entidad, TipoNota.id_tipo_nota)
+        .execution_options(yield_per=TAMANO_BLOQUE)
+    )
+
+
+def json_faltantes(resumen: dict, id_ciclo: int, id_curso: Optional[int] = None,
+                   id_periodo: Optional[int] = None, tipos: Optional[List[int]] = None,
+                   con_detalle: bool = True) -> Iterator[bytes]:
+    """Genera el JSON de NotasFaltantesResponse por partes: primero el resumen y luego el detalle.
+
+    Abre su propia sesión (de lectura, como la del endpoint): la del endpoint ya está cerrada
+    cuando empieza el streaming.
+    """
+    yield (f'{{"esperadas":{resumen["esperadas"]},"faltantes":{resumen["faltantes"]},'
+           f'"grupos":{json.dumps(resumen["grupos"], ensure_ascii=False)},"detalle":[').encode()
+
+    if con_detalle and resumen["faltantes"]:
+        db = sesion_lectura()
+        try:
+            separador = ""
+            bloque = []
+            for id_entidad, apellido, nombre, id_curso_, id_materia, id_tipo_nota in _detalle(
+                    db, id_ciclo, id_curso, id_periodo, tipos):
+                bloque.append(separador + json.dumps({
+                    "id_entidad": id_entidad, "alumno": f"{apellido}, {nombre}",
+                    "id_curso": id_curso_, "id_materia": id_materia, "id_tipo_nota": id_tipo_nota,
+                }, ensure_ascii=False))
+                separador = ","
+                if len(bloque) >= TAMANO_BLOQUE:
+                    yield "".join(bloque).encode()
+                    bloque = []
+            if bloque:
+                yield "".join(bloque).encode()
+        finally:
+            db.close()
+
+    yield b"]}"
@@ -0,0 +1,144 @@
+# backend-master/Services/resumen_inasistencias_service.py
+
+# Resumen precalculado de inasistencias (t_inasistencia_resumen).
+# Una fila por (estudiante, curso, año, mes, justificada) con la suma de valores y la cantidad
+# de registros. Lo mantiene la carga de inasistencias sumando/restando diferencias (deltas)
+# en la misma transacción, y se puede reconstruir desde t_inasistencia con
+# `python resumen_inasistencias.py`.
+# Así los totales de un año se leen sumando a lo sumo 12 filas por curso y marca de
+# justificada, en vez de recorrer todas las inasistencias.
+
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, delete, extract, func, insert, select
+from sqlalchemy.dialects.mysql import insert as insert_mysql
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+from sqlalchemy.orm import Session
+
+from models import Inasistencia, InasistenciaResumen, TipoInasistencia
+
+
+# (id_entidad, id_curso, anio, mes, justificada)
+ClaveResumen = Tuple[int, int, int, int, bool]
+
+
+def clave_resumen(id_entidad: int, id_curso: Optional[int], fecha: date, justificada: Optional[bool]) -> ClaveResumen:
+    # Sin curso se guarda como 0 (la clave primaria no admite NULL)
+    return (id_entidad, id_curso or 0, fecha.year, fecha.month, bool(justificada))
+
+
+class DeltasResumen:
+    """Acumula las diferencias que una operación de escritura produce en el resumen."""
+
+    def __init__(self):
+        self._deltas: Dict[ClaveResumen, list] = defaultdict(lambda: [0.0, 0])
+
+    def sumar(self, clave: ClaveResumen, valor: Optional[float]):
+        delta = self._deltas[clave]
+        delta[0] += valor or 0.0
+        delta[1] += 1
+
+    def restar(self, clave: ClaveResumen, valor: Optional[float]):
+        delta = self._deltas[clave]
+        delta[0] -= valor or 0.0
+        delta[1] -= 1
+
+    def items(self) -> Iterable[Tuple[ClaveResumen, float, int]]:
+        for clave, (total, cantidad) in self._deltas.items():
+            if total or cantidad:
+                yield clave, total, cantidad
+
+
+def aplicar_deltas(db: Session, deltas: DeltasResumen):
+    """Aplica las diferencias dentro de la transacción en curso (no hace commit)."""
+    cambios = list(deltas.items())
+    if not cambios:
+        return
+
+    # Ordenadas por clave: dos cargas simultáneas bloquean las filas en el mismo orden
+    filas = [
+        {"id_entidad": id_entidad, "id_curso": id_curso, "anio": anio, "mes": mes,
+         "justificada": justificada, "total": total, "cantidad": cantidad}
+        for (id_entidad, id_curso, anio, mes, justificada), total, cantidad in sorted(cambios)
+    ]
+    db.execute(_upsert(db), filas)
+
+
+def _upsert(db: Session):
+    # Un solo INSERT ... ON DUPLICATE KEY UPDATE para todas las claves: si la fila no existe se
+    # crea y si existe (o la creó otra carga concurrente, p. ej. la de otra materia del mismo
+    # curso y día) se le suma el delta. El incremento lo hace la base, así no se pisan.
+    tabla = InasistenciaResumen.__table__
+    if db.get_bind().dialect.name == "sqlite":
+        # Para las pruebas y benchmarks con SQLite
+        sentencia = insert_sqlite(tabla)
+        return sentencia.on_conflict_do_update(
+            index_elements=[c.name for c in tabla.primary_key],
+            set_={
+                "total": tabla.c.total + sentencia.excluded.total,
+                "cantidad": tabla.c.cantidad + sentencia.excluded.cantidad,
+                "updated_at": func.current_timestamp(),
+            },
+        )
+    sentencia = insert_mysql(tabla)
+    return sentencia.on_duplicate_key_update(
+        total=tabla.c.total + sentencia.inserted.total,
+        cantidad=tabla.c.cantidad + sentencia.inserted.cantidad,
+        updated_at=func.current_timestamp(),
+    )
+
+
+def reconstruir(db: Session, anio: Optional[int] = None) -> int:
+    """Vuelve a generar el resumen (de un año o completo) desde t_inasistencia. No hace commit."""
+    borrar = delete(InasistenciaResumen)
+    if anio is not None:
+        borrar = borrar.where(InasistenciaResumen.anio == anio)
+    db.execute(borrar)
+
+    anio_col = extract("year", Inasistencia.fecha_inasistencia)
+    mes_col = extract("month", Inasistencia.fecha_inasistencia)
+    justificada = case((Inasistencia.justificada.is_(True), True), else_=False)
+    origen = (
+        select(
+            Inasistencia.id_entidad,
+            func.coalesce(Inasistencia.id_curso, 0),
+            anio_col,
+            mes_col,
+            justificada,
+            func.coalesce(func.sum(func.coalesce(TipoInasistencia.valor, 0)), 0),
+            func.count(),
+        )
+        .outerjoin(TipoInasistencia, TipoInasistencia.id_tipo_inasistencia == Inasistencia.id_tipo_inasistencia)
+        .where(Inasistencia.id_entidad.isnot(None), Inasistencia.fecha_inasistencia.isnot(None))
+        .group_by(Inasistencia.id_entidad, func.coalesce(Inasistencia.id_curso, 0), anio_col, mes_col, justificada)
+    )
+    if anio is not None:
+        origen = origen.where(
+            Inasistencia.fecha_inasistencia >= date(anio, 1, 1),
+            Inasistencia.fecha_inasistencia < date(anio + 1, 1, 1)
+        )
+
+    # INSERT ... SELECT: todo se resuelve dentro de la base
+    resultado = db.execute(
+        insert(InasistenciaResumen).from_select(
+            ["id_entidad", "id_curso", "anio", "mes", "justificada", "total", "cantidad"], origen
+        )
+    )
+    return resultado.rowcount
+
+
+def totales_resumen(db: Session, id_entidad: int, anio: int, id_curso: Optional[int] = None) -> Tuple[float, float]:
+    """(total, total justificadas) del año, leídos del resumen."""
+    consulta = db.query(
+        func.coalesce(func.sum(InasistenciaResumen.total), 0),
+        func.coalesce(func.sum(case((InasistenciaResumen.justificada.is_(True), InasistenciaResumen.total), else_=0)), 0),
+    ).filter(
+        InasistenciaResumen.id_entidad == id_entidad,
+        InasistenciaResumen.anio == anio
+    )
+    if id_curso is not None:
+        consulta = consulta.filter(InasistenciaResumen.id_curso == id_curso)
+    total, justificadas = consulta.one()
+    return float(total), float(justificadas)
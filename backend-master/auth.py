@@ -1,12 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.encoders import jsonable_encoder
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session, joinedload # 🚨 Importamos joinedload
-from dotenv import load_dotenv
 import os
+import logging
 import aiosmtplib
 from email.message import EmailMessage
 import secrets
@@ -27,10 +27,10 @@ from schemas import (
     # 🚨 Importamos TipoRolResponse (Necesario para construir UserAuthData)
     TipoRolResponse 
 ) 
-from database import localSession 
+from database import get_db  # database.py ya cargó el .env
+from Core.trazas import trazar
 
-
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 # Configuración
 JWT_SECRET = os.getenv('JWT_SECRET') or "your-secret-key"
@@ -50,14 +50,6 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/login")
 
 router = APIRouter()
 
-# Dependencia para la base de datos
-def get_db():
-    db = localSession()
-    try:
-        yield db
-    finally:
-        db.close()
-    
 # Funciones de utilidad
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -77,6 +69,7 @@ def generate_token():
     return secrets.token_urlsafe(32)
 
 # Enviar email (no modificado)
+@trazar("smtp.enviar")
 async def send_email(to_email: str, subject: str, body: str):
     message = EmailMessage()
     message["From"] = EMAIL_USER
@@ -97,7 +90,13 @@ async def send_email(to_email: str, subject: str, body: str):
 # FUNCIÓN DE VALIDACIÓN DE TOKEN (get_current_user)
 # ----------------------------------------------------------------------
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserAuthData: 
+@trazar("auth.get_current_user")
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserAuthData: 
+    # Dentro de POST /api/batch el usuario ya se resolvió una vez para todo el lote
+    usuario_lote = request.scope.get("state", {}).get("usuario_lote")
+    if usuario_lote is not None:
+        return usuario_lote
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -166,7 +165,7 @@ async def login(request: UserLogin, db: Session = Depends(get_db)):
         
         # ACCEDEMOS a la nueva relación y al nombre del campo en esa tabla
         current_rol_sistema_code = user.rol_sistema_obj.tipo_roles_usuarios 
-        print(f"DEBUG: Código de Rol del Sistema leído de la BD: {current_rol_sistema_code}")
+        logger.debug("Código de Rol del Sistema leído de la BD: %s", current_rol_sistema_code)
     else:
         raise HTTPException(status_code=500, detail="Error: Rol del Sistema no encontrado para el usuario.")
 
@@ -188,7 +187,7 @@ async def login(request: UserLogin, db: Session = Depends(get_db)):
         current_rol_sistema_code = user.rol_sistema_obj.tipo_roles_usuarios # Debería ser 'ADMIN_SISTEMA', 'ALUMNO_APP'
         
         # 🚨 Debug: Muestra el código de rol leído
-        print(f"DEBUG: Código de Rol del Sistema leído de la BD: {current_rol_sistema_code}")
+        logger.debug("Código de Rol del Sistema leído de la BD: %s", current_rol_sistema_code)
     
     else:
         # Este 'else' es importante por si el usuario existe pero el rol no está mapeado
@@ -233,15 +232,11 @@ async def login(request: UserLogin, db: Session = Depends(get_db)):
         "user": user_auth_data 
     }
     
-    # 🚨 DEBUG: Muestra el JSON FINAL ANTES DE ENVIAR
-    from fastapi.encoders import jsonable_encoder
-    import json
-    
-    response_json = jsonable_encoder(response_data)
-    print("--------------------------------------------------")
-    print("DEBUG: JSON FINAL DE RESPUESTA:")
-    print(json.dumps(response_json, indent=4))
-    print("--------------------------------------------------")
+    # 🚨 DEBUG: Muestra el JSON FINAL ANTES DE ENVIAR (sólo con LOG_LEVEL=DEBUG)
+    if logger.isEnabledFor(logging.DEBUG):
+        # El token no se escribe en el log
+        logger.debug("JSON FINAL DE RESPUESTA:\n%s",
+                     json.dumps({**jsonable_encoder(response_data), "access_token": "***"}, indent=4))
     
     # 4.2 Retornar la variable de respuesta (SOLO UN RETURN)
     return response_data
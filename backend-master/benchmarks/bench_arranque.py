@@ -0,0 +1,92 @@
+# backend-master/benchmarks/bench_arranque.py
+
+# Tiempo de arranque en frío: cuánto tarda un proceso nuevo en importar main.py y quién se lo lleva.
+# Cada corrida es un proceso Python nuevo con -X importtime. Se informa:
+#   - la mediana del tiempo de "import main" en modo normal y en modo de carga perezosa
+#     (CARGA_PEREZOSA=1, ver Core/carga_perezosa.py);
+#   - los módulos del proyecto y los paquetes externos que más tiempo propio suman en el import.
+# No toca la base real: las variables DB_* de los procesos apuntan a un puerto local cerrado
+# (el import no se conecta; sólo arma el engine).
+#
+# Uso (desde backend-master):
+#   python benchmarks/bench_arranque.py
+#   python benchmarks/bench_arranque.py --corridas 15 --top 25
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Paquetes y módulos de primer nivel del proyecto (el resto se agrupa por paquete externo)
+PROPIOS = {"main", "auth", "crud", "database", "models", "schemas", "models_schemas", "Routes", "Services", "Core"}
+
+CODIGO = (
+    "import time, io, contextlib\n"
+    "t0 = time.perf_counter()\n"
+    "with contextlib.redirect_stdout(io.StringIO()):\n"
+    "    import main\n"
+    "print((time.perf_counter() - t0) * 1000)\n"
+)
+
+
+def _corrida(perezosa: bool):
+    entorno = dict(os.environ, DB_HOST="127.0.0.1", DB_PORT="9", PYTHONDONTWRITEBYTECODE="1")
+    entorno["CARGA_PEREZOSA"] = "1" if perezosa else "0"
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CODIGO],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True, check=True,
+    )
+    # -X importtime escribe en stderr: "import time: propio | acumulado | módulo"
+    propio = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        partes = linea[len("import time:"):].split("|")
+        propio[partes[2].strip()] = int(partes[0])
+    return float(proceso.stdout.strip().splitlines()[-1]), propio
+
+
+def _agrupar(propio: dict) -> dict:
+    grupos = defaultdict(int)
+    for modulo, us in propio.items():
+        raiz = modulo.split(".")[0]
+        grupos[modulo if raiz in PROPIOS else f"[{raiz}]"] += us
+    return grupos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del tiempo de import de la app.")
+    parser.add_argument("--corridas", type=int, default=7)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    _corrida(False)  # calentamiento (caches de bytecode y del sistema de archivos)
+
+    resultados = {}
+    for nombre, perezosa in (("normal", False), ("perezosa", True)):
+        tiempos, acumulado = [], defaultdict(list)
+        for _ in range(args.corridas):
+            ms, propio = _corrida(perezosa)
+            tiempos.append(ms)
+            for grupo, us in _agrupar(propio).items():
+                acumulado[grupo].append(us)
+        resultados[nombre] = (tiempos, {g: statistics.median(v) / 1000 for g, v in acumulado.items()})
+
+    print(f"{args.corridas} corridas por modo\n")
+    print(f"{'modo':<10} {'mediana ms':>10} {'mín ms':>8} {'máx ms':>8}")
+    for nombre, (tiempos, _) in resultados.items():
+        print(f"{nombre:<10} {statistics.median(tiempos):>10.1f} {min(tiempos):>8.1f} {max(tiempos):>8.1f}")
+
+    for nombre, (_, grupos) in resultados.items():
+        print(f"\nTiempo propio de import por módulo, modo {nombre} (mediana, ms; [x] = paquete externo)")
+        for grupo, ms in sorted(grupos.items(), key=lambda g: -g[1])[:args.top]:
+            print(f"  {grupo:<45} {ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# backend-master/benchmarks/bench_busqueda.py
+
+# Tiempo de búsqueda del índice de estudiantes (ver Services/busqueda_service.py).
+# Usa una base SQLite en memoria con estudiantes generados (apellidos y nombres comunes, emails
+# realistas), así que no toca la base real. Carga el índice como el arranque y mide, por
+# consulta, la mediana y el máximo de buscar(): búsquedas por prefijo, por DNI y con errores de
+# tipeo (que pasan por la búsqueda aproximada por trigramas).
+#
+# Uso (desde backend-master):
+#   python benchmarks/bench_busqueda.py
+#   python benchmarks/bench_busqueda.py --estudiantes 100000 --repeticiones 50
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+from Services.busqueda_service import IndiceEstudiantes
+
+APELLIDOS = [
+    "González", "Rodríguez", "Gómez", "Fernández", "López", "Díaz", "Martínez", "Pérez", "García",
+    "Sánchez", "Romero", "Sosa", "Álvarez", "Torres", "Ruiz", "Ramírez", "Flores", "Acosta", "Benítez",
+    "Medina", "Suárez", "Herrera", "Aguirre", "Pereyra", "Gutiérrez", "Giménez", "Molina", "Silva",
+    "Castro", "Rojas", "Ortiz", "Luna", "Juárez", "Cabrera", "Ríos", "Ferreyra", "Godoy", "Morales",
+    "Domínguez", "Moreno", "Peralta", "Vega", "Carrizo", "Quiroga", "Castillo", "Ledesma", "Muñoz",
+    "Ojeda", "Ponce", "Vera", "Vázquez", "Villalba", "Cardozo", "Navarro", "Ramos", "Arias", "Coronel",
+]
+NOMBRES = [
+    "María", "José", "Juan", "Ana", "Lucía", "Sofía", "Valentina", "Martina", "Camila", "Julieta",
+    "Mateo", "Santiago", "Benjamín", "Thiago", "Lautaro", "Joaquín", "Tomás", "Agustín", "Facundo",
+    "Nicolás", "Franco", "Lucas", "Emilia", "Catalina", "Micaela", "Florencia", "Agustina", "Milagros",
+    "Carla", "Paula", "Daniela", "Gabriel", "Matías", "Ignacio", "Bruno", "Valentín", "Ezequiel",
+    "Rocío", "Abril", "Morena", "Pilar", "Delfina", "Bautista", "Felipe", "Luciano", "Gonzalo",
+]
+DOMINIOS = ["gmail.com", "hotmail.com", "yahoo.com.ar", "outlook.com", "live.com.ar"]
+
+CONSULTAS = [
+    # Prefijo
+    "gonz", "martinez", "maria", "sosa luc", "garcia valentina", "30123", "gmail",
+    # Con errores de tipeo (búsqueda aproximada)
+    "martines", "valentna", "sanches maria", "hotmial", "gonzales", "rodrigez juan", "fernandes",
+]
+
+
+def generar_estudiantes(Session, cantidad: int):
+    random.seed(1)
+    db = Session()
+    db.add(models.TipoEntidad(id_tipo_entidad=1, tipo_entidad="ESTUDIANTE"))
+    db.commit()
+    filas = []
+    for i in range(1, cantidad + 1):
+        nombre, apellido = random.choice(NOMBRES), random.choice(APELLIDOS)
+        filas.append({
+            "id_entidad": i, "nombre": nombre, "apellido": apellido, "id_tipo_entidad": 1,
+            "dni": random.randint(20000000, 50000000), "legajo": f"L-{i:06d}",
+            "localidad": "Córdoba", "nacionalidad": "Argentina",
+            "email": f"{nombre.lower()}.{apellido.lower()}{random.randint(1, 999)}@{random.choice(DOMINIOS)}",
+        })
+    db.execute(insert(models.Entidad), filas)
+    db.commit()
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la búsqueda de estudiantes.")
+    parser.add_argument("--estudiantes", type=int, default=50000)
+    parser.add_argument("--repeticiones", type=int, default=30)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    generar_estudiantes(Session, args.estudiantes)
+
+    indice = IndiceEstudiantes()
+    db = Session()
+    inicio = time.perf_counter()
+    indice.cargar(db)
+    db.close()
+    print(f"{args.estudiantes} estudiantes, índice cargado en {(time.perf_counter() - inicio) * 1000:.0f} ms, "
+          f"{args.repeticiones} repeticiones\n")
+
+    print(f"{'consulta':<20} {'resultados':>10} {'ms (mediana)':>13} {'ms (máx.)':>10}")
+    for consulta in CONSULTAS:
+        tiempos = []
+        for _ in range(args.repeticiones):
+            t0 = time.perf_counter()
+            resultados = indice.buscar(consulta)
+            tiempos.append((time.perf_counter() - t0) * 1000)
+        print(f"{consulta:<20} {len(resultados):>10} {statistics.median(tiempos):>13.2f} {max(tiempos):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
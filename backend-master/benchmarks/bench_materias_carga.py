@@ -0,0 +1,156 @@
+# backend-master/benchmarks/bench_materias_carga.py
+
+# Compara las formas de cargar Materia con sus relaciones (ver Services/materia_service.py).
+# Usa una base SQLite en memoria con datos generados, así que no toca la base real.
+# Por cada variante mide: consultas ejecutadas, filas y celdas (filas x columnas) que
+# devuelve la base, y el tiempo de consultar + serializar con el esquema de la respuesta.
+#
+# Uso (desde backend-master):
+#   python benchmarks/bench_materias_carga.py
+#   python benchmarks/bench_materias_carga.py --materias 5000 --repeticiones 10
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import joinedload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+import schemas
+from Services.materia_service import con_perfil
+
+
+def generar_datos(Session, n_materias: int):
+    random.seed(1)
+    db = Session()
+    n_cursos = max(1, n_materias // 12)
+    n_docentes = max(1, n_materias // 8)
+    db.add(models.TipoEntidad(id_tipo_entidad=2, tipo_entidad="DOCENTE"))
+    db.add(models.Plan(id_plan=1, nombre_plan="Plan 2020", vigencia_desde=date(2020, 1, 1), resolucion_nro="123/20"))
+    db.add_all(models.CicloLectivo(id_ciclo_lectivo=c, nombre_ciclo_lectivo=str(2020 + c), id_plan=1,
+                                   fecha_inicio_cl=date(2020 + c, 3, 1)) for c in range(1, 6))
+    db.add_all(models.Curso(id_curso=c, curso=f"{c % 6 + 1}° {chr(65 + c % 4)}", id_ciclo_lectivo=c % 5 + 1)
+               for c in range(1, n_cursos + 1))
+    db.add_all(models.NombreMateria(id_nombre_materia=n, nombre_materia=f"Materia {n}") for n in range(1, 41))
+    db.add_all(
+        models.Entidad(
+            id_entidad=d, nombre=f"Nombre{d}", apellido=f"Apellido{d}", id_tipo_entidad=2,
+            fec_nac=date(1980, 1, 1), domicilio="Calle Falsa 123, Barrio Centro", telefono="0351-4000000",
+            localidad="Córdoba", nacionalidad="Argentina", email=f"docente{d}@escuela.edu.ar",
+            cel="351-5000000", dni=20000000 + d, legajo=f"L-{d:05d}", cuit=f"20{20000000 + d}9",
+        )
+        for d in range(1, n_docentes + 1)
+    )
+    db.add_all(
+        models.Materia(id_materia=m, id_nombre_materia=random.randint(1, 40),
+                       id_curso=(m - 1) // 12 + 1, id_entidad=random.randint(1, n_docentes))
+        for m in range(1, n_materias + 1)
+    )
+    db.commit()
+    db.close()
+    return n_cursos
+
+
+# --- Variantes a comparar: (nombre, función(db, id_curso) -> lista, esquema de respuesta) ---
+
+def _original_tabla(db, _):
+    # Como estaba en get_materias / obtener_materias_tabla
+    return db.query(models.Materia).options(
+        joinedload(models.Materia.nombre),
+        joinedload(models.Materia.docente),
+        joinedload(models.Materia.curso).joinedload(models.Curso.ciclo).joinedload(models.CicloLectivo.plan),
+    ).all()
+
+
+def _perfil_tabla(db, _):
+    return con_perfil(db.query(models.Materia), "tabla").all()
+
+
+def _original_curso(db, id_curso):
+    # Como estaba en get_materias_curso: el resto de las relaciones se carga de a una (N+1)
+    return db.query(models.Materia).options(joinedload(models.Materia.nombre)).filter(
+        models.Materia.id_curso == id_curso).all()
+
+
+def _perfil_curso(db, id_curso):
+    return con_perfil(db.query(models.Materia), "por-curso").filter(models.Materia.id_curso == id_curso).all()
+
+
+def _original_simple(db, id_curso):
+    # Como estaba en los informes de notas
+    return db.query(models.Materia).options(joinedload(models.Materia.nombre)).filter(
+        models.Materia.id_curso == id_curso).all()
+
+
+def _perfil_simple(db, id_curso):
+    return con_perfil(db.query(models.Materia), "simple").filter(models.Materia.id_curso == id_curso).all()
+
+
+def _serializar_response(materias):
+    return [schemas.MateriaResponse.model_validate(m).model_dump() for m in materias]
+
+
+def _serializar_simple(materias):
+    return [{"id_materia": m.id_materia, "nombre_materia": m.nombre.nombre_materia} for m in materias]
+
+
+VARIANTES = [
+    ("tabla (original)", _original_tabla, _serializar_response),
+    ("tabla (perfil)", _perfil_tabla, _serializar_response),
+    ("por-curso (original)", _original_curso, _serializar_response),
+    ("por-curso (perfil)", _perfil_curso, _serializar_response),
+    ("simple (original)", _original_simple, _serializar_simple),
+    ("simple (perfil)", _perfil_simple, _serializar_simple),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los perfiles de carga de Materia.")
+    parser.add_argument("--materias", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    n_cursos = generar_datos(Session, args.materias)
+    id_curso = n_cursos // 2 + 1
+
+    sentencias = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, parameters, context, executemany:
+                 sentencias.append((statement, parameters)))
+
+    print(f"{args.materias} materias, {n_cursos} cursos, {args.repeticiones} repeticiones\n")
+    print(f"{'variante':<22} {'consultas':>9} {'filas':>8} {'celdas':>9} {'ms (mediana)':>13}")
+    for nombre, consultar, serializar in VARIANTES:
+        tiempos = []
+        for _ in range(args.repeticiones):
+            sentencias.clear()
+            db = Session()
+            inicio = time.perf_counter()
+            serializar(consultar(db, id_curso))
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            db.close()
+
+        # Filas y celdas que devolvió la base (se vuelven a ejecutar fuera de la medición)
+        ejecutadas = list(sentencias)
+        filas = celdas = 0
+        with engine.connect() as conn:
+            for sentencia, parametros in ejecutadas:
+                resultado = conn.exec_driver_sql(sentencia, parametros).fetchall()
+                filas += len(resultado)
+                celdas += sum(len(f) for f in resultado)
+        print(f"{nombre:<22} {len(ejecutadas):>9} {filas:>8} {celdas:>9} {statistics.median(tiempos):>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# backend-master/benchmarks/bench_serializacion.py
+
+# CPU por petición de los listados más grandes según cómo se serializa la respuesta
+# (ver Core/respuestas.py):
+#   - antes:   response_model + JSONResponse (json de la librería estándar), como estaba.
+#   - orjson:  lo mismo, con RespuestaJSON como clase por defecto.
+#   - ahora:   los endpoints reales. /api/estudiantes/ usa el camino rápido (una sola validación
+#              y dump_json); /api/materias/tabla/ sólo orjson, así que "ahora" = "orjson".
+# Usa una base SQLite en memoria con datos generados (no toca la base real; las dependencias
+# get_db, get_db_lectura y get_current_user se reemplazan) y verifica que las tres variantes
+# devuelvan lo mismo.
+#
+# Uso (desde backend-master):
+#   python benchmarks/bench_serializacion.py
+#   python benchmarks/bench_serializacion.py --materias 3000 --estudiantes 5000 --peticiones 50
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fastapi import Depends, FastAPI, Response
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+import schemas
+from auth import get_current_user
+from database import get_db, get_db_lectura
+from Core.respuestas import RespuestaJSON
+from Routes.routes_estudiantes import router as router_estudiantes
+from Routes.routes_materias import router as router_materias
+from Services.catalogo_service import etag_catalogo
+from Services.materia_service import tabla_materias
+from bench_materias_carga import generar_datos
+
+
+def _usuario_admin():
+    return schemas.UserAuthData(
+        id_usuario=1, name="admin", email="admin@example.com", is_email_verified=True,
+        rol_sistema="ADMIN_SISTEMA", tipo_rol=schemas.TipoRolResponse(cod_tipo_usuario="ADMIN_SISTEMA"),
+    )
+
+
+def _consulta_estudiantes(db):
+    return db.query(models.Entidad).filter(
+        models.Entidad.tipo_entidad.has(models.TipoEntidad.tipo_entidad == "ESTUDIANTE"),
+        models.Entidad.apellido != "",
+        models.Entidad.deleted_at.is_(None)
+    ).all()
+
+
+def _app_como_estaba(clase_respuesta, get_db_prueba) -> FastAPI:
+    # Mismas consultas que los endpoints reales; la respuesta pasa por la validación de FastAPI
+    app = FastAPI(default_response_class=clase_respuesta)
+
+    @app.get("/api/materias/tabla/", response_model=list[schemas.MateriaResponse])
+    def tabla(response: Response, tamano: int = 50, db=Depends(get_db_prueba)):
+        etag = etag_catalogo(db, "materias")
+        total, materias = tabla_materias(db, {}, 1, tamano)
+        response.headers["X-Total-Count"] = str(total)
+        response.headers["ETag"] = etag
+        return materias
+
+    @app.get("/api/estudiantes/", response_model=list[schemas.EstudianteResponse])
+    def estudiantes(db=Depends(get_db_prueba)):
+        return [
+            schemas.EstudianteResponse(
+                id_entidad=est.id_entidad, name=f"{est.apellido}, {est.nombre}".strip(),
+                nombre=est.nombre, apellido=est.apellido, fec_nac=est.fec_nac, email=est.email,
+                domicilio=est.domicilio, telefono=est.telefono
+            ) for est in _consulta_estudiantes(db)
+        ]
+
+    return app
+
+
+def _app_actual(get_db_prueba) -> FastAPI:
+    app = FastAPI(default_response_class=RespuestaJSON)
+    app.include_router(router_materias, prefix="/api/materias")
+    app.include_router(router_estudiantes, prefix="/api/estudiantes")
+    app.dependency_overrides[get_db] = get_db_prueba
+    app.dependency_overrides[get_db_lectura] = get_db_prueba
+    app.dependency_overrides[get_current_user] = _usuario_admin
+    return app
+
+
+def _medir(cliente: TestClient, url: str, peticiones: int):
+    for _ in range(3):  # calentamiento
+        cliente.get(url)
+    cpu, reloj = [], []
+    for _ in range(peticiones):
+        c0, r0 = time.process_time(), time.perf_counter()
+        respuesta = cliente.get(url)
+        cpu.append((time.process_time() - c0) * 1000)
+        reloj.append((time.perf_counter() - r0) * 1000)
+    return statistics.median(cpu), statistics.median(reloj), respuesta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la serialización de los listados.")
+    parser.add_argument("--materias", type=int, default=2000)
+    parser.add_argument("--estudiantes", type=int, default=3000)
+    parser.add_argument("--peticiones", type=int, default=30)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    generar_datos(Session, args.materias)
+    db = Session()
+    db.add(models.TipoEntidad(id_tipo_entidad=1, tipo_entidad="ESTUDIANTE"))
+    db.add_all(
+        models.Entidad(
+            id_entidad=100000 + e, nombre=f"Nombre{e}", apellido=f"Apellido{e}", id_tipo_entidad=1,
+            fec_nac=date(2010, 1, 1), domicilio="Calle Falsa 123", telefono="0351-4000000",
+            localidad="Córdoba", nacionalidad="Argentina", email=f"estudiante{e}@escuela.edu.ar", dni=40000000 + e,
+        )
+        for e in range(args.estudiantes)
+    )
+    db.commit()
+    db.close()
+
+    def get_db_prueba():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    variantes = [
+        ("antes", TestClient(_app_como_estaba(JSONResponse, get_db_prueba))),
+        ("orjson", TestClient(_app_como_estaba(RespuestaJSON, get_db_prueba))),
+        ("ahora", TestClient(_app_actual(get_db_prueba))),
+    ]
+    urls = ["/api/materias/tabla/?tamano=500", "/api/estudiantes/"]
+
+    print(f"{args.materias} materias, {args.estudiantes} estudiantes, {args.peticiones} peticiones por medición\n")
+    print(f"{'endpoint':<34} {'variante':<8} {'CPU ms/pet.':>11} {'ms/pet.':>8} {'bytes':>9}")
+    for url in urls:
+        referencia = None
+        for nombre, cliente in variantes:
+            cpu, reloj, respuesta = _medir(cliente, url, args.peticiones)
+            cuerpo = json.loads(respuesta.content)
+            if referencia is None:
+                referencia = cuerpo
+            elif cuerpo != referencia:
+                print(f"  ¡{nombre} devuelve un cuerpo distinto en {url}!")
+            print(f"{url:<34} {nombre:<8} {cpu:>11.2f} {reloj:>8.2f} {len(respuesta.content):>9}")
+
+
+if __name__ == "__main__":
+    main()
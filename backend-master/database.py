@@ -1,10 +1,19 @@
 #   backend-master\backend-master\database.py
 
 import os
+import logging
 from pathlib import Path
 from dotenv import load_dotenv  # Para cargar datos del archivo .env
 from sqlalchemy import create_engine  # Importamos create_engine para establecer la conexión con la base de datos
 from sqlalchemy.orm import sessionmaker  # Importamos sessionmaker para manejar sesiones de la base de datos
+from starlette.requests import Request  # Para detectar las sub-peticiones de un lote (batch)
+
+from Core.plazos import instalar_plazos  # Plazo de la petición para cada sentencia
+from Core.consultas_lentas import instalar_consultas_lentas  # Registro de consultas lentas
+from Core.trazas import instalar_trazas  # Spans de cada sentencia (si TRAZAS está activo)
+from Core.replicas import GrupoReplicas, SesionEnrutada, debe_leer_primaria, instalar_escrituras  # Réplicas de lectura
+
+logger = logging.getLogger(__name__)
 
 # Buscamos el archivo .env en la misma carpeta que este script
 BASE_DIR = Path(__file__).resolve().parent
@@ -12,9 +21,9 @@ env_path = BASE_DIR / ".env"
 
 if env_path.exists():
     load_dotenv(dotenv_path=env_path)
-    print(f"✅ Archivo .env cargado desde: {env_path}")
+    logger.debug("Archivo .env cargado desde: %s", env_path)
 else:
-    print(f"❌ ERROR: No se encontró el archivo .env en: {env_path}")
+    logger.warning("No se encontró el archivo .env en: %s", env_path)
 
 
 
@@ -23,9 +32,6 @@ else:
 
 # load_dotenv(dotenv_path=env_path)  # Carga los datos del archivo .env
 
-# DEBUG: Para ver si carga en la terminal
-print(f"DEBUG: Conectando a {os.getenv('DB_HOST')} con dialecto {os.getenv('DB_DIALECT')}")
-
 DB_NAME=os.getenv('DB_NAME')
 DB_USER=os.getenv('DB_USER')
 DB_PASSWORD=os.getenv('DB_PASSWORD')
@@ -33,8 +39,12 @@ DB_HOST=os.getenv('DB_HOST')
 DB_DIALECT=os.getenv('DB_DIALECT')
 DB_PORT=os.getenv('DB_PORT')
 
-# Debug para consola
-print(f"DEBUG: Intentando conectar a {DB_HOST} usando {DB_DIALECT}")
+# Por worker: con varios workers (servidor.py) el total es workers x (pool + extras)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+# Debug para consola (LOG_LEVEL=DEBUG)
+logger.debug("Conectando a %s usando %s", DB_HOST, DB_DIALECT)
 
 
 # Definimos la URL de conexión para MySQL utilizando el driver pymysql
@@ -52,26 +62,73 @@ engine = create_engine(
     URL_CONNECTION,
     pool_pre_ping=True,                    # Verifica conexiones muertas (¡importantísimo!)
     pool_recycle=3600,                     # Recicla conexiones cada hora
-    pool_size=10,                          # Tamaño del pool
-    max_overflow=20,                       # Conexiones extras permitidas
+    pool_size=DB_POOL_SIZE,                # Tamaño del pool (por worker)
+    max_overflow=DB_MAX_OVERFLOW,          # Conexiones extras permitidas
     pool_timeout=30,                       # Timeout para obtener conexión del pool
     echo=False,                            # Cambia a True solo para debug
     connect_args={"connect_timeout": 30}   # ¡Aquí va el timeout de conexión correcto!
 )
 
+
+# Réplicas de lectura (opcional, ver Core/replicas.py): DB_REPLICAS="host2:3307,host3"
+def _url_replica(valor: str) -> str:
+    return valor if "://" in valor else f'{DB_DIALECT}://{DB_USER}:{DB_PASSWORD}@{valor}/{DB_NAME}'
+
+engines_replica = [
+    create_engine(
+        _url_replica(valor.strip()),
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=30,
+        connect_args={"connect_timeout": 5}   # corto: si no responde, se lee de la principal
+    )
+    for valor in os.getenv("DB_REPLICAS", "").split(",") if valor.strip()
+]
+
+for _engine in [engine, *engines_replica]:
+    # Cada SELECT lleva el tiempo que le queda a la petición (Core/plazos.py). Va primero: si el
+    # plazo ya venció, la sentencia se corta antes de que la midan los demás eventos.
+    instalar_plazos(_engine)
+    # Mide cada sentencia y guarda las que superan SQL_LENTA_MS (GET /api/metricas/consultas-lentas)
+    instalar_consultas_lentas(_engine)
+    instalar_trazas(_engine)
+
+replicas = GrupoReplicas(engines_replica)
+if replicas:
+    instalar_escrituras(engine)
+    logger.info("Réplicas de lectura: %s", ", ".join(r.nombre for r in replicas.replicas))
+
 # Creamos una fábrica de sesiones para interactuar con la base de datos
 # - autoflush=False evita que los cambios se envíen automáticamente a la BD
 # - autocommit=False significa que las transacciones deben confirmarse manualmente
 # - bind=engine asocia la sesión con el motor de base de datos
 localSession = sessionmaker(autoflush=False, autocommit=False, bind=engine)
 
+# Sesiones de sólo lectura: leen de una réplica (si hay) y escriben en la principal
+_sesionLectura = sessionmaker(class_=SesionEnrutada, autoflush=False, autocommit=False, bind=engine)
+
+
+def sesion_lectura():
+    # Después de escribir, el mismo cliente lee de la principal un rato (leer lo propio)
+    replica = None if not replicas or debe_leer_primaria() else replicas.elegir()
+    return _sesionLectura(replica=replica)
+
 
 # Dependency de FastAPI para inyectar una sesión de base de datos (SQLAlchemy) en los endpoints.
 # Crea una sesión nueva (db = SessionLocal()).
 # La entrega al endpoint con yield db (permite usarla dentro de la función).
 # Al terminar (normal o por error), cierra la sesión automáticamente con db.close() en el finally.
 # Garantiza que cada petición HTTP tenga su propia sesión limpia y que no queden conexiones abiertas.  
-def get_db():
+# Excepción: las sub-peticiones de POST /api/batch usan la sesión que les asigna el lote
+# (request.state.sesion_lote); la abre y la cierra el propio lote.
+def get_db(request: Request):
+    sesion_lote = request.scope.get("state", {}).get("sesion_lote")
+    if sesion_lote is not None:
+        yield sesion_lote
+        return
+
     db = localSession()
     try:
         yield db
@@ -79,3 +136,17 @@ def get_db():
         db.close()
 
 
+
+# Igual que get_db, para los endpoints de sólo lectura (informes, listados, tableros):
+# la sesión lee de una réplica si hay alguna configurada y sana.
+def get_db_lectura(request: Request):
+    sesion_lote = request.scope.get("state", {}).get("sesion_lote")
+    if sesion_lote is not None:
+        yield sesion_lote
+        return
+
+    db = sesion_lectura()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,5 +1,14 @@
 #   backend-master\backend-master\main.py
 
+# Logging antes que nada: los módulos que siguen ya escriben al importarse (ver Core/logs.py).
+# Con LOG_LEVEL=DEBUG se ven los mensajes de depuración (conexión, rutas registradas, etc.)
+import logging
+
+from Core.logs import MiddlewareIdPeticion, configurar_logs
+
+configurar_logs()
+logger = logging.getLogger("main")
+
 # Importamos FastAPI para crear la aplicación
 from fastapi import FastAPI, Depends, HTTPException
 
@@ -13,22 +22,13 @@ from sqlalchemy.orm import Session
 import crud
 import auth
 
-from Routes import  routes_docentes, routes_inasistencias
-
-from Routes.routes_materias import router as materias_router
-from Routes.routes_periodos import router as periodos_router
-from Routes.routes_estudiantes import router as routes_estudiantes
-from Routes.routes_notas import router as notas_router
-from Routes.routes_estudiantes_notas import router as routes_estudiantes_notas
-from Routes.routes_ciclos import router as router_ciclos  # Para traer los ciclos lectivos
-from Routes.routes_cursos import router as router_cursos  # Para traer los cursos
-from Routes.routes_personal import router as router_personal
-from Routes.routes_usuarios import router as router_usuarios
+# Los routers se registran con Core/carga_perezosa.py (todos al importar, o a demanda con CARGA_PEREZOSA=1)
+from Core.carga_perezosa import RouterRegistrado, registrar_routers
 
 from auth import send_email, get_password_hash, generate_token
 
-# Importamos localSession para la base de datos
-from database import localSession
+# Importamos la dependencia de la base de datos
+from database import get_db
 
 # Importamos los esquemas necesarios para validar y serializar datos 
 from schemas import (
@@ -52,6 +52,31 @@ from schemas import (
 # Importamos CORSMiddleware para habilitar CORS
 from fastapi.middleware.cors import CORSMiddleware
 
+# Clase de respuesta JSON por defecto (orjson)
+from Core.respuestas import RespuestaJSON
+
+# Compresión de respuestas (gzip / brotli)
+from Core.compresion import MiddlewareCompresion
+
+# Plazos por ruta (503 + Retry-After al vencer)
+from Core.plazos import MiddlewarePlazos
+
+# Control de admisión por prioridad (429/503 cuando no hay lugar)
+from Core.admision import ADMISION, MiddlewareAdmision
+
+# Perfilador por muestreo de peticiones (X-Perfil: 1 con token de administrador)
+from Core.perfilador import MiddlewarePerfil
+
+# Réplicas de lectura (DB_REPLICAS): leer lo propio después de escribir
+from database import replicas
+from Core.replicas import MiddlewareLecturaPrimaria
+
+# Trazas por petición (TRAZAS=archivo u otlp)
+from Core.trazas import CABECERA_TRAZA, TRAZAS, MiddlewareTrazas
+
+# Calentamiento de cada worker antes de aceptar peticiones
+from Core.arranque import ciclo_de_vida
+
 #from typing import List
 from models import (
     Entidad as EntidadORM,
@@ -67,7 +92,11 @@ from models import (
 app = FastAPI(
     title="AcademIA API",
     description="API para el sistema académico",
-    version="1.0.0"
+    version="1.0.0",
+    # Respuestas JSON con orjson (ver Core/respuestas.py)
+    default_response_class=RespuestaJSON,
+    # Pool de conexiones y caches listos antes de la primera petición (ver Core/arranque.py)
+    lifespan=ciclo_de_vida
 )
 
 
@@ -82,28 +111,35 @@ app.include_router(auth.router, prefix="/api", tags=["Autenticación"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
 
 # INCLUIR ROUTERS CON EL OBJETO 'router' DE CADA ARCHIVO
-#   Endpoint para listar alumnos: http://localhost:8000/api/estudiantes/
-app.include_router(
-    routes_estudiantes, 
-    prefix="/api/estudiantes", 
-    tags=["Estudiantes"]
-    )
-
-app.include_router(notas_router, prefix="/api", tags=["Notas"])
-app.include_router(routes_docentes.router, prefix="/api/docentes", tags=["Docentes"]) 
-app.include_router(routes_inasistencias.router, prefix="/api", tags=["Asistencias"])
-app.include_router(materias_router, prefix="/api/materias", tags=["Materias"])
-app.include_router(periodos_router, prefix="/api/periodos", tags=["Períodos"])
-# http://localhost:8000/api/cursos
-app.include_router(router_cursos, prefix="/api")
-# http://localhost:8000/api/ciclos
-app.include_router(router_ciclos, prefix="/api")
-
-app.include_router(router_personal, prefix="/api")
-
-app.include_router(routes_estudiantes_notas, prefix="/api", tags=["Notas"])
-
-app.include_router(router_usuarios, prefix="/api/usuarios")
+#   En el orden en que se registran. "rutas" son los prefijos de las URL de cada router
+#   (los usa el modo perezoso para saber qué módulo importar).
+ROUTERS = [
+    #   Endpoint para listar alumnos: http://localhost:8000/api/estudiantes/
+    RouterRegistrado("Routes.routes_estudiantes", "/api/estudiantes", ["Estudiantes"], ("/api/estudiantes/",)),
+    RouterRegistrado("Routes.routes_notas", "/api", ["Notas"], ("/api/notas/",)),
+    RouterRegistrado("Routes.routes_docentes", "/api/docentes", ["Docentes"], ("/api/docentes/",)),
+    RouterRegistrado("Routes.routes_inasistencias", "/api", ["Asistencias"], ("/api/estudiantes/inasistencias/",)),
+    # http://localhost:8000/api/inasistencias/curso/{id_curso}/{fecha}
+    RouterRegistrado("Routes.routes_inasistencias_curso", "/api", None, ("/api/inasistencias/",)),
+    RouterRegistrado("Routes.routes_materias", "/api/materias", ["Materias"], ("/api/materias/",)),
+    RouterRegistrado("Routes.routes_periodos", "/api/periodos", ["Períodos"], ("/api/periodos/",)),
+    # http://localhost:8000/api/cursos
+    RouterRegistrado("Routes.routes_cursos", "/api", None, ("/api/cursos/",)),
+    # http://localhost:8000/api/ciclos
+    RouterRegistrado("Routes.routes_ciclos", "/api", None, ("/api/ciclos/",)),
+    RouterRegistrado("Routes.routes_personal", "/api", None, ("/api/personal",)),
+    RouterRegistrado("Routes.routes_estudiantes_notas", "/api", ["Notas"], ("/api/estudiantes/notas/",)),
+    RouterRegistrado("Routes.routes_usuarios", "/api/usuarios", None, ("/api/usuarios/",)),
+    # Varias peticiones GET en una sola llamada: http://localhost:8000/api/batch
+    RouterRegistrado("Routes.routes_batch", "/api", None, ("/api/batch",)),
+    # Métricas del proceso (compresión, etc.): http://localhost:8000/api/metricas
+    RouterRegistrado("Routes.routes_metricas", "/api", None, ("/api/metricas",)),
+    # Chequeos de salud: http://localhost:8000/api/salud/vivo y /api/salud/listo
+    RouterRegistrado("Routes.routes_salud", "/api", None, ("/api/salud/",)),
+    # Perfiles de peticiones: http://localhost:8000/api/perfiles
+    RouterRegistrado("Routes.routes_perfiles", "/api", None, ("/api/perfiles",)),
+]
+registrar_routers(app, ROUTERS)
 
 
 
@@ -114,6 +150,22 @@ origins = [
     'http://localhost:3002',
 ]
 
+# Plazos por ruta. Va primero (el más interno) para que el 503 pase por la compresión y CORS.
+app.add_middleware(MiddlewarePlazos)
+
+# Control de admisión: por fuera de los plazos (la espera en la cola no consume el plazo de la
+# petición) y por dentro de CORS (el navegador tiene que poder leer el 429/503).
+if ADMISION:
+    app.add_middleware(MiddlewareAdmision)
+
+# Réplicas: las peticiones que escribieron registran su token (y marcan la respuesta con una cookie)
+if replicas:
+    app.add_middleware(MiddlewareLecturaPrimaria)
+
+# Compresión de las respuestas. Se agrega antes que CORS para que CORS quede por fuera
+# (el último middleware agregado es el primero en recibir la petición).
+app.add_middleware(MiddlewareCompresion)
+
 # Configuración de CORS
 app.add_middleware(
     CORSMiddleware,
@@ -121,16 +173,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=['*'],    # Permitir todos los métodos (GET, POST, etc.)
     allow_headers=['*'],    # Permitir todos los headers (Authorization, etc.)
+    expose_headers=['X-Total-Count', 'ETag', 'X-Request-ID', 'X-Perfil-Id', CABECERA_TRAZA],   # Cabeceras que el frontend necesita leer
 )
 
+# Perfilador: envuelve a CORS y a la compresión para medirlas también.
+app.add_middleware(MiddlewarePerfil)
+
+# Trazas: span raíz de cada petición (dentro del id de petición, para anotarlo en la traza)
+if TRAZAS:
+    app.add_middleware(MiddlewareTrazas)
+
+# Id de cada petición para correlacionar los logs. Se agrega último para que envuelva a todo
+# (también a CORS y a la compresión).
+app.add_middleware(MiddlewareIdPeticion)
 
-# # Dependencia para la base de datos
-def get_db():
-    db = localSession()
-    try:
-        yield db
-    finally:
-        db.close()
 
 # Ruta raiz
 @app.get("/")
@@ -213,55 +269,111 @@ async def get_entidad(entidad_id: int, current_user: UserAuthData = Depends(auth
     return entidad
 
 # ==================== MIGRACIÓN DE BASE DE DATOS ====================
-from sqlalchemy import text
+from sqlalchemy import inspect, text
+import models
+from Services.resumen_inasistencias_service import reconstruir as reconstruir_resumen_inasistencias
+from Services.catalogo_service import crear_versiones
+from Core.replicas import crear_lectura_primaria
 
 @app.get("/api/migrate")
 async def migrate_db(db: Session = Depends(get_db)):
     """
     Endpoint temporal para actualizar la estructura de la base de datos.
     Agrega las columnas email, domicilio y telefono a tbl_entidad.
+    Crea los índices y las tablas nuevas que usan las consultas (si no existen).
     """
     try:
         # Intentar agregar columna email
         try:
             db.execute(text("ALTER TABLE tbl_entidad ADD COLUMN email VARCHAR(100)"))
         except Exception as e:
-            print(f"Columna email ya existe o error: {e}")
+            logger.info("Columna email ya existe o error: %s", e)
             
         # Intentar agregar columna domicilio
         try:
             db.execute(text("ALTER TABLE tbl_entidad ADD COLUMN domicilio VARCHAR(200)"))
         except Exception as e:
-            print(f"Columna domicilio ya existe o error: {e}")
+            logger.info("Columna domicilio ya existe o error: %s", e)
             
         # Intentar agregar columna telefono
         try:
             db.execute(text("ALTER TABLE tbl_entidad ADD COLUMN telefono VARCHAR(50)"))
         except Exception as e:
-            print(f"Columna telefono ya existe o error: {e}")
+            logger.info("Columna telefono ya existe o error: %s", e)
 
         # Intentar agregar columna fec_nac
         try:
             db.execute(text("ALTER TABLE tbl_entidad ADD COLUMN fec_nac DATE"))
         except Exception as e:
-            print(f"Columna fec_nac ya existe o error: {e}")
-            
+            logger.info("Columna fec_nac ya existe o error: %s", e)
+
+        # Columnas e índices de t_inasistencia (cada sentencia falla sola si ya se aplicó)
+        for descripcion, sentencia in [
+            ("Índice ix_inasistencia_entidad_fecha",
+             "CREATE INDEX ix_inasistencia_entidad_fecha ON t_inasistencia "
+             "(id_entidad, fecha_inasistencia, id_tipo_inasistencia, justificada, id_curso, id_materia)"),
+            ("Índice ix_inasistencia_curso_fecha",
+             "CREATE INDEX ix_inasistencia_curso_fecha ON t_inasistencia "
+             "(id_curso, fecha_inasistencia, id_entidad, id_tipo_inasistencia, id_materia)"),
+            ("Columna t_inasistencia.created_at",
+             "ALTER TABLE t_inasistencia ADD COLUMN created_at DATETIME DEFAULT CURRENT_TIMESTAMP"),
+            ("Columna t_inasistencia.updated_at",
+             "ALTER TABLE t_inasistencia ADD COLUMN updated_at DATETIME "
+             "DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"),
+            ("Índice ix_t_inasistencia_updated_at",
+             "CREATE INDEX ix_t_inasistencia_updated_at ON t_inasistencia (updated_at)"),
+            # Tabla de materias (filtros, orden y versión del catálogo)
+            ("Índice ix_materia_curso_nombre",
+             "CREATE INDEX ix_materia_curso_nombre ON t_materia (id_curso, id_nombre_materia)"),
+            ("Índice ix_materia_entidad", "CREATE INDEX ix_materia_entidad ON t_materia (id_entidad)"),
+            ("Índice ix_materia_updated_at", "CREATE INDEX ix_materia_updated_at ON t_materia (updated_at)"),
+            ("Índice ix_nombre_materia_nombre",
+             "CREATE INDEX ix_nombre_materia_nombre ON t_nombre_materia (nombre_materia)"),
+            ("Índice ix_curso_ciclo", "CREATE INDEX ix_curso_ciclo ON t_curso (id_ciclo_lectivo)"),
+            ("Índice ix_curso_updated_at", "CREATE INDEX ix_curso_updated_at ON t_curso (updated_at)"),
+            ("Índice ix_ciclo_lectivo_plan", "CREATE INDEX ix_ciclo_lectivo_plan ON t_ciclo_lectivo (id_plan)"),
+            # Carga de los docentes y notas faltantes
+            ("Índice ix_inscripciones_materia_entidad",
+             "CREATE INDEX ix_inscripciones_materia_entidad ON t_inscripciones (id_materia, id_entidad)"),
+            ("Índice ix_nota_materia_tipo",
+             "CREATE INDEX ix_nota_materia_tipo ON t_nota "
+             "(id_materia, id_tipo_nota, id_entidad_estudiante, fecha_carga, id_periodo)"),
+            ("Índice ix_inscripciones_ciclo_materia",
+             "CREATE INDEX ix_inscripciones_ciclo_materia ON t_inscripciones "
+             "(id_ciclo_lectivo, id_materia, id_entidad)"),
+        ]:
+            try:
+                db.execute(text(sentencia))
+            except Exception as e:
+                logger.info("%s ya existe o error: %s", descripcion, e)
+
+        # Tablas nuevas (create_all sólo crea las que no existen)
+        resumen_nuevo = not inspect(db.get_bind()).has_table(models.InasistenciaResumen.__tablename__)
+        models.Base.metadata.create_all(
+            bind=db.get_bind(),
+            tables=[
+                models.InasistenciaAcumulada.__table__,
+                models.InasistenciaResumen.__table__,
+            ]
+        )
+        # Contador de versión de cada catálogo (tabla y filas)
+        crear_versiones(db.connection())
+        # Leer lo propio con réplicas de lectura (ver Core/replicas.py)
+        crear_lectura_primaria(db.connection())
+        # El resumen mensual recién creado se llena con las inasistencias existentes
+        if resumen_nuevo:
+            reconstruir_resumen_inasistencias(db)
+
         db.commit()
         return {"message": "Migración completada. Columnas agregadas si no existían."}
     except Exception as e:
         return {"error": str(e)}
     
 
-print("🔍 --- REVISIÓN DE RUTAS REGISTRADAS ---")
-for route in app.routes:
-    if hasattr(route, "path"):
-        print(f"Ruta: {route.path} | Nombre: {route.name}")
-print("🔍 ------------------------------------")
-
-
-print("\n" + "="*50)
-print("SISTEMA DE RUTAS ACTIVAS")
-for route in app.routes:
-    print(f"URL: {route.path} --> Name: {route.name}")
-print("="*50 + "\n")
+# Revisión de las rutas registradas (sólo con LOG_LEVEL=DEBUG)
+if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("SISTEMA DE RUTAS ACTIVAS")
+    for route in app.routes:
+        if hasattr(route, "path"):
+            logger.debug("Ruta: %s | Nombre: %s", route.path, route.name)
 
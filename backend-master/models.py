@@ -2,7 +2,7 @@
 # backend-master\models.py
 
 # Importamos los tipos y funciones necesarias de SQLAlchemy para definir modelos ORM
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, DateTime, Float 
+from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, DateTime, Float, Index 
 
 # Para funciones como CURRENT_TIMESTAMP
 from sqlalchemy.sql import func
@@ -163,6 +163,14 @@ class Materia(Base):
     # Con el Docente (Entidad)
     docente = relationship("Entidad")
 
+    # Índices para los filtros y el orden de la tabla de materias (GET /api/materias/tabla/).
+    # updated_at se usa para la versión del catálogo (ver Services/catalogo_service.py).
+    __table_args__ = (
+        Index("ix_materia_curso_nombre", "id_curso", "id_nombre_materia"),
+        Index("ix_materia_entidad", "id_entidad"),
+        Index("ix_materia_updated_at", "updated_at"),
+    )
+
 
 # Modelo para la tabla tbl_nombre_materia
 class NombreMateria(Base):
@@ -177,6 +185,10 @@ class NombreMateria(Base):
     # Para crear relacion bidireccional con Materia
     materias_vinculadas = relationship("Materia", back_populates="nombre") 
 
+    __table_args__ = (
+        Index("ix_nombre_materia_nombre", "nombre_materia"),
+    )
+
 # ----------------------------------------------------------------------------------
 # MODELOS PARA INSCRIPCIONES
 # ----------------------------------------------------------------------------------
@@ -203,6 +215,12 @@ class Inscripcion(Base):
     tipo_inscripcion = relationship("TipoInscripcion") 
     ciclo_lectivo = relationship("CicloLectivo")       
 
+    # Inscriptos por materia (carga del docente) y por ciclo (notas faltantes)
+    __table_args__ = (
+        Index("ix_inscripciones_materia_entidad", "id_materia", "id_entidad"),
+        Index("ix_inscripciones_ciclo_materia", "id_ciclo_lectivo", "id_materia", "id_entidad"),
+    )
+
 # ----------------------------------------------------------------------------------
 # MODELOS PARA TIPOS DE INSCRIPCIONES
 # ----------------------------------------------------------------------------------
@@ -240,6 +258,54 @@ class Inasistencia(Base):
     justificada = Column(Boolean, default=False)
     motivo_inasistencia = Column(String(255))
 
+    # Timestamps (el escaneo de límites de inasistencias procesa sólo lo modificado)
+    created_at = Column(DateTime, default=func.current_timestamp())
+    updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp(), index=True)
+
+    # Índice para las consultas por estudiante y rango de fechas. Incluye el tipo, la marca de
+    # justificada, el curso y la materia para que los totales se resuelvan sólo con el índice.
+    # El segundo es para la grilla de asistencia de un curso (por curso y rango de fechas).
+    __table_args__ = (
+        Index("ix_inasistencia_entidad_fecha", "id_entidad", "fecha_inasistencia",
+              "id_tipo_inasistencia", "justificada", "id_curso", "id_materia"),
+        Index("ix_inasistencia_curso_fecha", "id_curso", "fecha_inasistencia",
+              "id_entidad", "id_tipo_inasistencia", "id_materia"),
+    )
+
+
+# Modelo para la tabla t_inasistencia_acumulada
+# Totales de inasistencias por estudiante, curso y año que mantiene el escaneo periódico
+# (scan_inasistencias.py) para detectar a quienes superan el límite de inasistencias.
+class InasistenciaAcumulada(Base):
+    __tablename__ = "t_inasistencia_acumulada"
+    id_entidad = Column(Integer, ForeignKey("t_entidad.id_entidad"), primary_key=True)
+    id_curso = Column(Integer, ForeignKey("t_curso.id_curso"), primary_key=True)
+    anio = Column(Integer, primary_key=True)
+    total = Column(Float, nullable=False, default=0)
+    total_justificadas = Column(Float, nullable=False, default=0)
+    # Lo marca la carga de inasistencias cuando borra registros (el escaneo no ve los borrados)
+    recalcular = Column(Boolean, nullable=False, default=False)
+    # Cuándo superó el límite (NULL = no lo superó)
+    alertada_en = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+    estudiante = relationship("Entidad")
+
+
+# Modelo para la tabla t_inasistencia_resumen
+# Resumen mensual de inasistencias por estudiante, curso y marca de justificada.
+# Lo actualiza la carga de inasistencias (ver Services/resumen_inasistencias_service.py).
+class InasistenciaResumen(Base):
+    __tablename__ = "t_inasistencia_resumen"
+    id_entidad = Column(Integer, ForeignKey("t_entidad.id_entidad"), primary_key=True)
+    id_curso = Column(Integer, primary_key=True) # 0 = inasistencias sin curso
+    anio = Column(Integer, primary_key=True)
+    mes = Column(Integer, primary_key=True)
+    justificada = Column(Boolean, primary_key=True)
+    total = Column(Float, nullable=False, default=0) # Suma de los valores de las inasistencias
+    cantidad = Column(Integer, nullable=False, default=0) # Cantidad de registros
+    updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
+
 
 # ----------------------------------------------------------------------------------
 # MODELOS PARA PERIODOS
@@ -328,6 +394,12 @@ class Nota(Base):
     created_at = Column(DateTime, default=func.current_timestamp())
     updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
 
+    # Notas cargadas por materia y tipo de nota: la carga del docente y las notas faltantes
+    # (incluso filtrando por período) se resuelven sólo con el índice
+    __table_args__ = (
+        Index("ix_nota_materia_tipo", "id_materia", "id_tipo_nota", "id_entidad_estudiante", "fecha_carga", "id_periodo"),
+    )
+
 # ----------------------------------------------------------------------------------
 # MODELO CICLOS LECTIVOS
 # ----------------------------------------------------------------------------------
@@ -343,6 +415,10 @@ class CicloLectivo(Base):
     plan = relationship("Plan")     # Un ciclo pertenece a un plan
     cursos = relationship("Curso", back_populates="ciclo")      
 
+    __table_args__ = (
+        Index("ix_ciclo_lectivo_plan", "id_plan"),
+    )
+
 # ----------------------------------------------------------------------------------
 # MODELO PLAN
 # ----------------------------------------------------------------------------------
@@ -369,4 +445,31 @@ class Curso(Base):
     updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp(), nullable=True)
 
     # Relación: Un curso pertenece a un ciclo
-    ciclo = relationship("CicloLectivo", back_populates="cursos")   # Busca "cursos" en CicloLectivo
\ No newline at end of file
+    ciclo = relationship("CicloLectivo", back_populates="cursos")   # Busca "cursos" en CicloLectivo
+
+    __table_args__ = (
+        Index("ix_curso_ciclo", "id_ciclo_lectivo"),
+        Index("ix_curso_updated_at", "updated_at"),
+    )
+
+
+# ----------------------------------------------------------------------------------
+# MODELO VERSIONES DE CATÁLOGOS
+# ----------------------------------------------------------------------------------
+# Un contador por catálogo (p. ej. "materias") que se incrementa cada vez que la app modifica
+# alguna de sus tablas. Se usa para armar el ETag de las respuestas cacheables
+# (ver Services/catalogo_service.py).
+class CatalogoVersion(Base):
+    __tablename__ = "t_catalogo_version"
+    catalogo = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+
+# ----------------------------------------------------------------------------------
+# Con réplicas de lectura: hasta cuándo cada cliente (hash de su token) lee de la base
+# principal después de escribir (ver Core/replicas.py). La comparten todos los workers.
+class LecturaPrimaria(Base):
+    __tablename__ = "t_lectura_primaria"
+    clave = Column(String(32), primary_key=True)
+    hasta = Column(Float, nullable=False, index=True)  # segundos desde epoch (time.time())
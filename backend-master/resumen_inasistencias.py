@@ -0,0 +1,39 @@
+# backend-master/resumen_inasistencias.py
+
+# Reconstrucción del resumen mensual de inasistencias (t_inasistencia_resumen).
+# El resumen se mantiene solo al cargar inasistencias por la API; este comando lo vuelve a
+# generar desde t_inasistencia (primera vez, cargas hechas directo en la base, correcciones).
+#
+# Uso:
+#   python resumen_inasistencias.py              # reconstruye todo
+#   python resumen_inasistencias.py --anio 2025  # sólo un año
+
+import argparse
+import time
+
+from database import localSession
+from Services.resumen_inasistencias_service import reconstruir
+
+
+def reconstruir_resumen(anio=None) -> int:
+    inicio = time.perf_counter()
+    db = localSession()
+    try:
+        filas = reconstruir(db, anio)
+        db.commit()
+        print(f"Resumen de inasistencias{' ' + str(anio) if anio else ''} reconstruido: "
+              f"{filas} filas en {time.perf_counter() - inicio:.3f} s")
+        return filas
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruye el resumen mensual de inasistencias.")
+    parser.add_argument("--anio", type=int, default=None, help="Reconstruye sólo el año indicado.")
+    args = parser.parse_args()
+    reconstruir_resumen(args.anio)
@@ -0,0 +1,84 @@
+# backend-master/scan_inasistencias.py
+
+# Escaneo de límites de inasistencias.
+# Mantiene los totales acumulados por estudiante, curso y año (t_inasistencia_acumulada) y
+# marca a los estudiantes que superan el límite (INASISTENCIAS_LIMITE, por defecto 25).
+# Cada corrida procesa sólo las inasistencias modificadas desde la anterior; no vuelve a
+# sumar el año completo de todos los estudiantes.
+#
+# Uso:
+#   python scan_inasistencias.py               # incremental (desde la última corrida)
+#   python scan_inasistencias.py --completo    # recalcula todo
+#   python scan_inasistencias.py --cada 15     # queda corriendo, cada 15 minutos
+
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+from database import localSession
+from Services.alertas_service import LIMITE_INASISTENCIAS, escanear
+
+# Guarda la marca de la última corrida
+ARCHIVO_ESTADO = Path(__file__).resolve().parent / ".scan_inasistencias_estado.json"
+
+
+def _leer_marca():
+    if not ARCHIVO_ESTADO.exists():
+        return None
+    valor = json.loads(ARCHIVO_ESTADO.read_text()).get("ultimo_updated_at")
+    return datetime.fromisoformat(valor) if valor else None
+
+
+def _guardar_marca(marca: datetime):
+    ARCHIVO_ESTADO.write_text(json.dumps({"ultimo_updated_at": marca.isoformat()}))
+
+
+def scan_inasistencias(completo: bool = False) -> dict:
+    inicio = time.perf_counter()
+    desde = None if completo else _leer_marca()
+    db = localSession()
+    try:
+        # La nueva marca se toma ANTES de leer, para no perder cambios hechos durante la corrida
+        nueva_marca = db.execute(select(func.current_timestamp())).scalar()
+
+        resumen = escanear(db, desde)
+        db.commit()
+        _guardar_marca(nueva_marca)
+
+        resumen["segundos"] = round(time.perf_counter() - inicio, 3)
+        print(f"Escaneo de inasistencias{' desde ' + desde.isoformat() if desde else ' completo'}: "
+              f"{resumen['recalculados']} totales recalculados en {resumen['segundos']} s")
+        for alerta in resumen["nuevas_alertas"]:
+            print(f"  ⚠ Estudiante {alerta['id_entidad']} (curso {alerta['id_curso']}, {alerta['anio']}): "
+                  f"{alerta['total']} inasistencias (límite {LIMITE_INASISTENCIAS})")
+        return resumen
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualiza los totales de inasistencias y las alertas por límite.")
+    parser.add_argument("--completo", action="store_true",
+                        help="Recalcula todos los totales (no sólo lo modificado desde la última corrida).")
+    parser.add_argument("--cada", type=int, default=0, metavar="MINUTOS",
+                        help="Repite el escaneo cada N minutos (tarea programada).")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            scan_inasistencias(completo=args.completo)
+        except Exception:
+            if not args.cada:
+                raise
+        if not args.cada:
+            break
+        time.sleep(args.cada * 60)
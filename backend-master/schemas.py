@@ -8,11 +8,18 @@
 
 
 # Importamos las clases y tipos necesarios de Pydantic para definir esquemas
-from pydantic import BaseModel, EmailStr, Field, computed_field, field_serializer
+from pydantic import BaseModel as _BaseModel, ConfigDict, EmailStr, Field, computed_field, field_serializer
 from typing import Optional, List, Any, Dict
 from datetime import date, datetime
 
 
+# Base de todos los esquemas de este archivo: el validador y el serializador de cada esquema se
+# arman la primera vez que se usa y no al importar (defer_build). Importar este archivo arma
+# casi cien esquemas; la mayoría no se usa en cada proceso (p. ej. con CARGA_PEREZOSA=1).
+class BaseModel(_BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+
 # =========================================================================
 # NUEVOS ESQUEMAS DE ROL
 # =========================================================================
@@ -212,11 +219,42 @@ class EstudianteUpdate(EstudianteBase):
 class EstudianteResponse(EstudianteBase):
     id_entidad: int
     name: str # Campo calculado: "Apellido, Nombre"
-    
+
     # En la clase que hace el response, se pone el Class Config
     class Config:
         from_attributes = True
 
+# Fila del CSV de importación masiva. Suma DNI y legajo a los datos de alta.
+class EstudianteImport(EstudianteCreate):
+    dni: Optional[int] = None
+    legajo: Optional[str] = None
+
+# Error de una fila del CSV (la fila 1 es el encabezado)
+class ImportacionFilaError(BaseModel):
+    fila: int
+    errores: List[str]
+
+# Informe de la importación masiva de estudiantes
+class ImportacionEstudiantesResponse(BaseModel):
+    total_filas: int
+    importados: int
+    rechazados: int
+    errores: List[ImportacionFilaError]
+
+# Resultado de la búsqueda rápida de estudiantes (índice en memoria)
+class EstudianteBusquedaResponse(BaseModel):
+    id_entidad: int
+    name: str # "Apellido, Nombre"
+    nombre: str
+    apellido: str
+    dni: Optional[int] = None
+    legajo: Optional[str] = None
+    email: Optional[str] = None
+    puntaje: float # Relevancia del resultado (mayor es mejor)
+
+    class Config:
+        from_attributes = True
+
 
 # =========================================================================
 # === ESQUEMAS PARA DOCENTES  ===
@@ -288,6 +326,40 @@ class DocenteResponse(DocenteBase):
         from_attributes = True
 
 
+# --- Carga de un docente (GET /api/docentes/{id}/carga) ---
+
+# Notas cargadas y faltantes de una materia para un tipo de nota
+class DocenteCargaNota(BaseModel):
+    id_tipo_nota: int
+    tipo_nota: str
+    cargadas: int    # Estudiantes inscriptos con esa nota cargada
+    faltantes: int   # Inscriptos sin esa nota
+
+class DocenteCargaMateria(BaseModel):
+    id_materia: int
+    nombre_materia: str
+    id_curso: int
+    curso: str
+    inscriptos: int
+    notas: List[DocenteCargaNota]
+    ultima_carga: Optional[date] = None   # Última fecha de carga de notas en la materia
+
+    @computed_field
+    @property
+    def completa(self) -> bool:
+        return all(n.faltantes == 0 for n in self.notas)
+
+class DocenteCargaCiclo(BaseModel):
+    id_ciclo_lectivo: Optional[int] = None
+    nombre_ciclo_lectivo: Optional[str] = None
+    materias: List[DocenteCargaMateria]
+
+class DocenteCargaResponse(BaseModel):
+    id_entidad: int
+    name: str
+    ciclos: List[DocenteCargaCiclo]
+
+
 
 """
 
@@ -359,6 +431,33 @@ class NotaEstudianteResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# --- Notas faltantes (GET /api/notas/faltantes) ---
+
+# Celdas esperadas y faltantes de una materia para un tipo de nota
+class NotaFaltanteGrupo(BaseModel):
+    id_curso: int
+    curso: str
+    id_materia: int
+    nombre_materia: str
+    id_tipo_nota: int
+    tipo_nota: str
+    esperadas: int
+    faltantes: int
+
+# Una celda (estudiante, materia, tipo de nota) sin nota
+class NotaFaltante(BaseModel):
+    id_entidad: int
+    alumno: str
+    id_curso: int
+    id_materia: int
+    id_tipo_nota: int
+
+class NotasFaltantesResponse(BaseModel):
+    esperadas: int
+    faltantes: int
+    grupos: List[NotaFaltanteGrupo]
+    detalle: List[NotaFaltante]
+
 # Esquema para Planilla de calificaciones
 class PlanillaCalificacionesResponse(BaseModel):
     alumno: EstudianteResponse
@@ -468,6 +567,52 @@ class InasistenciaResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Carga de la asistencia diaria de un curso (POST /api/inasistencias/curso/{id_curso}/{fecha})
+# Una inasistencia de un estudiante en el día
+class InasistenciaCargaItem(BaseModel):
+    id_entidad: int
+    id_tipo_inasistencia: int
+    justificada: bool = False
+    motivo_inasistencia: Optional[str] = Field(None, max_length=255)
+
+class InasistenciaCursoCarga(BaseModel):
+    id_materia: Optional[int] = None # None = asistencia general del curso (sin materia)
+    inasistencias: List[InasistenciaCargaItem]
+    # True: la lista es el parte completo del día y se borran las inasistencias que ya no figuran
+    reemplazar: bool = False
+
+class InasistenciaCursoCargaResponse(BaseModel):
+    id_curso: int
+    fecha: date
+    id_materia: Optional[int] = None
+    insertadas: int
+    actualizadas: int
+    eliminadas: int
+
+# Grilla de asistencia de un curso (GET /api/inasistencias/curso/{id_curso}/matriz)
+class EstudianteMatriz(BaseModel):
+    id_entidad: int
+    name: str # "Apellido, Nombre"
+
+class InasistenciaMatrizResponse(BaseModel):
+    id_curso: int
+    id_materia: Optional[int] = None
+    desde: date
+    hasta: date
+    fechas: List[date] # Columnas
+    estudiantes: List[EstudianteMatriz] # Filas
+    valores: List[List[float]] # valores[fila][columna]: suma de inasistencias del día (0 = presente)
+    totales: List[float] # Total de cada estudiante en el rango
+
+# Estudiantes que superaron el límite de inasistencias (GET /api/inasistencias/curso/{id_curso}/alertas)
+class InasistenciaAlerta(BaseModel):
+    id_entidad: int
+    name: str
+    totalInasistencia: float
+    totalInasistenciaJustif: float
+    limite: float
+    alertada_en: datetime
+
 # ----------------------------------------------------
 #   === Esquema para Plan === 
 # ----------------------------------------------------
@@ -666,6 +811,10 @@ class MateriaSimpleResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+# Cantidad de materias que cumplen los filtros de la tabla (GET /api/materias/tabla/count)
+class MateriaTablaTotal(BaseModel):
+    total: int
  
 # =========================================================================
 #   === Esquema para TIPOS DE INSCRIPCIONES. 
@@ -725,4 +874,51 @@ class InscripcionesUpdate(BaseModel):
     id_ciclo_lectivo: Optional[int] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# =========================================================================
+#   === Esquema para DASHBOARD DEL ESTUDIANTE. 
+# =========================================================================
+
+# Materia del ciclo con su fila de notas (igual que MateriaNotaRow, más curso y docente)
+class DashboardMateriaRow(MateriaNotaRow):
+    id_curso: int
+    curso: str
+    docente: str # "Apellido, Nombre" o "Sin asignar"
+
+# Totales de inasistencias del año del ciclo
+class DashboardInasistencias(BaseModel):
+    anio: int
+    totalInasistencia: float
+    totalInasistenciaJustif: float
+
+# Respuesta compacta con todo lo que necesita la pantalla inicial del estudiante
+class DashboardEstudianteResponse(BaseModel):
+    id_entidad: int
+    ciclos: List[CicloLectivoSimple]
+    id_ciclo_lectivo: Optional[int] = None # Ciclo mostrado (el más reciente si no se indica)
+    columnas: List[ColumnaHeader]
+    materias: List[DashboardMateriaRow]
+    inasistencias: DashboardInasistencias
+
+# =========================================================================
+#   === Esquema para PETICIONES POR LOTE (POST /api/batch). 
+# =========================================================================
+
+# Una sub-petición GET del lote
+class BatchSubRequest(BaseModel):
+    id: str = Field(..., min_length=1, max_length=64, description="Identificador elegido por el cliente para ubicar la respuesta.")
+    path: str = Field(..., description="Ruta relativa con query string, ej: /api/notas/estudiante/5?id_materia=3")
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
+# Resultado de cada sub-petición
+class BatchSubResponse(BaseModel):
+    status: int
+    body: Any = None
+    duracion_ms: float
+
+class BatchResponse(BaseModel):
+    resultados: Dict[str, BatchSubResponse] # Clave: id de la sub-petición
+    duracion_ms: float
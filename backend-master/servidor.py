@@ -0,0 +1,100 @@
+# backend-master/servidor.py
+
+# Servidor de producción: gunicorn con N workers de uvicorn.
+#   - preload: la app se importa una sola vez en el proceso principal y los workers se crean con
+#     fork (arrancan más rápido y comparten la memoria del código). Cada worker descarta las
+#     conexiones heredadas (Core/arranque.py: despues_del_fork).
+#   - Cada worker calienta el pool de conexiones y los caches antes de aceptar peticiones
+#     (lifespan de main.py, ver Core/arranque.py).
+#   - Cada worker se reinicia de forma ordenada después de --max-peticiones (más un desvío al
+#     azar de hasta --jitter, para que no se reinicien todos juntos): termina las peticiones en
+#     curso (hasta --gracia segundos) y gunicorn levanta otro en su lugar. Acota la memoria.
+#   - kill -HUP <pid del principal> recarga los workers de a uno, sin cortar el servicio.
+#   - Chequeos de salud: GET /api/salud/vivo y GET /api/salud/listo.
+# Cada worker tiene su propio pool: en total se pueden abrir hasta
+# workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexiones a la base.
+#
+# gunicorn no funciona en Windows: ahí (o si no está instalado) se usa uvicorn con varios
+# workers, sin preload.
+#
+# Uso (desde backend-master):
+#   python servidor.py                          # un worker por núcleo, puerto 8000
+#   python servidor.py --workers 4 --puerto 8080
+#   python servidor.py --max-peticiones 5000 --jitter 500 --gracia 30
+
+import argparse
+import os
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # gunicorn es opcional (no existe para Windows)
+    BaseApplication = None
+
+
+def _post_fork(servidor, worker):
+    from Core.arranque import despues_del_fork
+    despues_del_fork()
+
+
+def _al_arrancar(servidor):
+    servidor.log.info("AcademIA: %s workers en %s", servidor.cfg.workers, servidor.cfg.bind)
+
+
+if BaseApplication is not None:
+    class ServidorGunicorn(BaseApplication):
+        def __init__(self, opciones: dict):
+            self.opciones = opciones
+            super().__init__()
+
+        def load_config(self):
+            for clave, valor in self.opciones.items():
+                self.cfg.set(clave, valor)
+
+        def load(self):
+            from main import app
+            return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Levanta la API con varios workers.")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--puerto", type=int, default=int(os.getenv("PUERTO", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", str(os.cpu_count() or 1))),
+                        help="Cantidad de workers (por defecto, uno por núcleo).")
+    parser.add_argument("--max-peticiones", type=int, default=int(os.getenv("MAX_PETICIONES", "2000")),
+                        help="Peticiones tras las que se reinicia cada worker (0 = nunca).")
+    parser.add_argument("--jitter", type=int, default=int(os.getenv("MAX_PETICIONES_JITTER", "200")),
+                        help="Desvío al azar de --max-peticiones.")
+    parser.add_argument("--gracia", type=int, default=int(os.getenv("TIMEOUT_GRACIA", "30")),
+                        help="Segundos para terminar las peticiones en curso al reiniciar un worker.")
+    parser.add_argument("--timeout", type=int, default=int(os.getenv("TIMEOUT_WORKER", "120")),
+                        help="Segundos sin responder tras los que se reinicia un worker colgado.")
+    args = parser.parse_args()
+
+    if BaseApplication is None or os.name == "nt":
+        import uvicorn
+        print("gunicorn no disponible: se usa uvicorn (sin preload).")
+        uvicorn.run(
+            "main:app", host=args.host, port=args.puerto, workers=args.workers,
+            limit_max_requests=args.max_peticiones or None,
+            timeout_graceful_shutdown=args.gracia,
+        )
+        return
+
+    ServidorGunicorn({
+        "bind": f"{args.host}:{args.puerto}",
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "max_requests": args.max_peticiones,
+        "max_requests_jitter": args.jitter,
+        "graceful_timeout": args.gracia,
+        "timeout": args.timeout,
+        "keepalive": 5,
+        "post_fork": _post_fork,
+        "when_ready": _al_arrancar,
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,182 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-import sys
-import os
-
-# Add backend directory to path to import models
-sys.path.append(r'c:\Sistema\backend-master\backend-master')
-
-from database import localSession
-from models import Entidad, User, UsuarioTipos
-
-def sync_students():
-    db = localSession()
-    try:
-        print("Starting synchronization of Students (Users -> Entities)...")
-        
-        # 1. Get all users with type 'EST'
-        # Explicit join condition
-        est_users = db.query(User).join(UsuarioTipos, User.id == UsuarioTipos.usuario_id).filter(UsuarioTipos.cod_tipo_usuario == 'EST').all()
-        print(f"Found {len(est_users)} users with type 'EST'.")
-        
-        count_created = 0
-        count_skipped = 0
-        
-        for user in est_users:
-            # 2. Check if entity already exists for this user (by usuario_id or email)
-            # We check by usuario_id first as it's the most direct link, but also email to avoid duplicates if linked differently
-            existing_entity = db.query(Entidad).filter(
-                (Entidad.usuario_id == user.id) | (Entidad.email == user.email)
-            ).first()
-            
-            if existing_entity:
-                # Check if it has ALU type, if not add it? For now, just skip if exists
-                # print(f"Skipping User {user.name} ({user.email}) - Entity already exists (ID: {existing_entity.id_entidad})")
-                count_skipped += 1
-                continue
-            
-            # 3. Create new Entity
-            # Split name
-            parts = user.name.split(' ', 1)
-            nombre = parts[0]
-            apellido = parts[1] if len(parts) > 1 else ""
-            
-            new_entity = Entidad(
-                usuario_id=user.id,
-                nombre=nombre,
-                apellido=apellido,
-                email=user.email,
-                tipos_entidad="ALU", # Default to ALU for students
-                # Optional fields left null for now
-                domicilio=None,
-                telefono=None,
-                fec_nac=None
-            )
-            
-            db.add(new_entity)
-            count_created += 1
-            print(f"Creating Entity for User {user.name} ({user.email})")
-            
-        db.commit()
-        print(f"\nSync complete.")
-        print(f"Created: {count_created}")
-        print(f"Skipped: {count_skipped}")
-
-    except Exception as e:
-        print(f"Error: {e}")
-        db.rollback()
-    finally:
-        db.close()
-
-if __name__ == "__main__":
-    sync_students()
+# backend-master/sync_students.py
+
+# Sincronización de Estudiantes (Usuarios -> Entidades).
+# Crea la Entidad de cada usuario con rol ALUMNO_APP que todavía no la tiene y lo vincula
+# (t_usuarios.id_entidad). Todo se resuelve con pocas sentencias por conjunto:
+#   1. Vincula los usuarios sin entidad cuyo email ya existe en t_entidad (UPDATE ... JOIN).
+#   2. Busca los usuarios que siguen sin entidad (anti-join contra t_entidad por email).
+#   3. Inserta las entidades faltantes en bloques (executemany).
+#   4. Vincula los usuarios recién creados (mismo UPDATE ... JOIN del paso 1).
+#
+# Uso:
+#   python sync_students.py                   # sincroniza todo
+#   python sync_students.py --incremental     # sólo usuarios modificados desde la última corrida
+#   python sync_students.py --dry-run         # informa lo que haría, sin escribir
+#   python sync_students.py --incremental --cada 1440   # queda corriendo, una vez por día
+
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import and_, func, insert, select, update
+
+from database import localSession
+from models import Entidad, TipoRolSistema, User
+
+# Rol del sistema de los estudiantes (antes 'EST' en tbl_usuario_tipos)
+ROL_ESTUDIANTE = "ALUMNO_APP"
+
+# Tipo de entidad ESTUDIANTE (igual que en create_estudiante)
+ID_TIPO_ENTIDAD_ESTUDIANTE = 1
+
+# Cantidad de entidades por cada INSERT
+TAMANO_BLOQUE = 500
+
+# Guarda la marca de la última corrida para el modo incremental
+ARCHIVO_ESTADO = Path(__file__).resolve().parent / ".sync_students_estado.json"
+
+
+def _leer_marca():
+    if not ARCHIVO_ESTADO.exists():
+        return None
+    valor = json.loads(ARCHIVO_ESTADO.read_text()).get("ultimo_updated_at")
+    return datetime.fromisoformat(valor) if valor else None
+
+
+def _guardar_marca(marca: datetime):
+    ARCHIVO_ESTADO.write_text(json.dumps({"ultimo_updated_at": marca.isoformat()}))
+
+
+def _condiciones_usuarios(desde):
+    # Usuarios estudiantes, activos y sin entidad vinculada
+    condiciones = [
+        User.id_entidad.is_(None),
+        User.deleted_at.is_(None),
+        User.id_rol_sistema_fk == (
+            select(TipoRolSistema.id_tipo_roles_usuarios)
+            .where(TipoRolSistema.tipo_roles_usuarios == ROL_ESTUDIANTE)
+            .scalar_subquery()
+        ),
+    ]
+    if desde is not None:
+        condiciones.append(User.updated_at >= desde)
+    return condiciones
+
+
+def _vincular_por_email(db, desde) -> int:
+    # UPDATE t_usuarios, t_entidad SET t_usuarios.id_entidad = t_entidad.id_entidad
+    # WHERE t_usuarios.email = t_entidad.email AND ...
+    resultado = db.execute(
+        update(User)
+        .where(User.email == Entidad.email, Entidad.deleted_at.is_(None), *_condiciones_usuarios(desde))
+        .values(id_entidad=Entidad.id_entidad)
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount
+
+
+def _usuarios_sin_entidad(db, desde):
+    # Anti-join: usuarios sin ninguna entidad con su email
+    return db.execute(
+        select(User.name, User.email)
+        .outerjoin(Entidad, and_(Entidad.email == User.email, Entidad.deleted_at.is_(None)))
+        .where(Entidad.id_entidad.is_(None), *_condiciones_usuarios(desde))
+    ).all()
+
+
+def _nueva_entidad(nombre_usuario: str, email: str) -> dict:
+    # El nombre de usuario se separa en nombre y apellido
+    partes = nombre_usuario.split(' ', 1)
+    return {
+        "nombre": partes[0],
+        "apellido": partes[1] if len(partes) > 1 else "",
+        "email": email,
+        "id_tipo_entidad": ID_TIPO_ENTIDAD_ESTUDIANTE,
+        # Datos obligatorios en t_entidad que el usuario no tiene
+        "localidad": "No especificada",
+        "nacionalidad": "No especificada",
+        "dni": 0,
+    }
+
+
+def sync_students(incremental: bool = False, dry_run: bool = False) -> dict:
+    tiempos = {}
+    inicio_total = time.perf_counter()
+
+    desde = _leer_marca() if incremental else None
+    db = localSession()
+    try:
+        print(f"Sincronizando Estudiantes (Usuarios -> Entidades)"
+              f"{' desde ' + desde.isoformat() if desde else ''}{' [DRY-RUN]' if dry_run else ''}...")
+
+        # La nueva marca se toma ANTES de leer, para no perder cambios hechos durante la corrida
+        nueva_marca = db.execute(select(func.current_timestamp())).scalar()
+
+        t = time.perf_counter()
+        vinculados = _vincular_por_email(db, desde)
+        tiempos["vincular_existentes"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        faltantes = _usuarios_sin_entidad(db, desde)
+        tiempos["anti_join"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        filas = [_nueva_entidad(u.name, u.email) for u in faltantes]
+        for i in range(0, len(filas), TAMANO_BLOQUE):
+            db.execute(insert(Entidad), filas[i:i + TAMANO_BLOQUE])
+        tiempos["insertar"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        vinculados_nuevos = _vincular_por_email(db, desde) if filas else 0
+        tiempos["vincular_nuevos"] = time.perf_counter() - t
+
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+            _guardar_marca(nueva_marca)
+
+        tiempos["total"] = time.perf_counter() - inicio_total
+        resumen = {
+            "vinculados_existentes": vinculados,
+            "entidades_creadas": len(filas),
+            "vinculados_nuevos": vinculados_nuevos,
+            "tiempos_seg": {k: round(v, 3) for k, v in tiempos.items()},
+        }
+
+        print("\nSincronización completa." if not dry_run else "\nDry-run completo (no se guardó nada).")
+        print(f"Vinculados a entidad existente: {vinculados}")
+        print(f"Entidades creadas: {len(filas)}")
+        for etapa, segundos in resumen["tiempos_seg"].items():
+            print(f"  {etapa:<22} {segundos:>8.3f} s")
+        return resumen
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza usuarios estudiantes con t_entidad.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Procesa sólo los usuarios modificados desde la última corrida (updated_at).")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Calcula los cambios y los descarta (rollback).")
+    parser.add_argument("--cada", type=int, default=0, metavar="MINUTOS",
+                        help="Repite la sincronización cada N minutos (tarea programada).")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            sync_students(incremental=args.incremental, dry_run=args.dry_run)
+        except Exception:
+            if not args.cada:
+                raise
+        if not args.cada:
+            break
+        time.sleep(args.cada * 60)